@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresión brotli/gzip de respuestas JSON (media excluida), ver core.middleware
+    'core.middleware.JSONCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -206,8 +208,53 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson (core.renderers); cae a json de la stdlib si no está instalado
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Compresión de respuestas JSON (core.middleware.JSONCompressionMiddleware)
+API_COMPRESSION_MIN_SIZE = int(os.getenv('API_COMPRESSION_MIN_SIZE', '1024'))
+API_COMPRESSION_GZIP_LEVEL = int(os.getenv('API_COMPRESSION_GZIP_LEVEL', '6'))
+API_COMPRESSION_BROTLI_QUALITY = int(os.getenv('API_COMPRESSION_BROTLI_QUALITY', '4'))
+API_COMPRESSION_EXCLUDE_PREFIXES = [MEDIA_URL, STATIC_URL, '/api/downloads/']
+
+# Paginación por cursor (keyset) de los listados de assets (broadcasts, audios, images, storage).
+# Mientras ASSET_PAGINATION_LEGACY=True, las peticiones sin ?cursor ni ?page_size siguen
+# recibiendo la lista completa (formato anterior) para que el frontend migre gradualmente.
+ASSET_PAGINATION_LEGACY = os.getenv('ASSET_PAGINATION_LEGACY', 'True') == 'True'
+ASSET_PAGE_SIZE = int(os.getenv('ASSET_PAGE_SIZE', '100'))
+ASSET_MAX_PAGE_SIZE = int(os.getenv('ASSET_MAX_PAGE_SIZE', '1000'))
+# Segundos que se guarda una página serializada de un listado (core.listcache); las escrituras la invalidan antes
+LIST_CACHE_TIMEOUT = int(os.getenv('LIST_CACHE_TIMEOUT', '300'))
+# Máximo de IDs por petición a POST /api/assets/status/
+ASSET_STATUS_MAX_IDS = int(os.getenv('ASSET_STATUS_MAX_IDS', '5000'))
+# Duplicados al subir (core.duplicates): archivos por manifiesto en /api/uploads/precheck/
+# y segundos que se reserva un nombre mientras se crea el asset
+UPLOAD_PRECHECK_MAX_FILES = int(os.getenv('UPLOAD_PRECHECK_MAX_FILES', '5000'))
+UPLOAD_NAME_LOCK_TIMEOUT = 120
+
+# Uploads grandes (> FILE_UPLOAD_MAX_MEMORY_SIZE) se escriben en un temporal dentro de
+# MEDIA_ROOT y se mueven con rename a sources/ en lugar de copiarse desde /tmp (core.upload_handlers)
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'core.upload_handlers.MediaRootUploadHandler',
+]
+UPLOAD_TEMP_DIR = os.getenv('UPLOAD_TEMP_DIR', '')  # vacío = MEDIA_ROOT/.uploads (debe estar en el mismo disco)
+
+# Upload reanudable por partes (core.uploads)
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024  # default si el cliente no manda chunk_size
+UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+UPLOAD_MAX_SIZE = 200 * 1024 ** 3  # 200 GB
+UPLOAD_SESSION_TTL_HOURS = 24  # sesiones sin partes nuevas en este tiempo se cancelan
+
 # settings.py (al final)
 # Celery Configuration Options
 # Support both Docker (redis:6379) and native (localhost:6379) setups
@@ -224,6 +271,14 @@ else:
     CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}'
     CELERY_RESULT_BACKEND = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}'
 
+# Eventos en tiempo real (core.events): Redis pub/sub -> GET /api/events/ (SSE).
+# EVENTS_ENABLED=False vuelve al polling del frontend.
+EVENTS_ENABLED = os.getenv('EVENTS_ENABLED', 'True') == 'True'
+EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL', CELERY_BROKER_URL)
+EVENTS_SSE_HEARTBEAT = 15  # segundos entre comentarios keep-alive
+EVENTS_SSE_WSGI_MAX_SECONDS = 55  # bajo WSGI cada conexión ocupa un hilo; se recicla
+EVENTS_RETRY_SECONDS = 30  # pausa tras un fallo de Redis al publicar
+
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
@@ -231,6 +286,61 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes max for video processing
 
+# Registro de workers vivos (core.workers): los heartbeats de Celery lo mantienen en cache
+WORKER_HEARTBEAT_TTL = 30  # segundos sin heartbeat para dar un worker por caído
+WORKER_REGISTRY_REFRESH = 10  # segundos entre escrituras al registro por worker
+
+# Inventario de media (core.inventory): carpetas de MEDIA_ROOT que se indexan en MediaFile
+MEDIA_INVENTORY_ROOTS = [r.strip() for r in os.getenv('MEDIA_INVENTORY_ROOTS', 'sources').split(',') if r.strip()]
+MEDIA_INVENTORY_SCAN_INTERVAL = int(os.getenv('MEDIA_INVENTORY_SCAN_INTERVAL', '300'))  # segundos
+
+# Log de errores de procesamiento (core.errorlog): compactación diaria
+ERROR_RETENTION_DAYS = int(os.getenv('ERROR_RETENTION_DAYS', '30'))  # borrar errores resueltos más viejos
+ERROR_STDERR_ARCHIVE_DAYS = int(os.getenv('ERROR_STDERR_ARCHIVE_DAYS', '7'))  # comprimir stderr largo tras N días
+ERROR_STDERR_ARCHIVE_MIN_LENGTH = 2000  # caracteres
+
+# Links compartidos públicos (core.sharelinks): lookup cacheado y analytics acumulados en Redis
+SHARED_LINK_CACHE_TIMEOUT = 300  # segundos
+SHARED_LINK_FLUSH_INTERVAL = int(os.getenv('SHARED_LINK_FLUSH_INTERVAL', '60'))  # segundos entre flush a la BD
+
+# Tareas periódicas (requiere `celery -A archivoplus_backend beat`)
+SOURCE_PRESENCE_CHECK_INTERVAL = int(os.getenv('SOURCE_PRESENCE_CHECK_INTERVAL', '600'))  # segundos
+CELERY_BEAT_SCHEDULE = {
+    # Escaneo incremental del inventario (solo re-lista carpetas cuyo mtime cambió)
+    'scan-media-inventory': {
+        'task': 'core.tasks.scan_media_inventory',
+        'schedule': MEDIA_INVENTORY_SCAN_INTERVAL,
+    },
+    # Escaneo completo nocturno: detecta archivos sobrescritos sin cambio en la carpeta
+    'scan-media-inventory-full': {
+        'task': 'core.tasks.scan_media_inventory',
+        'schedule': 24 * 60 * 60,
+        'kwargs': {'full': True},
+    },
+    # Mantiene Broadcast.archivo_presente al día para transcode_status / pending_details
+    'check-source-presence': {
+        'task': 'core.tasks.check_source_presence',
+        'schedule': SOURCE_PRESENCE_CHECK_INTERVAL,
+        'kwargs': {'estados': ['PENDIENTE', 'ERROR']},
+    },
+    'check-source-presence-full': {
+        'task': 'core.tasks.check_source_presence',
+        'schedule': 24 * 60 * 60,
+    },
+    'flush-shared-link-counters': {
+        'task': 'core.tasks.flush_shared_link_counters',
+        'schedule': SHARED_LINK_FLUSH_INTERVAL,
+    },
+    'cleanup-upload-sessions': {
+        'task': 'core.tasks.cleanup_upload_sessions',
+        'schedule': 60 * 60,
+    },
+    'compact-processing-errors': {
+        'task': 'core.tasks.compact_processing_errors',
+        'schedule': 24 * 60 * 60,
+    },
+}
+
 # settings.py
 AUTH_USER_MODEL = 'core.CustomUser'
 
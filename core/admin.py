@@ -1,7 +1,7 @@
 # core/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Repositorio, Agencia, Broadcast, Audio, SharedLink, RepositorioPermiso, Modulo, Perfil, ImageAsset, StorageAsset, ProcessingError, EncodingPreset
+from .models import CustomUser, Repositorio, Agencia, Broadcast, Audio, SharedLink, RepositorioPermiso, Modulo, Perfil, ImageAsset, StorageAsset, ProcessingError, ProcessingErrorRollup, EncodingPreset
 
 @admin.register(Perfil)
 class PerfilAdmin(admin.ModelAdmin):
@@ -44,17 +44,11 @@ class RepositorioAdmin(admin.ModelAdmin):
 
 class BroadcastAdmin(admin.ModelAdmin):
     # Show fields derived from pizarra along with new fields
-    list_display = ('p_producto', 'p_version', 'repositorio', 'estado_transcodificacion', 'fecha_subida')
-    list_filter = ('repositorio', 'estado_transcodificacion', 'fecha_subida')
-    search_fields = ('pizarra__producto', 'pizarra__version')
-
-    def p_producto(self, obj):
-        return obj.pizarra.get('producto', '') if obj.pizarra else ''
-    p_producto.short_description = 'Product'
-
-    def p_version(self, obj):
-        return obj.pizarra.get('version', '') if obj.pizarra else ''
-    p_version.short_description = 'Version'
+    list_display = ('producto', 'version', 'cliente', 'repositorio', 'estado_transcodificacion', 'fecha_subida')
+    list_filter = ('repositorio', 'estado_transcodificacion', 'anio', 'fecha_subida')
+    # Columnas indexadas sincronizadas desde la pizarra (sin extraer JSON por fila)
+    search_fields = ('producto', 'version', 'cliente', 'id_content', 'nombre_original')
+    list_select_related = ('repositorio',)
 
 class AudioAdmin(admin.ModelAdmin):
     """Admin para archivos de audio"""
@@ -66,7 +60,7 @@ class AudioAdmin(admin.ModelAdmin):
 class SharedLinkAdmin(admin.ModelAdmin):
     list_display = ('titulo', 'broadcast', 'activo', 'vistas', 'reproducciones', 'fecha_expiracion', 'creado_por', 'fecha_creacion')
     list_filter = ('activo', 'fecha_creacion', 'fecha_expiracion')
-    search_fields = ('titulo', 'broadcast__pizarra__producto')
+    search_fields = ('titulo', 'broadcast__producto')
     readonly_fields = ('id', 'vistas', 'reproducciones', 'ultima_visita', 'fecha_creacion')
     
     def get_readonly_fields(self, request, obj=None):
@@ -112,6 +106,12 @@ class ProcessingErrorAdmin(admin.ModelAdmin):
     readonly_fields = ('fecha_creacion',)
 
 
+@admin.register(ProcessingErrorRollup)
+class ProcessingErrorRollupAdmin(admin.ModelAdmin):
+    list_display = ('dia', 'repositorio', 'stage', 'total')
+    list_filter = ('stage', 'repositorio', 'dia')
+
+
 @admin.register(EncodingPreset)
 class EncodingPresetAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'categoria', 'creado_por', 'es_global', 'activo', 'veces_usado', 'fecha_creacion')
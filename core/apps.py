@@ -5,3 +5,8 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
+    def ready(self):
+        # Registrar señales (versiones por repositorio para ETags/cache)
+        from . import signals  # noqa: F401
+        # Registro de workers Celery (señales worker_ready / heartbeat_sent)
+        from . import workers  # noqa: F401
@@ -0,0 +1,142 @@
+"""
+Contexto de autorización compilado por usuario.
+
+Reúne en un solo objeto lo que antes se consultaba en cada request: repositorios
+visibles/editables/borrables (RepositorioPermiso), módulos permitidos por
+repositorio y las banderas del perfil. Se guarda en cache por usuario y las
+señales (core.signals) lo borran cuando cambian permisos, perfil o usuario, así
+que los viewsets filtran sin tocar RepositorioPermiso en el camino caliente.
+"""
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+AUTHZ_CACHE_KEY = 'authz:user:{}'
+AUTHZ_CACHE_TIMEOUT = 60 * 60
+# Atributo donde se memoiza el contexto en la instancia del usuario (dura lo que el request)
+_USER_ATTR = '_authz_context'
+
+
+class AuthorizationContext:
+    """Permisos efectivos de un usuario. ``is_admin`` (superuser/staff) ve todos los repositorios."""
+
+    def __init__(self, user_id, is_superuser=False, is_staff=False, repositorios=None, perfil=None):
+        self.user_id = user_id
+        self.is_superuser = is_superuser
+        self.is_admin = is_superuser or is_staff
+        # {repositorio_id: {'ver': bool, 'editar': bool, 'borrar': bool, 'modulos': [ids]}}
+        self.repositorios = repositorios or {}
+        # Banderas puede_* del perfil activo ({} si no tiene perfil o está inactivo)
+        self.perfil = perfil or {}
+        self.repositorio_ids = frozenset(r for r, p in self.repositorios.items() if p['ver'])
+
+    # --------------------------------------------------------
+    # Serialización para cache (las banderas is_superuser/is_staff se toman
+    # siempre del usuario cargado en el request)
+    # --------------------------------------------------------
+    def to_dict(self):
+        return {'repositorios': self.repositorios, 'perfil': self.perfil}
+
+    @classmethod
+    def for_user(cls, user, data):
+        return cls(user.pk, is_superuser=user.is_superuser, is_staff=user.is_staff, **data)
+
+    # --------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------
+    def visible_repositorios(self):
+        """IDs de repositorios visibles, o None si puede ver todos."""
+        return None if self.is_admin else self.repositorio_ids
+
+    def puede_ver(self, repositorio_id):
+        return self.is_admin or repositorio_id in self.repositorio_ids
+
+    def puede_editar(self, repositorio_id):
+        return self.is_admin or self.repositorios.get(repositorio_id, {}).get('editar', False)
+
+    def puede_borrar(self, repositorio_id):
+        return self.is_admin or self.repositorios.get(repositorio_id, {}).get('borrar', False)
+
+    def modulos_permitidos(self, repositorio_id):
+        """IDs de módulos habilitados al usuario en el repositorio, o None si no hay restricción."""
+        if self.is_admin:
+            return None
+        return self.repositorios.get(repositorio_id, {}).get('modulos', [])
+
+    def tiene_permiso(self, permiso):
+        if self.is_superuser:
+            return True
+        return bool(self.perfil.get(permiso, False))
+
+    def filter_queryset(self, qs, field='repositorio_id'):
+        """Limita ``qs`` a los repositorios visibles (sin subconsulta a RepositorioPermiso)."""
+        if self.is_admin:
+            return qs
+        return qs.filter(**{f'{field}__in': sorted(self.repositorio_ids)})
+
+
+def build_context(user):
+    """Compila el contexto desde la base de datos (2 consultas: perfil y permisos con módulos)."""
+    from .models import Perfil, RepositorioPermiso
+
+    perfil = {}
+    perfil_id = getattr(user, 'perfil_id', None)
+    if perfil_id:
+        row = Perfil.objects.filter(pk=perfil_id, activo=True).values().first()
+        if row:
+            perfil = {k: v for k, v in row.items() if k.startswith('puede_')}
+            perfil['clave'] = row['clave']
+
+    repositorios = {}
+    permisos = (
+        RepositorioPermiso.objects.filter(usuario_id=user.pk)
+        .values_list('repositorio_id', 'puede_ver', 'puede_editar', 'puede_borrar', 'modulos_permitidos')
+        .order_by('repositorio_id')
+    )
+    for repositorio_id, ver, editar, borrar, modulo_id in permisos:
+        entry = repositorios.setdefault(repositorio_id, {'ver': ver, 'editar': editar, 'borrar': borrar, 'modulos': []})
+        if modulo_id is not None:
+            entry['modulos'].append(modulo_id)
+
+    return AuthorizationContext.for_user(user, {'repositorios': repositorios, 'perfil': perfil})
+
+
+def get_context(user):
+    """
+    Contexto de autorización del usuario: memoizado en la instancia y en cache.
+    Usuarios anónimos regresan un contexto vacío (sin repositorios).
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return AuthorizationContext(user_id=None)
+    ctx = getattr(user, _USER_ATTR, None)
+    if ctx is not None:
+        return ctx
+
+    key = AUTHZ_CACHE_KEY.format(user.pk)
+    data = None
+    try:
+        data = cache.get(key)
+    except Exception as e:
+        logger.warning(f"No se pudo leer el contexto de autorización de cache: {e}")
+    if data is not None:
+        ctx = AuthorizationContext.for_user(user, data)
+    else:
+        ctx = build_context(user)
+        try:
+            cache.set(key, ctx.to_dict(), AUTHZ_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el contexto de autorización en cache: {e}")
+    setattr(user, _USER_ATTR, ctx)
+    return ctx
+
+
+def invalidate(*user_ids):
+    keys = [AUTHZ_CACHE_KEY.format(uid) for uid in user_ids if uid is not None]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"No se pudo invalidar el contexto de autorización: {e}")
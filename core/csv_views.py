@@ -68,7 +68,7 @@ def export_broadcasts_csv(request):
     ])
     
     # Data rows - filter by repositorio if provided
-    broadcasts = Broadcast.objects.all().select_related('repositorio', 'directorio', 'modulo')
+    broadcasts = Broadcast.objects.all().select_related('repositorio', 'directorio', 'modulo', 'creado_por')
     
     if repositorio_id:
         broadcasts = broadcasts.filter(repositorio_id=repositorio_id)
@@ -77,18 +77,14 @@ def export_broadcasts_csv(request):
         # Get pizarra data with defaults
         pizarra = b.pizarra or {}
 
-        # Calculate file size (both readable and bytes)
+        # File size (both readable and bytes) from the stored value, no filesystem access
         file_size = ''
         size_bytes = ''
-        if b.archivo_original:
-            try:
-                size_bytes_int = b.archivo_original.size
-                size_bytes = str(size_bytes_int)
-                size_mb = size_bytes_int / (1024 * 1024)
-                file_size = f"{size_mb:.2f} MB"
-            except Exception:
-                file_size = 'N/A'
-                size_bytes = ''
+        if b.file_size is not None:
+            size_bytes = str(b.file_size)
+            file_size = f"{b.file_size / (1024 * 1024):.2f} MB"
+        elif b.archivo_original:
+            file_size = 'N/A'
         
         # Get file extension/format
         file_format = ''
@@ -133,13 +129,13 @@ def export_broadcasts_csv(request):
             b.fecha_subida.strftime('%Y-%m-%d') if b.fecha_subida else '',
             status_display,
             # Full
-            pizarra.get('cliente', ''),
-            pizarra.get('agencia', ''),
-            pizarra.get('producto', ''),
-            pizarra.get('version', ''),
-            pizarra.get('duracion', ''),
-            pizarra.get('vtype', ''),
-            pizarra.get('fecha', ''),  # Changed from 'expedition' to 'fecha' to match our field
+            b.cliente,
+            b.agencia,
+            b.producto,
+            b.version,
+            b.duracion,
+            b.vtype,
+            b.fecha.isoformat() if b.fecha else pizarra.get('fecha', ''),  # Changed from 'expedition' to 'fecha' to match our field
             # Extras
             str(b.id),
             b.repositorio.nombre if b.repositorio else '',
@@ -312,7 +308,7 @@ def compare_csv_structure(request):
         {
             'campo': 'Tamaño de archivo',
             'tu_sistema': 'Campo "Tamaño" (ej: 134.84 MB)',
-            'nuestro_sistema': 'Calculado desde archivo_original.size',
+            'nuestro_sistema': 'Campo file_size (bytes) guardado al subir/vincular el archivo',
             'solucion': 'Informativo solamente, no se importa'
         },
         {
@@ -0,0 +1,65 @@
+"""
+Detección de duplicados por nombre de archivo al subir assets.
+
+No se permiten dos assets del mismo tipo con el mismo ``nombre_original`` (en
+todo el sistema). La búsqueda usa el índice sobre ``nombre_original`` de cada
+modelo y ``reserve_name()`` toma un candado en cache mientras se valida y se
+inserta, para que dos uploads simultáneos del mismo archivo no pasen ambos la
+verificación. ``find_duplicates()`` valida un manifiesto completo en una consulta
+(``POST /api/uploads/precheck/``) antes de enviar bytes.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'upload_name:{}:{}'
+
+
+def _lock_key(model, nombre):
+    digest = hashlib.md5(nombre.encode('utf-8')).hexdigest()
+    return LOCK_KEY.format(model._meta.model_name, digest)
+
+
+def find_existing(model, nombre, exclude_pk=None):
+    """Asset existente con ese nombre (o None). Usa el índice de nombre_original."""
+    qs = model.objects.filter(nombre_original=nombre).select_related('repositorio').only('pk', 'repositorio__nombre')
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs.order_by().first()
+
+
+def find_duplicates(model, nombres):
+    """{nombre: (pk, repositorio_id, repositorio_nombre)} para los nombres que ya existen, en una sola consulta."""
+    found = {}
+    rows = (
+        model.objects.filter(nombre_original__in=set(nombres))
+        .order_by()
+        .values_list('nombre_original', 'pk', 'repositorio_id', 'repositorio__nombre')
+    )
+    for nombre, pk, repositorio_id, repositorio in rows:
+        found.setdefault(nombre, (pk, repositorio_id, repositorio))
+    return found
+
+
+def reserve_name(model, nombre):
+    """
+    Candado atómico (cache.add) sobre el nombre mientras se crea el asset.
+    Regresa False si otro upload con el mismo nombre está en curso. Si el cache
+    no está disponible no bloquea (queda solo la verificación en base de datos).
+    """
+    try:
+        return cache.add(_lock_key(model, nombre), 1, getattr(settings, 'UPLOAD_NAME_LOCK_TIMEOUT', 120))
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo reservar el nombre {nombre}: {e}")
+        return True
+
+
+def release_name(model, nombre):
+    try:
+        cache.delete(_lock_key(model, nombre))
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo liberar el nombre {nombre}: {e}")
@@ -0,0 +1,151 @@
+"""
+Mantenimiento del log de errores de procesamiento (``ProcessingError``).
+
+  - Rollups: ``ProcessingErrorRollup`` lleva el conteo diario por repositorio y
+    etapa. Se incrementa al crear cada error (señal) y es lo que consultan las
+    gráficas/resúmenes, así que no depende de cuántos errores sigan guardados.
+  - Compactación (``compact``, tarea diaria):
+      1. marca como resueltos los errores cuyo asset ya terminó bien (COMPLETADO)
+      2. mueve el stderr largo de errores con más de ERROR_STDERR_ARCHIVE_DAYS días
+         a ``ProcessingErrorDetalle`` (zlib) y deja un extracto en error_message
+      3. borra los errores resueltos con más de ERROR_RETENTION_DAYS días
+    Los conteos de rollup no cambian al compactar.
+"""
+import contextvars
+import logging
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Caracteres de stderr que se conservan en error_message al archivar
+EXTRACTO = 1000
+BATCH_SIZE = 500
+# Activo mientras compact() borra por lotes: la señal post_delete no publica un
+# error.deleted por fila, al final se publica un solo table.changed por repositorio
+_bulk_delete = contextvars.ContextVar('errorlog_bulk_delete', default=False)
+
+
+def bulk_delete_active():
+    return _bulk_delete.get()
+
+
+def record_rollup(error):
+    """Suma 1 al rollup del día del error (UPDATE con F(); crea la fila si no existe)."""
+    from .models import ProcessingErrorRollup
+
+    dia = timezone.localdate(error.fecha_creacion) if error.fecha_creacion else timezone.localdate()
+    key = {'repositorio_id': error.repositorio_id, 'stage': error.stage, 'dia': dia}
+    if ProcessingErrorRollup.objects.filter(**key).update(total=F('total') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ProcessingErrorRollup.objects.create(total=1, **key)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el UPDATE y el INSERT
+        ProcessingErrorRollup.objects.filter(**key).update(total=F('total') + 1)
+
+
+def rebuild_rollups(error_model, rollup_model):
+    """Recalcula los rollups desde la tabla de errores (migración / reparación)."""
+    rollup_model.objects.all().delete()
+    rows = (
+        error_model.objects.annotate(dia=TruncDate('fecha_creacion'))
+        .values('repositorio_id', 'stage', 'dia')
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+    rollup_model.objects.bulk_create([rollup_model(**row) for row in rows], batch_size=BATCH_SIZE)
+
+
+def _resolve_completed(repos):
+    """Errores de assets que después se procesaron bien -> resolved=True."""
+    from .models import ProcessingError, Broadcast, Audio, ImageAsset
+
+    resolved = 0
+    for field, model, estado_field in (
+        ('broadcast', Broadcast, 'estado_transcodificacion'),
+        ('audio', Audio, 'estado_procesamiento'),
+        ('imagen', ImageAsset, 'estado'),
+    ):
+        completado = model.objects.filter(pk=OuterRef(f'{field}_id'), **{estado_field: 'COMPLETADO'})
+        qs = ProcessingError.objects.filter(resolved=False, **{f'{field}__isnull': False}).filter(Exists(completado))
+        repos.update(qs.values_list('repositorio_id', flat=True).distinct())
+        resolved += qs.update(resolved=True)
+    return resolved
+
+
+def _archive_stderr(before, min_length, repos):
+    from django.db.models.functions import Length
+    from .models import ProcessingError, ProcessingErrorDetalle
+
+    archived = 0
+    qs = (
+        ProcessingError.objects.filter(fecha_creacion__lt=before, detalle__isnull=True)
+        .annotate(largo=Length('error_message'))
+        .filter(largo__gt=min_length)
+        .only('pk', 'repositorio_id', 'error_message', 'extra')
+        .order_by('pk')
+    )
+    while True:
+        batch = list(qs[:BATCH_SIZE])
+        if not batch:
+            return archived
+        detalles = []
+        for error in batch:
+            texto = error.error_message or ''
+            detalles.append(ProcessingErrorDetalle(
+                error=error, contenido=zlib.compress(texto.encode('utf-8'), 9), tamano_original=len(texto),
+            ))
+            # Lo último del stderr de ffmpeg suele ser lo que explica el fallo
+            error.error_message = '[…] ' + texto[-EXTRACTO:]
+            error.extra = {**(error.extra or {}), 'stderr_archivado': True}
+        with transaction.atomic():
+            ProcessingErrorDetalle.objects.bulk_create(detalles, batch_size=BATCH_SIZE)
+            ProcessingError.objects.bulk_update(batch, ['error_message', 'extra'], batch_size=BATCH_SIZE)
+        repos.update(error.repositorio_id for error in batch)
+        archived += len(batch)
+
+
+def compact(retention_days=None, archive_days=None, min_length=None):
+    """Compacta el log de errores. Regresa estadísticas de lo que cambió."""
+    from .models import ProcessingError
+    from .signals import bump_tables
+
+    retention_days = retention_days if retention_days is not None else getattr(settings, 'ERROR_RETENTION_DAYS', 30)
+    archive_days = archive_days if archive_days is not None else getattr(settings, 'ERROR_STDERR_ARCHIVE_DAYS', 7)
+    min_length = min_length if min_length is not None else getattr(settings, 'ERROR_STDERR_ARCHIVE_MIN_LENGTH', 2000)
+    now = timezone.now()
+
+    repos = set()
+    resolved = _resolve_completed(repos)
+    archived = _archive_stderr(now - timedelta(days=archive_days), min_length, repos)
+
+    viejos = ProcessingError.objects.filter(resolved=True, fecha_creacion__lt=now - timedelta(days=retention_days))
+    deleted = 0
+    # Borrar por lotes de PKs: no bloquear la tabla con un DELETE gigante
+    token = _bulk_delete.set(True)
+    try:
+        while True:
+            batch = list(viejos.order_by('pk').values_list('pk', 'repositorio_id')[:BATCH_SIZE])
+            if not batch:
+                break
+            repos.update(repositorio_id for _, repositorio_id in batch)
+            deleted += ProcessingError.objects.filter(pk__in=[pk for pk, _ in batch]).delete()[1].get(ProcessingError._meta.label, 0)
+    finally:
+        _bulk_delete.reset(token)
+
+    # update()/bulk_update() no disparan señales y los borrados no publican por fila:
+    # invalidar los listados cacheados y avisar (table.changed) una vez por repositorio
+    for repositorio_id in repos:
+        bump_tables(repositorio_id, ProcessingError)
+
+    stats = {'resolved': resolved, 'archived': archived, 'deleted': deleted}
+    logger.info(f"🧹 Log de errores compactado: {stats}")
+    return stats
@@ -0,0 +1,146 @@
+"""
+Eventos en tiempo real vía Redis pub/sub, consumidos por ``GET /api/events/`` (SSE).
+
+Las señales (core.signals) y las tareas Celery publican cambios de estado,
+progreso y errores en un canal por repositorio; el frontend se suscribe con
+EventSource en lugar de hacer polling con setInterval. Cada mensaje es un JSON:
+
+    {"event": "asset.updated", "repositorio": 3, "asset_type": "broadcast", "id": "...", "estado": "PROCESANDO"}
+
+Eventos publicados:
+  - asset.updated / asset.deleted : alta, cambio de estado o rutas de un asset
+  - error.created / error.updated / error.deleted : ProcessingError
+  - table.changed : escrituras masivas (bulk_update) o renombres; refrescar listados
+  - job.progress  : progreso de jobs en background (match_source_files)
+
+Publicar nunca falla la operación que lo origina: si Redis no responde se
+registra el error y se deja de intentar por ``EVENTS_RETRY_SECONDS``.
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'archivoplus:events:repo:'
+
+_client = None
+_retry_at = 0.0
+
+
+def channel(repositorio_id):
+    return f'{CHANNEL_PREFIX}{repositorio_id}'
+
+
+def redis_url():
+    return getattr(settings, 'EVENTS_REDIS_URL', '') or getattr(settings, 'CELERY_BROKER_URL', '')
+
+
+def enabled():
+    return getattr(settings, 'EVENTS_ENABLED', True) and bool(redis_url())
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(redis_url(), socket_connect_timeout=1, socket_timeout=1)
+    return _client
+
+
+def _send(message):
+    global _retry_at
+    if time.monotonic() < _retry_at:
+        return
+    try:
+        _get_client().publish(channel(message['repositorio']), json.dumps(message, default=str))
+    except Exception as e:
+        _retry_at = time.monotonic() + getattr(settings, 'EVENTS_RETRY_SECONDS', 30)
+        logger.warning(f"⚠️ No se pudo publicar el evento {message['event']}: {e}")
+
+
+def publish(event, repositorio_id, **data):
+    """Publica ``event`` en el canal del repositorio al confirmarse la transacción actual."""
+    if repositorio_id is None or not enabled():
+        return
+    message = {'event': event, 'repositorio': repositorio_id, **data}
+    transaction.on_commit(lambda: _send(message))
+
+
+# ------------------------------------------------------------
+# Suscripción (formato text/event-stream)
+# ------------------------------------------------------------
+def sse_message(data):
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', 'replace')
+    return f'data: {data}\n\n'
+
+
+def _retry_line():
+    return f"retry: {getattr(settings, 'EVENTS_SSE_RETRY_MS', 5000)}\n\n"
+
+
+async def astream(channels, patterns=()):
+    """Generador asíncrono de mensajes SSE (servidores ASGI): no ocupa hilos mientras espera."""
+    import redis.asyncio as aioredis
+
+    heartbeat = getattr(settings, 'EVENTS_SSE_HEARTBEAT', 15)
+    client = aioredis.from_url(redis_url())
+    pubsub = client.pubsub()
+    try:
+        try:
+            if channels:
+                await pubsub.subscribe(*channels)
+            if patterns:
+                await pubsub.psubscribe(*patterns)
+        except Exception as e:
+            logger.warning(f"⚠️ Canal de eventos no disponible: {e}")
+            # El navegador reintenta más tarde; mientras tanto el frontend hace polling
+            yield f"retry: {getattr(settings, 'EVENTS_RETRY_SECONDS', 30) * 1000}\n\n"
+            return
+        yield _retry_line()
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+            if message is None:
+                yield ': ping\n\n'
+            else:
+                yield sse_message(message['data'])
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+def stream(channels, patterns=()):
+    """
+    Versión síncrona para servidores WSGI (runserver, gunicorn): cada conexión ocupa
+    un hilo, así que se cierra tras ``EVENTS_SSE_WSGI_MAX_SECONDS`` y EventSource se reconecta.
+    """
+    import redis
+
+    heartbeat = getattr(settings, 'EVENTS_SSE_HEARTBEAT', 15)
+    deadline = time.monotonic() + getattr(settings, 'EVENTS_SSE_WSGI_MAX_SECONDS', 55)
+    client = redis.Redis.from_url(redis_url(), socket_connect_timeout=1)
+    pubsub = client.pubsub()
+    try:
+        try:
+            if channels:
+                pubsub.subscribe(*channels)
+            if patterns:
+                pubsub.psubscribe(*patterns)
+        except Exception as e:
+            logger.warning(f"⚠️ Canal de eventos no disponible: {e}")
+            yield f"retry: {getattr(settings, 'EVENTS_RETRY_SECONDS', 30) * 1000}\n\n"
+            return
+        yield _retry_line()
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(ignore_subscribe_messages=True, timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if message is None:
+                yield ': ping\n\n'
+            else:
+                yield sse_message(message['data'])
+    finally:
+        pubsub.close()
+        client.close()
@@ -0,0 +1,262 @@
+"""
+Inventario de archivos en MEDIA_ROOT (``MediaDirectory`` / ``MediaFile``).
+
+Los endpoints que antes recorrían ``MEDIA_ROOT/sources`` con os.walk/scandir o
+hacían stat() por fila (match_source_files, sources_overview, presencia de
+originales) consultan estas tablas. El inventario se mantiene con:
+
+  - ``scan()``: escaneo incremental. Una carpeta cuyo mtime no cambió no se
+    vuelve a listar (altas, bajas y renombres cambian el mtime de la carpeta);
+    solo se baja a sus subcarpetas ya conocidas. ``full=True`` re-lista todo y
+    detecta también archivos sobrescritos en sitio.
+  - ``sync_path()``: actualiza una sola ruta; lo usa el watcher inotify
+    (``manage.py watch_media_inventory``, requiere watchdog).
+"""
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Extensiones de video que se consideran masters ('' = archivos sin extensión)
+VIDEO_EXTENSIONS = (
+    '.mov', '.mp4', '.avi', '.mkv', '.mxf', '.m4v', '.webm', '.wmv', '.mpg', '.mpeg', '.mts', ''
+)
+BATCH_SIZE = 1000
+HASH_CHUNK = 4 * 1024 * 1024
+
+
+def inventory_roots():
+    return list(getattr(settings, 'MEDIA_INVENTORY_ROOTS', ['sources']))
+
+
+def _abs(relpath):
+    return os.path.join(str(settings.MEDIA_ROOT), relpath)
+
+
+def _rel(*parts):
+    return '/'.join(p.strip('/') for p in parts if p)
+
+
+def _extension(nombre):
+    ext = os.path.splitext(nombre)[1].lower()
+    return ext if len(ext) <= 20 else ''
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _root_of(relpath):
+    relpath = relpath.strip('/')
+    for root in inventory_roots():
+        if relpath == root or relpath.startswith(root + '/'):
+            return root
+    return None
+
+
+class _Scanner:
+    def __init__(self, root, full=False, hash_files=False):
+        from .models import MediaDirectory
+        self.root = root
+        self.full = full
+        self.hash_files = hash_files
+        self.stats = {'dirs_listed': 0, 'dirs_skipped': 0, 'created': 0, 'updated': 0, 'deleted': 0}
+        # Todas las carpetas conocidas en memoria: una sola consulta por escaneo
+        self.dirs = {d.path: d for d in MediaDirectory.objects.filter(raiz=root)}
+        self.children = {}
+        for d in self.dirs.values():
+            self.children.setdefault(d.parent_id, []).append(d)
+
+    def run(self, start=None):
+        from .models import MediaDirectory
+        start = start or self.root
+        node = self.dirs.get(start)
+        if not os.path.isdir(_abs(start)):
+            if node:
+                node.delete()
+                self.stats['deleted'] += 1
+            return self.stats
+        if node is None:
+            parent = self.dirs.get(start.rsplit('/', 1)[0]) if '/' in start else None
+            node = MediaDirectory.objects.create(path=start, raiz=self.root, parent=parent)
+        stack = [node]
+        while stack:
+            stack.extend(self._visit(stack.pop()))
+        return self.stats
+
+    def _visit(self, node):
+        from .models import MediaDirectory
+        try:
+            st = os.stat(_abs(node.path))
+        except FileNotFoundError:
+            node.delete()
+            self.stats['deleted'] += 1
+            return []
+        known_children = self.children.get(node.pk, [])
+        if not self.full and st.st_mtime_ns == node.mtime_ns:
+            self.stats['dirs_skipped'] += 1
+            return known_children
+
+        self.stats['dirs_listed'] += 1
+        files = {}
+        subdirs = set()
+        try:
+            with os.scandir(_abs(node.path)) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.add(entry.name)
+                        elif entry.is_file():
+                            files[entry.name] = entry.stat()
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo listar {node.path}: {e}")
+            return known_children
+
+        self._sync_files(node, files)
+
+        next_nodes = []
+        existing = {d.path.rsplit('/', 1)[-1]: d for d in known_children}
+        for name, child in existing.items():
+            if name in subdirs:
+                next_nodes.append(child)
+            else:
+                child.delete()
+                self.stats['deleted'] += 1
+        for name in sorted(subdirs - existing.keys()):
+            child = MediaDirectory.objects.create(path=_rel(node.path, name), raiz=self.root, parent=node)
+            self.dirs[child.path] = child
+            next_nodes.append(child)
+
+        node.mtime_ns = st.st_mtime_ns
+        node.fecha_escaneo = timezone.now()
+        node.save(update_fields=['mtime_ns', 'fecha_escaneo'])
+        return next_nodes
+
+    def _sync_files(self, node, files):
+        from .models import MediaFile
+        current = {f.nombre: f for f in MediaFile.objects.filter(directorio=node)}
+        to_create, to_update = [], []
+        for nombre, st in files.items():
+            obj = current.pop(nombre, None)
+            if obj is not None and (obj.size, obj.mtime_ns, obj.inode) == (st.st_size, st.st_mtime_ns, st.st_ino):
+                continue
+            if obj is None:
+                obj = MediaFile(path=_rel(node.path, nombre), raiz=self.root, directorio=node,
+                                nombre=nombre, extension=_extension(nombre))
+                to_create.append(obj)
+            else:
+                to_update.append(obj)
+            obj.size, obj.mtime_ns, obj.inode = st.st_size, st.st_mtime_ns, st.st_ino
+            obj.sha256 = self._hash(obj) if self.hash_files else ''
+        with transaction.atomic():
+            if current:
+                MediaFile.objects.filter(pk__in=[f.pk for f in current.values()]).delete()
+            MediaFile.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            MediaFile.objects.bulk_update(to_update, ['size', 'mtime_ns', 'inode', 'sha256', 'fecha_actualizacion'],
+                                          batch_size=BATCH_SIZE)
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
+        self.stats['deleted'] += len(current)
+
+    def _hash(self, obj):
+        try:
+            return _sha256(_abs(obj.path))
+        except OSError:
+            return ''
+
+
+def scan(roots=None, full=False, hash_files=False):
+    """Escaneo incremental (o completo) de las raíces configuradas. Regresa estadísticas por raíz."""
+    results = {}
+    for root in roots or inventory_roots():
+        results[root] = _Scanner(root, full=full, hash_files=hash_files).run()
+        logger.info(f"📂 Inventario {root}: {results[root]}")
+    return results
+
+
+def last_scan(root):
+    from .models import MediaDirectory
+    return MediaDirectory.objects.filter(path=root).values_list('fecha_escaneo', flat=True).first()
+
+
+def ensure_scanned(roots=None):
+    """Hace el primer escaneo si una raíz nunca se ha inventariado."""
+    pending = [root for root in roots or inventory_roots() if last_scan(root) is None]
+    if pending:
+        scan(pending)
+
+
+def sync_path(relpath, sha256=''):
+    """
+    Actualiza el inventario para una ruta (archivo o carpeta) relativa a MEDIA_ROOT.
+    Rutas fuera de MEDIA_INVENTORY_ROOTS se ignoran. ``sha256`` es el hash del archivo
+    si ya se conoce (p. ej. calculado al subirlo).
+    """
+    from .models import MediaFile, MediaDirectory
+    relpath = relpath.replace('\\', '/').strip('/')
+    root = _root_of(relpath)
+    if root is None or any(part.startswith('.') for part in relpath.split('/')):
+        return
+    path = _abs(relpath)
+    if os.path.isdir(path):
+        scanner = _Scanner(root)
+        # Crear la cadena de carpetas faltantes y escanear solo este subárbol
+        parts = relpath.split('/')
+        for i in range(1, len(parts) + 1):
+            prefix = '/'.join(parts[:i])
+            if prefix not in scanner.dirs:
+                parent = scanner.dirs.get('/'.join(parts[:i - 1])) if i > 1 else None
+                scanner.dirs[prefix] = MediaDirectory.objects.create(path=prefix, raiz=root, parent=parent)
+        scanner.run(relpath)
+    elif os.path.isfile(path):
+        parent_path = relpath.rsplit('/', 1)[0] if '/' in relpath else ''
+        if not MediaDirectory.objects.filter(path=parent_path).exists():
+            sync_path(parent_path)
+            if sha256:
+                MediaFile.objects.filter(path=relpath).update(sha256=sha256)
+            return
+        parent = MediaDirectory.objects.get(path=parent_path)
+        st = os.stat(path)
+        nombre = relpath.rsplit('/', 1)[-1]
+        MediaFile.objects.update_or_create(path=relpath, defaults={
+            'raiz': root, 'directorio': parent, 'nombre': nombre, 'extension': _extension(nombre),
+            'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'inode': st.st_ino, 'sha256': sha256,
+        })
+    else:
+        MediaFile.objects.filter(path=relpath).delete()
+        MediaDirectory.objects.filter(path=relpath).delete()
+
+
+def hash_file(relpath):
+    """Calcula el sha256 de un archivo y lo guarda en el inventario. Regresa el hash ('' si no se pudo leer)."""
+    try:
+        sha256 = _sha256(_abs(relpath))
+    except OSError as e:
+        logger.warning(f"⚠️ No se pudo hashear {relpath}: {e}")
+        return ''
+    sync_path(relpath, sha256=sha256)
+    return sha256
+
+
+def video_files(root='sources'):
+    """QuerySet de archivos de video inventariados bajo ``root``."""
+    from .models import MediaFile
+    return MediaFile.objects.filter(raiz=root, extension__in=VIDEO_EXTENSIONS)
+
+
+def exists(relpath):
+    from .models import MediaFile
+    return MediaFile.objects.filter(path=relpath).exists()
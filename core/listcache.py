@@ -0,0 +1,93 @@
+"""
+Cache de listados con ETag ligado a las versiones de core.versioning.
+
+El frontend re-consulta los listados cada pocos segundos (ComercialesManager,
+ErrorLogModal). Con este mixin cada respuesta lleva un ETag formado por la
+versión del scope (por repositorio, o global si no se filtra por repositorio),
+el alcance del usuario y los query params:
+
+  - If-None-Match igual  -> 304 sin consultar la base ni serializar
+  - misma llave en cache -> se regresa la página ya serializada
+  - cualquier escritura  -> las señales incrementan la versión y todo lo anterior
+                            deja de coincidir (no hay que borrar nada)
+
+Si el cache no está disponible el listado se comporta como antes.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .authz import get_context
+from .versioning import get_version
+
+logger = logging.getLogger(__name__)
+
+
+def user_scope(user):
+    """Alcance de visibilidad: usuarios con los mismos repositorios comparten cache."""
+    if not getattr(user, 'is_authenticated', False):
+        return 'anon'
+    visibles = get_context(user).visible_repositorios()
+    if visibles is None:
+        return 'staff'
+    return 'r' + hashlib.md5(','.join(map(str, sorted(visibles))).encode('ascii')).hexdigest()[:16]
+
+
+def etag_matches(request, etag):
+    return etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]
+
+
+class VersionedListCacheMixin:
+    """
+    Para ModelViewSets: cachea ``list()`` por (alcance del usuario, query params, versión).
+    La vista define ``list_cache_scope`` (p. ej. signals.ASSETS o signals.ERRORS).
+    """
+
+    list_cache_scope = None
+    list_cache_timeout = None
+
+    def _list_cache_keys(self, request):
+        from .signals import ALL_REPOS
+        if not self.list_cache_scope:
+            return None
+        repositorio = request.query_params.get('repositorio', '')
+        version = get_version(self.list_cache_scope, repositorio if repositorio.isdigit() else ALL_REPOS)
+        if version is None:
+            return None
+        params = sorted(request.query_params.lists())
+        raw = repr((user_scope(request.user), request.scheme, request.get_host(), params))
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        name = self.basename or type(self).__name__
+        etag = f'W/"{name}-{version}-{digest[:16]}"'
+        return etag, f'list:{name}:{version}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        keys = self._list_cache_keys(request)
+        if keys is None:
+            return super().list(request, *args, **kwargs)
+        etag, cache_key = keys
+        if etag_matches(request, etag):
+            resp = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = None
+            try:
+                data = cache.get(cache_key)
+            except Exception as e:
+                logger.debug(f"Cache no disponible para {cache_key}: {e}")
+            if data is not None:
+                resp = Response(data)
+            else:
+                resp = super().list(request, *args, **kwargs)
+                if resp.status_code == status.HTTP_200_OK:
+                    timeout = self.list_cache_timeout or getattr(settings, 'LIST_CACHE_TIMEOUT', 300)
+                    try:
+                        cache.set(cache_key, resp.data, timeout)
+                    except Exception as e:
+                        logger.debug(f"No se pudo cachear {cache_key}: {e}")
+        resp['ETag'] = etag
+        resp['Cache-Control'] = 'private, no-cache'
+        return resp
@@ -0,0 +1,72 @@
+"""
+Django management command para llenar file_size en registros existentes.
+
+Los listados y exportaciones leen el tamaño guardado en la base de datos; este
+comando hace el stat() una sola vez para los registros que aún no lo tienen.
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Broadcast, Audio, ImageAsset, StorageAsset
+
+
+MODELS = {
+    'broadcast': Broadcast,
+    'audio': Audio,
+    'image': ImageAsset,
+    'storage': StorageAsset,
+}
+
+
+class Command(BaseCommand):
+    help = 'Guarda file_size (bytes) de Broadcast, Audio, ImageAsset y StorageAsset leyendo el archivo original'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(MODELS), action='append',
+                            help='Limitar a un tipo (se puede repetir). Default: todos')
+        parser.add_argument('--force', action='store_true',
+                            help='Recalcular también los registros que ya tienen file_size')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Registros por bulk_update (default: 500)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo mostrar cuántos registros se actualizarían')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        for key in options['model'] or MODELS.keys():
+            model = MODELS[key]
+            qs = model.objects.exclude(archivo_original__isnull=True).exclude(archivo_original='')
+            if not options['force']:
+                # StorageAsset usa default=0 en lugar de NULL
+                qs = qs.filter(file_size=0) if model is StorageAsset else qs.filter(file_size__isnull=True)
+            qs = qs.only('id', 'archivo_original', 'file_size').order_by('pk')
+
+            updated = missing = 0
+            batch = []
+            for obj in qs.iterator(chunk_size=batch_size):
+                path = os.path.join(settings.MEDIA_ROOT, obj.archivo_original.name)
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    missing += 1
+                    continue
+                if size == obj.file_size:
+                    continue
+                obj.file_size = size
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    if not options['dry_run']:
+                        model.objects.bulk_update(batch, ['file_size'])
+                    updated += len(batch)
+                    batch = []
+            if batch:
+                if not options['dry_run']:
+                    model.objects.bulk_update(batch, ['file_size'])
+                updated += len(batch)
+
+            prefix = '(dry-run) ' if options['dry_run'] else ''
+            self.stdout.write(self.style.SUCCESS(f"✅ {prefix}{model.__name__}: {updated} actualizados"))
+            if missing:
+                self.stdout.write(self.style.WARNING(f"⚠️  {model.__name__}: {missing} archivos no encontrados en disco"))
@@ -0,0 +1,89 @@
+"""
+Django management command para medir el costo de render y compresión de un
+listado de broadcasts (sin tocar la base: arma instancias en memoria).
+
+Compara JSONRenderer de DRF contra core.renderers.ORJSONRenderer y el tamaño de
+la respuesta sin comprimir, con gzip y (si está instalado) con brotli.
+"""
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from core import middleware
+from core.models import Broadcast, Repositorio, Directorio, Modulo, CustomUser
+from core.renderers import ORJSONRenderer
+from core.serializers import BroadcastSerializer
+
+
+def _best_of(runs, fn):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = 'Mide render JSON (stdlib vs orjson) y compresión de un listado de broadcasts en memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5000, help='Número de broadcasts (default 5000)')
+        parser.add_argument('--runs', type=int, default=5, help='Repeticiones; se reporta la mejor (default 5)')
+        parser.add_argument('--compact', action='store_true', help='Serializar con ?view=compact')
+
+    def _broadcasts(self, n):
+        repositorio = Repositorio(id=1, nombre='Repositorio', folio='R0001', clave='REPO')
+        directorio = Directorio(id=1, nombre='Spots 2025', repositorio=repositorio)
+        modulo = Modulo(id=1, nombre='Broadcast', tipo='broadcast')
+        usuario = CustomUser(id=1, username='admin')
+        now = timezone.now()
+        renditions = [
+            {'preset': name, 'path': f'encoded/{name}/spot.mp4', 'size': 48_000_000,
+             'settings': {'vcodec': 'libx264', 'crf': 23, 'preset': 'slow', 'acodec': 'aac', 'audio_bitrate': '192k',
+                          'scale': '1920:-2', 'pix_fmt': 'yuv420p', 'movflags': '+faststart'}}
+            for name in ('h264_1080', 'h264_720', 'proxy')
+        ]
+        return [
+            Broadcast(
+                id=uuid.uuid4(), repositorio=repositorio, directorio=directorio, modulo=modulo, creado_por=usuario,
+                archivo_original=f'sources/spots/spot_{i}.mov', nombre_original=f'spot_{i}.mov', file_size=1_500_000_000,
+                ruta_proxy=f'proxy/spot_{i}.mp4', ruta_h264=f'h264/spot_{i}.mp4', encoded_files=renditions,
+                thumbnail=f'thumbnails/spot_{i}.jpg', pizarra_thumbnail=f'pizarra/spot_{i}.jpg',
+                estado_transcodificacion='COMPLETADO', id_content=f'CNT-{i:06d}',
+                pizarra={'producto': f'Producto {i}', 'cliente': 'Cliente', 'agencia': 'Agencia', 'version': '30s',
+                         'duracion': '00:00:30', 'vtype': 'TV', 'fecha': '2025-01-15'},
+                fecha_subida=now - timedelta(minutes=i),
+            )
+            for i in range(n)
+        ]
+
+    def handle(self, *args, **options):
+        items, runs = options['items'], options['runs']
+        path = '/api/broadcasts/' + ('?view=compact' if options['compact'] else '')
+        request = Request(RequestFactory().get(path, SERVER_NAME='localhost'))
+        broadcasts = self._broadcasts(items)
+
+        serialize_time, data = _best_of(runs, lambda: BroadcastSerializer(broadcasts, many=True, context={'request': request}).data)
+        context = {'request': request}
+        stdlib_time, stdlib_body = _best_of(runs, lambda: JSONRenderer().render(data, 'application/json', context))
+        orjson_time, orjson_body = _best_of(runs, lambda: ORJSONRenderer().render(data, 'application/json', context))
+
+        self.stdout.write(f"📊 {items} broadcasts{' (compact)' if options['compact'] else ''}, mejor de {runs}")
+        self.stdout.write(f"   serializer:          {serialize_time * 1000:8.1f} ms")
+        self.stdout.write(f"   render json stdlib:  {stdlib_time * 1000:8.1f} ms  ({len(stdlib_body):,} bytes)")
+        self.stdout.write(f"   render orjson:       {orjson_time * 1000:8.1f} ms  ({len(orjson_body):,} bytes)")
+        encodings = ['gzip'] + (['br'] if middleware.brotli is not None else [])
+        for encoding in encodings:
+            elapsed, body = _best_of(runs, lambda: middleware.compress(orjson_body, encoding))
+            self.stdout.write(f"   {encoding:<4} {elapsed * 1000:8.1f} ms  {len(body):,} bytes "
+                              f"({len(body) / len(orjson_body):.1%} del original)")
+        if middleware.brotli is None:
+            self.stdout.write('   br   (paquete brotli no instalado)')
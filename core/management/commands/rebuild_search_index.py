@@ -0,0 +1,40 @@
+"""
+Django management command para reconstruir el índice de búsqueda (SearchEntry).
+
+El índice (y el diccionario de autocompletado con --terms) se mantiene solo con
+señales al guardar/borrar assets; este comando sirve después de cargas masivas
+con queryset.update()/bulk_create o si se cambia la forma de construir el texto
+indexado.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Broadcast, Audio, ImageAsset, StorageAsset, MetadataTerm, Agencia
+from core.search import rebuild_index
+from core.terms import rebuild_terms
+
+
+MODELS = {
+    'broadcast': Broadcast,
+    'audio': Audio,
+    'image': ImageAsset,
+    'storage': StorageAsset,
+}
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de texto de los assets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(MODELS), action='append',
+                            help='Limitar a un tipo (se puede repetir). Default: todos')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--terms', action='store_true',
+                            help='Recalcular también el diccionario de autocompletado (cliente/agencia/producto)')
+
+    def handle(self, *args, **options):
+        for key in options['model'] or MODELS.keys():
+            total = rebuild_index(MODELS[key], batch_size=max(1, options['batch_size']))
+            self.stdout.write(self.style.SUCCESS(f"✅ {key}: {total} assets indexados"))
+        if options['terms']:
+            total = rebuild_terms(Broadcast, MetadataTerm, Agencia)
+            self.stdout.write(self.style.SUCCESS(f"✅ autocompletado: {total} términos"))
@@ -0,0 +1,30 @@
+"""
+Django management command para actualizar el inventario de media (MediaFile).
+
+Por defecto es incremental: solo vuelve a listar las carpetas cuyo mtime cambió
+desde el último escaneo. --full re-lista todo (detecta archivos sobrescritos en
+sitio) y --hash calcula sha256 de los archivos nuevos o modificados.
+"""
+from django.core.management.base import BaseCommand
+
+from core import inventory
+
+
+class Command(BaseCommand):
+    help = 'Escanea MEDIA_INVENTORY_ROOTS y actualiza el inventario de archivos de media'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', action='append',
+                            help='Carpeta relativa a MEDIA_ROOT (se puede repetir). Default: MEDIA_INVENTORY_ROOTS')
+        parser.add_argument('--full', action='store_true',
+                            help='Re-listar todas las carpetas aunque su mtime no haya cambiado')
+        parser.add_argument('--hash', action='store_true',
+                            help='Calcular sha256 de archivos nuevos/modificados (lee el archivo completo)')
+
+    def handle(self, *args, **options):
+        results = inventory.scan(options['root'], full=options['full'], hash_files=options['hash'])
+        for root, stats in results.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {root}: {stats['dirs_listed']} carpetas listadas, {stats['dirs_skipped']} sin cambios, "
+                f"+{stats['created']} ~{stats['updated']} -{stats['deleted']}"
+            ))
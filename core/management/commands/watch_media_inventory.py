@@ -0,0 +1,77 @@
+"""
+Django management command que mantiene el inventario de media en tiempo real.
+
+Con watchdog instalado (inotify en Linux, FSEvents en macOS) aplica cada cambio
+con core.inventory.sync_path, agrupando eventos por --debounce segundos. Sin
+watchdog hace escaneos incrementales cada --interval segundos.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import inventory
+
+
+class Command(BaseCommand):
+    help = 'Observa MEDIA_INVENTORY_ROOTS y actualiza el inventario de media al vuelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debounce', type=float, default=2.0,
+                            help='Segundos para agrupar eventos antes de aplicarlos (default: 2)')
+        parser.add_argument('--interval', type=int, default=60,
+                            help='Segundos entre escaneos incrementales si watchdog no está disponible (default: 60)')
+
+    def handle(self, *args, **options):
+        roots = inventory.inventory_roots()
+        self.stdout.write(f"📂 Escaneo inicial de {', '.join(roots)}...")
+        inventory.scan(roots)
+
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  watchdog no está instalado; escaneo incremental cada {options['interval']}s"
+            ))
+            while True:
+                time.sleep(options['interval'])
+                inventory.scan(roots)
+
+        media_root = str(settings.MEDIA_ROOT)
+        pending = set()
+        lock = threading.Lock()
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [event.src_path, getattr(event, 'dest_path', '')]
+                with lock:
+                    for path in paths:
+                        if path:
+                            pending.add(os.path.relpath(path, media_root))
+
+        observer = Observer()
+        for root in roots:
+            path = os.path.join(media_root, root)
+            if os.path.isdir(path):
+                observer.schedule(Handler(), path, recursive=True)
+        observer.start()
+        self.stdout.write(self.style.SUCCESS('👀 Observando cambios (Ctrl+C para salir)'))
+        try:
+            while True:
+                time.sleep(options['debounce'])
+                with lock:
+                    batch = sorted(pending)
+                    pending.clear()
+                for relpath in batch:
+                    try:
+                        inventory.sync_path(relpath)
+                    except Exception as e:
+                        self.stderr.write(f"⚠️  {relpath}: {e}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observer.stop()
+            observer.join()
@@ -0,0 +1,242 @@
+"""
+Vinculación de broadcasts sin archivo original con los masters de ``sources/``.
+
+Antes cada broadcast recorría todos los archivos buscando subcadenas (O(broadcasts
+× archivos)). ``SourceFileIndex`` arma una sola vez índices inversos por nombre,
+por nombre sin extensión, por componente de ruta y por token alfanumérico, de
+modo que cada broadcast se resuelve con unas cuantas búsquedas en diccionarios.
+
+Prioridad de coincidencia:
+  1. id_content (o sus variantes) igual a un componente de la ruta (carpeta/archivo)
+  2. id_content contenido en la ruta como token ("CNT-asdfg_v2.mov" -> cnt, asdfg, v2)
+  3. id_content contenido en cualquier parte de la ruta ("SPOT12345.mov" para CNT-12345),
+     como hacía la búsqueda anterior; solo para los que no resolvieron 1 ni 2, con un
+     ``str.find`` sobre todas las rutas concatenadas
+  4. nombre_original igual al nombre de archivo
+  5. nombre_original igual al nombre sin extensión
+Entre varios candidatos gana el primero por ruta.
+"""
+import bisect
+import logging
+import os
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+JOB_CACHE_KEY = 'match_sources_job:{}'
+JOB_CACHE_TIMEOUT = 60 * 60
+PROGRESS_EVERY = 500
+_TOKEN_RE = re.compile(r'[^0-9a-z]+')
+
+
+def id_content_variants(id_content):
+    """Variantes de un folio: completo, núcleo después de '-' y versión compacta sin separadores."""
+    idc_raw = str(id_content).strip()
+    idc = idc_raw.lower()
+    idc_core = idc_raw.split('-')[-1].strip().lower() if '-' in idc_raw else idc
+    idc_compact = ''.join(ch for ch in idc if ch.isalnum())
+    return [v for v in dict.fromkeys((idc, idc_core, idc_compact)) if v]
+
+
+class SourceFileIndex:
+    """Índices inversos sobre la lista de archivos disponibles (dicts con relative_path/filename)."""
+
+    def __init__(self, files):
+        self.files = sorted(files, key=lambda f: f['relative_path'])
+        self.by_component = {}
+        self.by_token = {}
+        self.by_name = {}
+        self.by_stem = {}
+        for i, f in enumerate(self.files):
+            filename = f['filename'].lower()
+            self.by_name.setdefault(filename, i)
+            self.by_stem.setdefault(os.path.splitext(filename)[0], i)
+            for part in f['relative_path'].lower().split('/'):
+                self._add(self.by_component, part, i)
+                stem = os.path.splitext(part)[0]
+                for key in {stem, ''.join(ch for ch in part if ch.isalnum()), ''.join(ch for ch in stem if ch.isalnum())}:
+                    self._add(self.by_token, key, i)
+                for token in _TOKEN_RE.split(part):
+                    self._add(self.by_token, token, i)
+
+    def _substring(self, variants):
+        """Primer archivo (por ruta) cuya ruta contiene alguna variante como subcadena."""
+        if not hasattr(self, '_haystack'):
+            # Rutas en minúsculas separadas por '\n' (ninguna variante lo contiene) y el offset de cada una
+            self._offsets, parts, offset = [], [], 0
+            for f in self.files:
+                rel = f['relative_path'].lower()
+                self._offsets.append(offset)
+                parts.append(rel)
+                offset += len(rel) + 1
+            self._haystack = '\n'.join(parts)
+        positions = [p for p in (self._haystack.find(v) for v in variants) if p >= 0]
+        if not positions:
+            return None
+        return bisect.bisect_right(self._offsets, min(positions)) - 1
+
+    @staticmethod
+    def _add(index, key, i):
+        if not key:
+            return
+        bucket = index.setdefault(key, [])
+        # Los archivos se agregan en orden, así que bucket[0] es el primero por ruta
+        if not bucket or bucket[-1] != i:
+            bucket.append(i)
+
+    @staticmethod
+    def _first(index, keys):
+        hits = [index[k][0] for k in keys if k in index]
+        return min(hits) if hits else None
+
+    def find(self, id_content=None, nombre=None):
+        """Regresa el dict del archivo que corresponde al broadcast, o None."""
+        if id_content:
+            variants = id_content_variants(id_content)
+            i = self._first(self.by_component, variants)
+            if i is None:
+                i = self._first(self.by_token, variants)
+            if i is None:
+                i = self._substring(variants)
+            if i is not None:
+                return self.files[i]
+        if nombre:
+            nombre_limpio = os.path.basename(str(nombre)).lower()
+            i = self.by_name.get(nombre_limpio)
+            if i is None:
+                i = self.by_stem.get(os.path.splitext(nombre_limpio)[0])
+            if i is not None:
+                return self.files[i]
+        return None
+
+
+def available_source_files(root='sources'):
+    from django.conf import settings
+    from . import inventory
+    return [
+        {
+            'filename': filename,
+            'path': os.path.join(settings.MEDIA_ROOT, rel_path),
+            'relative_path': rel_path,
+            'size': size,
+        }
+        for rel_path, filename, size in inventory.video_files(root).values_list('path', 'nombre', 'size').iterator()
+    ]
+
+
+def match_sources(repositorio, dry_run=False, progress=None):
+    """
+    Vincula los broadcasts sin archivo original de ``repositorio`` con archivos del
+    inventario. Aplica todos los vínculos con un solo bulk_update. ``progress`` recibe
+    (procesados, total) cada PROGRESS_EVERY broadcasts.
+    """
+    from django.db.models import Q
+    from .models import Broadcast
+    from .signals import ASSETS, ALL_REPOS, bump_tables
+    from .versioning import bump_version
+
+    available_files = available_source_files()
+    logger.info(f"📁 Encontrados {len(available_files)} archivos de video en sources/")
+    index = SourceFileIndex(available_files)
+
+    broadcasts_sin_archivo = Broadcast.objects.filter(
+        Q(repositorio=repositorio) & (Q(archivo_original__isnull=True) | Q(archivo_original=''))
+    )
+    total = broadcasts_sin_archivo.count()
+
+    matched = []
+    not_matched = []
+    errors = []
+    to_update = []
+    rows = broadcasts_sin_archivo.only('id', 'repositorio_id', 'id_content', 'nombre_original').order_by('pk')
+    for processed, broadcast in enumerate(rows.iterator(chunk_size=2000), start=1):
+        if progress and processed % PROGRESS_EVERY == 0:
+            progress(processed, total)
+        id_content = broadcast.id_content
+        nombre_buscar = broadcast.nombre_original
+
+        if not id_content and not nombre_buscar:
+            not_matched.append({
+                'id': str(broadcast.id),
+                'nombre': 'Sin identificador',
+                'id_content': None,
+                'reason': 'No tiene id_content ni nombre_original'
+            })
+            continue
+
+        archivo_encontrado = index.find(id_content, nombre_buscar)
+        if archivo_encontrado is None:
+            not_matched.append({
+                'id': str(broadcast.id),
+                'id_content': id_content,
+                'nombre': nombre_buscar,
+                'reason': 'Archivo no encontrado en sources/'
+            })
+            continue
+
+        if not dry_run:
+            broadcast.archivo_original = archivo_encontrado['relative_path']
+            broadcast.file_size = archivo_encontrado['size']
+            broadcast.archivo_presente = True
+            to_update.append(broadcast)
+        matched.append({
+            'id': str(broadcast.id),
+            'id_content': id_content,
+            'nombre': nombre_buscar,
+            'archivo': archivo_encontrado['filename'],
+            'path': archivo_encontrado['relative_path'],
+            'applied': not dry_run
+        })
+
+    if to_update:
+        try:
+            # No cambiamos estado aquí; start_bulk_transcode tomará los pendientes
+            with transaction.atomic():
+                Broadcast.objects.bulk_update(to_update, ['archivo_original', 'file_size', 'archivo_presente'], batch_size=1000)
+            # bulk_update no dispara señales: invalidar versiones de assets a mano
+            bump_version(ASSETS, repositorio.pk)
+            bump_version(ASSETS, ALL_REPOS)
+            bump_tables(repositorio.pk, Broadcast)
+        except Exception as e:
+            logger.error(f"Error aplicando vínculos de sources: {e}")
+            errors = [{'id': m['id'], 'id_content': m['id_content'], 'nombre': m['nombre'], 'error': str(e)} for m in matched]
+            matched = []
+    if progress:
+        progress(total, total)
+
+    logger.info(f"🔗 Match sources{' (dry-run)' if dry_run else ''}: {len(matched)}/{total} vinculados")
+    return {
+        'success': True,
+        'repositorio': repositorio.nombre,
+        'dry_run': dry_run,
+        'total_broadcasts': total,
+        'matched': len(matched),
+        'not_matched': len(not_matched),
+        'errors': len(errors),
+        'matched_list': matched[:50],  # Primeros 50
+        'not_matched_list': not_matched[:50],
+        'errors_list': errors[:50],
+        'available_files_count': len(available_files)
+    }
+
+
+# ------------------------------------------------------------
+# Estado del job en background (cache)
+# ------------------------------------------------------------
+def set_job_state(job_id, **state):
+    try:
+        current = cache.get(JOB_CACHE_KEY.format(job_id)) or {}
+        current.update(state)
+        cache.set(JOB_CACHE_KEY.format(job_id), current, JOB_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el progreso del job {job_id}: {e}")
+
+
+def get_job_state(job_id):
+    try:
+        return cache.get(JOB_CACHE_KEY.format(job_id))
+    except Exception:
+        return None
@@ -0,0 +1,92 @@
+"""
+Compresión negociada (brotli/gzip) de las respuestas JSON de la API.
+
+A diferencia de ``django.middleware.gzip.GZipMiddleware`` solo comprime JSON por
+encima de ``API_COMPRESSION_MIN_SIZE`` bytes: los archivos de media (stream,
+descargas, zip) ya vienen comprimidos y además se sirven con Range, así que se
+excluyen por tipo de contenido, por ser streaming y por prefijo de URL
+(``API_COMPRESSION_EXCLUDE_PREFIXES``). Brotli es opcional (paquete ``brotli``).
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/problem+json')
+
+
+def accepted_encodings(header):
+    """Codificaciones aceptadas por el cliente (q > 0) según Accept-Encoding."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'API_COMPRESSION_BROTLI_QUALITY', 4))
+    return gzip.compress(content, compresslevel=getattr(settings, 'API_COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+
+
+class JSONCompressionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024)
+        self.exclude = tuple(getattr(settings, 'API_COMPRESSION_EXCLUDE_PREFIXES', ()))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if getattr(response, 'streaming', False) or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES or request.path.startswith(self.exclude):
+            return response
+        # Varía por Accept-Encoding aunque esta respuesta no se comprima (caches intermedios)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_size:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # El cuerpo cambió: un ETag fuerte deja de ser válido (igual que GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_encodingpreset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audio',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Original file size in bytes (stored at upload time)', null=True),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Original file size in bytes (stored at upload/match time)', null=True),
+        ),
+        migrations.AddField(
+            model_name='imageasset',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Tamaño del archivo original en bytes (se guarda al subir)', null=True),
+        ),
+    ]
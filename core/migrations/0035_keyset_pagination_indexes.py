@@ -0,0 +1,45 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_file_size'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audio',
+            index=models.Index(fields=['fecha_subida', 'id'], name='audio_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audio',
+            index=models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='audio_repo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['fecha_subida', 'id'], name='broadcast_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='broadcast_repo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imageasset',
+            index=models.Index(fields=['fecha_subida', 'id'], name='image_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imageasset',
+            index=models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='image_repo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageasset',
+            index=models.Index(fields=['fecha_subida', 'id'], name='storage_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageasset',
+            index=models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='storage_repo_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:21
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    """Calcula el path materializado de todos los directorios existentes (recorrido desde las raíces)."""
+    Directorio = apps.get_model('core', 'Directorio')
+    children = {}
+    for pk, parent_id in Directorio.objects.values_list('pk', 'parent_id'):
+        children.setdefault(parent_id, []).append(pk)
+
+    paths = {}
+    queue = [(pk, '/') for pk in children.get(None, [])]
+    while queue:
+        pk, parent_path = queue.pop()
+        if pk in paths:
+            continue
+        paths[pk] = f"{parent_path}{pk}/"
+        queue.extend((child, paths[pk]) for child in children.get(pk, []))
+
+    batch = [Directorio(pk=pk, path=path) for pk, path in paths.items()]
+    Directorio.objects.bulk_update(batch, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='directorio',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Ruta materializada de IDs (/raiz/.../self/)', max_length=1024),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,147 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:24
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'core_searchentry_fts'
+
+SQLITE_FORWARD = [
+    # Tabla FTS5 con contenido externo (no duplica el texto) y tokenizer trigram => subcadenas
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(content, content='core_searchentry', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_searchentry_au AFTER UPDATE OF content ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_searchentry_au",
+    "DROP TRIGGER IF EXISTS core_searchentry_ad",
+    "DROP TRIGGER IF EXISTS core_searchentry_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS core_searchentry_tsv_gin ON core_searchentry USING GIN (to_tsvector('simple', content))",
+    "CREATE INDEX IF NOT EXISTS core_searchentry_trgm_gin ON core_searchentry USING GIN (content gin_trgm_ops)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS core_searchentry_trgm_gin",
+    "DROP INDEX IF EXISTS core_searchentry_tsv_gin",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        from django.db import OperationalError
+        try:
+            _run(schema_editor, SQLITE_FORWARD)
+        except OperationalError as e:
+            # SQLite < 3.34 no tiene tokenizer trigram: la búsqueda cae a LIKE sobre core_searchentry
+            print(f"⚠️ FTS5 trigram no disponible, búsqueda sin índice FTS: {e}")
+            _run(schema_editor, SQLITE_BACKWARD)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+# Copia congelada de core.search.build_content tal como estaba en esta migración:
+# la migración no debe cambiar si después cambia el texto indexado
+MAX_CONTENT_LENGTH = 4000
+PIZARRA_FIELDS = ('producto', 'version', 'cliente', 'agencia', 'duracion', 'fecha', 'vtype')
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def _scalar_values(data):
+    if not isinstance(data, dict):
+        return []
+    return [str(v) for v in data.values() if isinstance(v, (str, int, float)) and str(v).strip()]
+
+
+def build_content(asset_type, obj):
+    parts = [obj.nombre_original or '']
+    if asset_type == 'broadcast':
+        pizarra = obj.pizarra if isinstance(obj.pizarra, dict) else {}
+        parts.append(obj.id_content or '')
+        parts.extend(str(pizarra.get(k) or '') for k in PIZARRA_FIELDS)
+        parts.extend(v for k, v in pizarra.items() if k not in PIZARRA_FIELDS and isinstance(v, str))
+    elif asset_type == 'audio':
+        parts.append(obj.id_content or '')
+        parts.extend(_scalar_values(obj.metadata))
+    elif asset_type == 'image':
+        parts.append(obj.tipo_archivo or '')
+        parts.extend(_scalar_values(obj.metadata))
+    elif asset_type == 'storage':
+        parts.append(obj.tipo_archivo or '')
+    if getattr(obj, 'fecha_subida', None):
+        parts.append(obj.fecha_subida.date().isoformat())
+    content = ' '.join(p.strip() for p in parts if p and p.strip())
+    return _normalize(content)[:MAX_CONTENT_LENGTH]
+
+
+def populate_search_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+    for asset_type, model_name in (('broadcast', 'Broadcast'), ('audio', 'Audio'), ('image', 'ImageAsset'), ('storage', 'StorageAsset')):
+        Model = apps.get_model('core', model_name)
+        batch = []
+        for obj in Model.objects.order_by().iterator(chunk_size=500):
+            batch.append(SearchEntry(asset_type=asset_type, asset_id=obj.pk, repositorio_id=obj.repositorio_id,
+                                     content=build_content(asset_type, obj)))
+            if len(batch) >= 500:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_directorio_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_type', models.CharField(choices=[('broadcast', 'Broadcast'), ('audio', 'Audio'), ('image', 'Image'), ('storage', 'Storage')], max_length=20)),
+                ('asset_id', models.UUIDField()),
+                ('content', models.TextField(blank=True, default='')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('repositorio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='core.repositorio')),
+            ],
+            options={
+                'verbose_name': 'Entrada de búsqueda',
+                'verbose_name_plural': 'Índice de búsqueda',
+                'indexes': [models.Index(fields=['asset_type', 'repositorio'], name='searchentry_type_repo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('asset_type', 'asset_id'), name='searchentry_unique_asset')],
+            },
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(populate_search_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:25
+
+from datetime import date
+
+from django.db import migrations, models
+
+# Copia congelada de core.models.pizarra_columns tal como estaba en esta migración
+PIZARRA_TEXT_COLUMNS = {'producto': 255, 'cliente': 255, 'agencia': 255, 'version': 100, 'duracion': 20, 'vtype': 50}
+PIZARRA_COLUMNS = tuple(PIZARRA_TEXT_COLUMNS) + ('fecha', 'anio')
+
+
+def pizarra_columns(pizarra):
+    pizarra = pizarra if isinstance(pizarra, dict) else {}
+    values = {name: str(pizarra.get(name) or '').strip()[:max_length] for name, max_length in PIZARRA_TEXT_COLUMNS.items()}
+    fecha = None
+    raw = str(pizarra.get('fecha') or '').strip()
+    if raw:
+        try:
+            fecha = date.fromisoformat(raw[:10])
+        except ValueError:
+            fecha = None
+    values['fecha'] = fecha
+    values['anio'] = fecha.year if fecha else None
+    return values
+
+
+def fill_pizarra_columns(apps, schema_editor):
+    Broadcast = apps.get_model('core', 'Broadcast')
+    batch = []
+    for b in Broadcast.objects.only('id', 'pizarra').order_by().iterator(chunk_size=1000):
+        for name, value in pizarra_columns(b.pizarra).items():
+            setattr(b, name, value)
+        batch.append(b)
+        if len(batch) >= 1000:
+            Broadcast.objects.bulk_update(batch, PIZARRA_COLUMNS)
+            batch = []
+    if batch:
+        Broadcast.objects.bulk_update(batch, PIZARRA_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_search_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='agencia',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='anio',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text="Año de pizarra['fecha']", null=True),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='cliente',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='duracion',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='fecha',
+            field=models.DateField(blank=True, editable=False, help_text="pizarra['fecha'] como fecha", null=True),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='producto',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='version',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='vtype',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['cliente', 'anio'], name='broadcast_cliente_anio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['repositorio', 'cliente', 'anio'], name='broadcast_repo_cliente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['anio', 'cliente'], name='broadcast_anio_cliente_idx'),
+        ),
+        migrations.RunPython(fill_pizarra_columns, migrations.RunPython.noop),
+    ]
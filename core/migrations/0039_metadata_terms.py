@@ -0,0 +1,66 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:26
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copia congelada de core.terms.rebuild_terms tal como estaba en esta migración:
+# la migración no debe cambiar si después cambia la normalización de términos
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def fill_terms(apps, schema_editor):
+    Broadcast = apps.get_model('core', 'Broadcast')
+    MetadataTerm = apps.get_model('core', 'MetadataTerm')
+    Agencia = apps.get_model('core', 'Agencia')
+    counts = {}
+    display = {}
+    rows = Broadcast.objects.order_by().values_list('repositorio_id', 'cliente', 'agencia', 'producto').iterator()
+    for repositorio_id, *valores in rows:
+        for campo, valor in zip(('cliente', 'agencia', 'producto'), valores):
+            valor = (valor or '').strip()
+            if not repositorio_id or not valor:
+                continue
+            key = (repositorio_id, campo, _normalize(valor)[:255])
+            counts[key] = counts.get(key, 0) + 1
+            display.setdefault(key, valor[:255])
+    MetadataTerm.objects.all().delete()
+    MetadataTerm.objects.bulk_create([
+        MetadataTerm(repositorio_id=r, campo=c, valor=display[(r, c, n)], valor_normalizado=n, conteo=total)
+        for (r, c, n), total in counts.items()
+    ], batch_size=1000)
+    agencias = {display[key] for key in counts if key[1] == 'agencia'}
+    existentes = set(Agencia.objects.values_list('nombre', flat=True))
+    Agencia.objects.bulk_create([Agencia(nombre=n) for n in sorted(agencias - existentes)], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_broadcast_pizarra_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetadataTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campo', models.CharField(choices=[('cliente', 'Cliente'), ('agencia', 'Agencia'), ('producto', 'Producto')], max_length=20)),
+                ('valor', models.CharField(help_text='Valor tal como se capturó (primera aparición)', max_length=255)),
+                ('valor_normalizado', models.CharField(help_text='Minúsculas y sin acentos, para búsqueda por prefijo', max_length=255)),
+                ('conteo', models.PositiveIntegerField(default=0, help_text='Número de broadcasts con este valor')),
+                ('repositorio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='core.repositorio')),
+            ],
+            options={
+                'verbose_name': 'Término de metadata',
+                'verbose_name_plural': 'Términos de metadata',
+                'indexes': [models.Index(fields=['campo', 'valor_normalizado'], name='metadataterm_prefix_idx')],
+                'constraints': [models.UniqueConstraint(fields=('repositorio', 'campo', 'valor_normalizado'), name='metadataterm_unique')],
+            },
+        ),
+        migrations.RunPython(fill_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_metadata_terms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='archivo_presente',
+            field=models.BooleanField(blank=True, editable=False, help_text='El original existe en disco (None = sin verificar). Lo mantiene check_source_presence', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['repositorio', 'estado_transcodificacion', 'archivo_presente'], name='broadcast_repo_estado_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_broadcast_archivo_presente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDirectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Ruta relativa a MEDIA_ROOT (ej. sources/CNT-abc)', max_length=1024, unique=True)),
+                ('raiz', models.CharField(db_index=True, help_text='Carpeta raíz inventariada (ej. sources)', max_length=255)),
+                ('mtime_ns', models.BigIntegerField(default=0)),
+                ('fecha_escaneo', models.DateTimeField(blank=True, null=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subdirectorios', to='core.mediadirectory')),
+            ],
+            options={
+                'verbose_name': 'Carpeta de media',
+                'verbose_name_plural': 'Inventario de carpetas de media',
+            },
+        ),
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Ruta relativa a MEDIA_ROOT (ej. sources/CNT-abc/spot.mov)', max_length=1024, unique=True)),
+                ('raiz', models.CharField(help_text='Carpeta raíz inventariada (ej. sources)', max_length=255)),
+                ('nombre', models.CharField(max_length=512)),
+                ('extension', models.CharField(blank=True, default='', help_text="Extensión en minúsculas con punto ('' = sin extensión)", max_length=20)),
+                ('size', models.BigIntegerField(default=0)),
+                ('mtime_ns', models.BigIntegerField(default=0)),
+                ('inode', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, default='', help_text='Opcional (scan_media_inventory --hash)', max_length=64)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('directorio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archivos', to='core.mediadirectory')),
+            ],
+            options={
+                'verbose_name': 'Archivo de media',
+                'verbose_name_plural': 'Inventario de archivos de media',
+                'indexes': [models.Index(fields=['raiz', 'extension'], name='mediafile_raiz_ext_idx'), models.Index(fields=['directorio', 'nombre'], name='mediafile_dir_nombre_idx')],
+            },
+        ),
+    ]
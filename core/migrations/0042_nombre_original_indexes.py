@@ -0,0 +1,29 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0041_media_inventory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audio',
+            index=models.Index(fields=['nombre_original'], name='audio_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['nombre_original'], name='broadcast_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imageasset',
+            index=models.Index(fields=['nombre_original'], name='image_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageasset',
+            index=models.Index(fields=['nombre_original'], name='storage_nombre_idx'),
+        ),
+    ]
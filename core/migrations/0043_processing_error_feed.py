@@ -0,0 +1,79 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+# Copia congelada de core.errorlog.rebuild_rollups tal como estaba en esta migración
+def backfill_rollups(apps, schema_editor):
+    ProcessingError = apps.get_model('core', 'ProcessingError')
+    ProcessingErrorRollup = apps.get_model('core', 'ProcessingErrorRollup')
+    ProcessingErrorRollup.objects.all().delete()
+    rows = (
+        ProcessingError.objects.annotate(dia=TruncDate('fecha_creacion'))
+        .values('repositorio_id', 'stage', 'dia')
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+    ProcessingErrorRollup.objects.bulk_create([ProcessingErrorRollup(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_nombre_original_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingErrorDetalle',
+            fields=[
+                ('error', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='detalle', serialize=False, to='core.processingerror')),
+                ('contenido', models.BinaryField()),
+                ('tamano_original', models.PositiveIntegerField(default=0, help_text='Longitud en caracteres del mensaje original')),
+                ('fecha_archivado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Detalle de Error Archivado',
+                'verbose_name_plural': 'Detalles de Errores Archivados',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProcessingErrorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('upload', 'Upload'), ('transcode', 'Transcode Video'), ('encode_custom', 'Custom Encode Video'), ('audio_process', 'Process Audio'), ('audio_encode', 'Encode Audio'), ('image_process', 'Process Image'), ('storage', 'Storage Save'), ('other', 'Other')], default='other', max_length=40)),
+                ('dia', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Errores',
+                'verbose_name_plural': 'Resúmenes Diarios de Errores',
+                'ordering': ['-dia', 'stage'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='processingerror',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='procerror_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingerror',
+            index=models.Index(fields=['repositorio', 'fecha_creacion', 'id'], name='procerror_repo_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='processingerrorrollup',
+            name='repositorio',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='errores_rollup', to='core.repositorio'),
+        ),
+        migrations.AddIndex(
+            model_name='processingerrorrollup',
+            index=models.Index(fields=['dia'], name='procerror_rollup_dia_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='processingerrorrollup',
+            constraint=models.UniqueConstraint(fields=('repositorio', 'stage', 'dia'), name='procerror_rollup_unique'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
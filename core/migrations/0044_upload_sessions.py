@@ -0,0 +1,63 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:56
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_processing_error_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('broadcast', 'Broadcast'), ('audio', 'Audio'), ('image', 'Imagen'), ('storage', 'Storage')], max_length=20)),
+                ('nombre_original', models.CharField(max_length=512)),
+                ('tamano', models.BigIntegerField(help_text='Tamaño total del archivo en bytes')),
+                ('chunk_size', models.PositiveIntegerField(help_text='Tamaño de cada parte (la última puede ser menor)')),
+                ('ruta', models.CharField(help_text='Ruta relativa a MEDIA_ROOT donde se escriben las partes', max_length=512)),
+                ('datos', models.JSONField(blank=True, default=dict, help_text='Campos del asset a crear (repositorio, directorio, pizarra...)')),
+                ('estado', models.CharField(choices=[('ABIERTA', 'Abierta'), ('COMPLETADA', 'Completada'), ('CANCELADA', 'Cancelada')], default='ABIERTA', max_length=20)),
+                ('sha256', models.CharField(blank=True, default='', help_text='sha256 de la lista de sha256 de las partes (en orden)', max_length=64)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('creado_por', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sesión de upload',
+                'verbose_name_plural': 'Sesiones de upload',
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indice', models.PositiveIntegerField()),
+                ('tamano', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('fecha_recepcion', models.DateTimeField(auto_now=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='core.uploadsession')),
+            ],
+            options={
+                'ordering': ['indice'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['tipo', 'nombre_original', 'estado'], name='upload_session_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['estado', 'fecha_actualizacion'], name='upload_session_estado_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'indice'), name='upload_chunk_unique'),
+        ),
+    ]
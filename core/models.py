@@ -4,6 +4,7 @@ import os
 import random
 import string
 from django.db import models
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
@@ -147,12 +148,11 @@ class CustomUser(AbstractUser):
         super().save(*args, **kwargs)
     
     def tiene_permiso(self, permiso):
-        """Verifica si el usuario tiene un permiso específico según su perfil"""
+        """Verifica si el usuario tiene un permiso específico según su perfil (contexto cacheado, ver core.authz)"""
         if self.is_superuser:
             return True
-        if not self.perfil or not self.perfil.activo:
-            return False
-        return getattr(self.perfil, permiso, False)
+        from .authz import get_context
+        return get_context(self).tiene_permiso(permiso)
 
 class RepositorioPermiso(models.Model):
     """Granular user permissions on repository"""
@@ -177,6 +177,38 @@ class Agencia(models.Model):
     def __str__(self):
         return self.nombre
 
+class DirectorioQuerySet(models.QuerySet):
+    def descendants_of(self, directorio, include_self=True):
+        """Subárbol completo usando el path materializado (una sola consulta)."""
+        qs = self.filter(path__startswith=directorio.path)
+        return qs if include_self else qs.exclude(pk=directorio.pk)
+
+    def with_content_count(self):
+        """
+        Anota ``content_count``: total de contenido en la carpeta y todas sus subcarpetas.
+        Cuenta audios, imágenes o storage según el tipo de módulo; broadcasts en otro caso.
+        Es una subconsulta correlacionada por fila, así que el listado completo es una sola query.
+        """
+        def _subtree_count(model):
+            return models.Subquery(
+                model.objects.filter(directorio__path__startswith=models.OuterRef('path'))
+                .order_by()
+                .annotate(c=models.Func(models.F('pk'), function='COUNT'))
+                .values('c'),
+                output_field=models.IntegerField(),
+            )
+
+        return self.annotate(content_count=Coalesce(
+            models.Case(
+                models.When(modulo__tipo='audio', then=_subtree_count(Audio)),
+                models.When(modulo__tipo='images', then=_subtree_count(ImageAsset)),
+                models.When(modulo__tipo='storage', then=_subtree_count(StorageAsset)),
+                default=_subtree_count(Broadcast),
+            ),
+            0,
+        ))
+
+
 class Directorio(models.Model):
     """Carpetas/folders para organizar comerciales dentro de un repositorio"""
     nombre = models.CharField(max_length=255, help_text="Nombre del directorio/folder")
@@ -184,7 +216,11 @@ class Directorio(models.Model):
     modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE, null=True, blank=True, related_name='directorios', help_text="Módulo al que pertenece este directorio")
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subdirectorios', help_text="Directorio padre (para estructura jerárquica)")
     id_dir = models.CharField(max_length=15, blank=True, null=True, db_index=True, help_text="Folio único del directorio (ej: DIR-mnopq)")
+    # Path materializado con los IDs de los ancestros, incluyendo el propio: "/3/17/42/"
+    path = models.CharField(max_length=1024, blank=True, default='', db_index=True, editable=False, help_text="Ruta materializada de IDs (/raiz/.../self/)")
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    objects = DirectorioQuerySet.as_manager()
     
     class Meta:
         unique_together = [['nombre', 'repositorio', 'modulo', 'parent']]
@@ -193,6 +229,89 @@ class Directorio(models.Model):
     def __str__(self):
         return f"{self.repositorio.nombre}/{self.nombre}"
 
+    def save(self, *args, **kwargs):
+        from django.core.exceptions import ValidationError
+        parent_path = '/'
+        if self.parent_id:
+            parent_path = Directorio.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or '/'
+            # Evitar ciclos: el padre no puede ser la carpeta misma ni uno de sus descendientes
+            if self.pk and (self.parent_id == self.pk or f"/{self.pk}/" in parent_path):
+                raise ValidationError('Un directorio no puede moverse dentro de sí mismo o de un subdirectorio')
+        old_path = Directorio.objects.filter(pk=self.pk).values_list('path', flat=True).first() if self.pk else None
+
+        super().save(*args, **kwargs)
+
+        new_path = f"{parent_path}{self.pk}/"
+        if new_path != old_path:
+            Directorio.objects.filter(pk=self.pk).update(path=new_path)
+            if old_path:
+                # Movimiento: reescribir el prefijo de todo el subárbol en un solo UPDATE
+                Directorio.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(
+                        models.Value(new_path),
+                        Substr('path', len(old_path) + 1),
+                        output_field=models.CharField(),
+                    )
+                )
+        self.path = new_path
+
+# Campos de la pizarra que se copian a columnas reales indexadas (ver Broadcast.sync_pizarra_columns)
+PIZARRA_TEXT_COLUMNS = ('producto', 'cliente', 'agencia', 'version', 'duracion', 'vtype')
+PIZARRA_COLUMNS = PIZARRA_TEXT_COLUMNS + ('fecha', 'anio')
+
+
+def pizarra_columns(pizarra):
+    """
+    Valores de las columnas denormalizadas a partir del JSON de la pizarra.
+
+    No son GeneratedField: ``fecha`` viene como texto libre y se descarta si no es
+    ISO, y en Postgres el cast texto->date no es IMMUTABLE, así que no puede ir en
+    una columna generada (un valor inválido además haría fallar el INSERT).
+    """
+    from datetime import date
+    pizarra = pizarra if isinstance(pizarra, dict) else {}
+    values = {}
+    for name in PIZARRA_TEXT_COLUMNS:
+        max_length = Broadcast._meta.get_field(name).max_length
+        values[name] = str(pizarra.get(name) or '').strip()[:max_length]
+    fecha = None
+    raw = str(pizarra.get('fecha') or '').strip()
+    if raw:
+        try:
+            fecha = date.fromisoformat(raw[:10])
+        except ValueError:
+            fecha = None
+    values['fecha'] = fecha
+    values['anio'] = fecha.year if fecha else None
+    return values
+
+
+class BroadcastQuerySet(models.QuerySet):
+    """Mantiene las columnas de pizarra sincronizadas también en operaciones masivas."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.sync_pizarra_columns()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if 'pizarra' in fields:
+            for obj in objs:
+                obj.sync_pizarra_columns()
+            fields += [f for f in PIZARRA_COLUMNS if f not in fields]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        # Solo se puede derivar si pizarra viene como dict literal (no expresiones F/JSON)
+        if isinstance(kwargs.get('pizarra'), dict):
+            for name, value in pizarra_columns(kwargs['pizarra']).items():
+                kwargs.setdefault(name, value)
+        return super().update(**kwargs)
+
+
 class Broadcast(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     repositorio = models.ForeignKey(Repositorio, on_delete=models.CASCADE, related_name='broadcasts')
@@ -202,6 +321,8 @@ class Broadcast(models.Model):
     
     archivo_original = models.FileField(upload_to=upload_to_originals, max_length=512, blank=True, null=True, help_text="Original master file uploaded by user")
     nombre_original = models.CharField(max_length=512, blank=True, null=True, help_text="Original filename uploaded")
+    file_size = models.BigIntegerField(blank=True, null=True, help_text="Original file size in bytes (stored at upload/match time)")
+    archivo_presente = models.BooleanField(blank=True, null=True, editable=False, help_text="El original existe en disco (None = sin verificar). Lo mantiene check_source_presence")
     
     ruta_proxy = models.CharField(max_length=1024, blank=True, null=True, help_text="Path to transcoded H.265 proxy file")
     ruta_h264 = models.CharField(max_length=1024, blank=True, null=True, help_text="Path to transcoded H.264 file")
@@ -222,8 +343,46 @@ class Broadcast(models.Model):
     id_content = models.CharField(max_length=15, blank=True, null=True, db_index=True, help_text="Folio único del contenido (ej: CNT-asdfg)")
     pizarra = models.JSONField(default=dict, blank=True, help_text="Flexible broadcast metadata (product, version, etc.)")
 
+    # Copia indexada de los campos más usados de la pizarra (se sincronizan en save/bulk_*)
+    producto = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    cliente = models.CharField(max_length=255, blank=True, default='', editable=False)
+    agencia = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    version = models.CharField(max_length=100, blank=True, default='', editable=False)
+    duracion = models.CharField(max_length=20, blank=True, default='', editable=False)
+    vtype = models.CharField(max_length=50, blank=True, default='', editable=False)
+    fecha = models.DateField(blank=True, null=True, editable=False, help_text="pizarra['fecha'] como fecha")
+    anio = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, help_text="Año de pizarra['fecha']")
+
     fecha_subida = models.DateTimeField(auto_now_add=True)
 
+    objects = BroadcastQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Paginación keyset (fecha_subida, id), global y por repositorio
+            models.Index(fields=['fecha_subida', 'id'], name='broadcast_fecha_id_idx'),
+            # Detección de duplicados al subir (core.duplicates)
+            models.Index(fields=['nombre_original'], name='broadcast_nombre_idx'),
+            models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='broadcast_repo_fecha_idx'),
+            # Navegación "cliente + año"
+            models.Index(fields=['cliente', 'anio'], name='broadcast_cliente_anio_idx'),
+            models.Index(fields=['repositorio', 'cliente', 'anio'], name='broadcast_repo_cliente_idx'),
+            models.Index(fields=['anio', 'cliente'], name='broadcast_anio_cliente_idx'),
+            # Resumen de transcodificación / pendientes por razón
+            models.Index(fields=['repositorio', 'estado_transcodificacion', 'archivo_presente'], name='broadcast_repo_estado_idx'),
+        ]
+
+    def sync_pizarra_columns(self):
+        for name, value in pizarra_columns(self.pizarra).items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        self.sync_pizarra_columns()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'pizarra' in update_fields:
+            kwargs['update_fields'] = list(update_fields) + [f for f in PIZARRA_COLUMNS if f not in update_fields]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         # Try to get product from pizarra, with fallback if it doesn't exist
         producto = self.pizarra.get('producto', 'N/A')
@@ -242,6 +401,7 @@ class ImageAsset(models.Model):
     archivo_original = models.FileField(upload_to=upload_to_originals, max_length=512, blank=True, null=True, help_text="Archivo de imagen original en formato nativo (sources/)")
     nombre_original = models.CharField(max_length=512, blank=True, null=True, help_text="Nombre original del archivo")
     tipo_archivo = models.CharField(max_length=20, blank=True, null=True, help_text="Tipo de archivo (jpg, png, tiff, psd, ai, svg, etc)")
+    file_size = models.BigIntegerField(blank=True, null=True, help_text="Tamaño del archivo original en bytes (se guarda al subir)")
     
     # Versión para web (support/)
     imagen_web = models.ImageField(upload_to='support/', blank=True, null=True, help_text="Versión optimizada JPG para visualización web")
@@ -265,6 +425,12 @@ class ImageAsset(models.Model):
         verbose_name = "Imagen"
         verbose_name_plural = "Imágenes"
         ordering = ['-fecha_subida']
+        indexes = [
+            models.Index(fields=['fecha_subida', 'id'], name='image_fecha_id_idx'),
+            # Detección de duplicados al subir (core.duplicates)
+            models.Index(fields=['nombre_original'], name='image_nombre_idx'),
+            models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='image_repo_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_original or self.id} ({self.tipo_archivo})"
@@ -280,6 +446,7 @@ class Audio(models.Model):
     
     archivo_original = models.FileField(upload_to=upload_to_originals, max_length=512, blank=True, null=True, help_text="Original audio file uploaded by user")
     nombre_original = models.CharField(max_length=512, blank=True, null=True, help_text="Original filename uploaded")
+    file_size = models.BigIntegerField(blank=True, null=True, help_text="Original file size in bytes (stored at upload time)")
     
     ruta_mp3 = models.CharField(max_length=1024, blank=True, null=True, help_text="Path to converted MP3 file for playback")
     
@@ -299,6 +466,14 @@ class Audio(models.Model):
 
     fecha_subida = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha_subida', 'id'], name='audio_fecha_id_idx'),
+            # Detección de duplicados al subir (core.duplicates)
+            models.Index(fields=['nombre_original'], name='audio_nombre_idx'),
+            models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='audio_repo_fecha_idx'),
+        ]
+
     def __str__(self):
         titulo = self.metadata.get('titulo', self.nombre_original or 'N/A')
         return f"{titulo} ({self.repositorio.nombre})"
@@ -337,6 +512,12 @@ class StorageAsset(models.Model):
         verbose_name = "Storage File"
         verbose_name_plural = "Storage Files"
         ordering = ['-fecha_subida']
+        indexes = [
+            models.Index(fields=['fecha_subida', 'id'], name='storage_fecha_id_idx'),
+            # Detección de duplicados al subir (core.duplicates)
+            models.Index(fields=['nombre_original'], name='storage_nombre_idx'),
+            models.Index(fields=['repositorio', 'fecha_subida', 'id'], name='storage_repo_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_original or self.id} ({self.tipo_archivo})"
@@ -442,7 +623,10 @@ class ProcessingError(models.Model):
         ordering = ['-fecha_creacion']
         indexes = [
             models.Index(fields=['repositorio', 'modulo', 'stage']),
-            models.Index(fields=['fecha_creacion'])
+            models.Index(fields=['fecha_creacion']),
+            # Feed incremental (?since=) por (fecha_creacion, id), global y por repositorio
+            models.Index(fields=['fecha_creacion', 'id'], name='procerror_fecha_id_idx'),
+            models.Index(fields=['repositorio', 'fecha_creacion', 'id'], name='procerror_repo_fecha_idx'),
         ]
 
     def __str__(self):
@@ -455,6 +639,44 @@ class ProcessingError(models.Model):
         return (self.error_message[:120] + '…') if len(self.error_message) > 120 else self.error_message
 
 
+class ProcessingErrorDetalle(models.Model):
+    """stderr completo (comprimido con zlib) de un error compactado; error_message queda truncado."""
+    error = models.OneToOneField(ProcessingError, on_delete=models.CASCADE, primary_key=True, related_name='detalle')
+    contenido = models.BinaryField()
+    tamano_original = models.PositiveIntegerField(default=0, help_text="Longitud en caracteres del mensaje original")
+    fecha_archivado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Detalle de Error Archivado"
+        verbose_name_plural = "Detalles de Errores Archivados"
+
+    def texto(self):
+        import zlib
+        return zlib.decompress(bytes(self.contenido)).decode('utf-8', 'replace')
+
+
+class ProcessingErrorRollup(models.Model):
+    """Conteo diario de errores por repositorio y etapa. Sobrevive a la compactación de ProcessingError."""
+    repositorio = models.ForeignKey(Repositorio, on_delete=models.CASCADE, null=True, blank=True, related_name='errores_rollup')
+    stage = models.CharField(max_length=40, choices=ProcessingError.STAGE_CHOICES, default='other')
+    dia = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumen Diario de Errores"
+        verbose_name_plural = "Resúmenes Diarios de Errores"
+        ordering = ['-dia', 'stage']
+        constraints = [
+            models.UniqueConstraint(fields=['repositorio', 'stage', 'dia'], name='procerror_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['dia'], name='procerror_rollup_dia_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.stage}: {self.total}"
+
+
 class EncodingPreset(models.Model):
     """Presets personalizados de codificación FFmpeg guardados por el usuario.
     
@@ -516,3 +738,192 @@ class EncodingPreset(models.Model):
         self.veces_usado += 1
         self.save(update_fields=['veces_usado'])
 
+
+
+class SearchEntry(models.Model):
+    """Índice de búsqueda de texto para todos los assets (una fila por asset).
+
+    ``content`` guarda el texto buscable ya normalizado (minúsculas y sin acentos).
+    Sobre esta tabla se crean índices específicos del motor (ver migración 0037):
+    GIN tsvector + trigram en Postgres y una tabla FTS5 en SQLite. Se mantiene al
+    día con señales (core.signals) al guardar/borrar cada asset.
+    """
+
+    ASSET_TYPES = [
+        ('broadcast', 'Broadcast'),
+        ('audio', 'Audio'),
+        ('image', 'Image'),
+        ('storage', 'Storage'),
+    ]
+
+    asset_type = models.CharField(max_length=20, choices=ASSET_TYPES)
+    asset_id = models.UUIDField()
+    repositorio = models.ForeignKey(Repositorio, on_delete=models.CASCADE, related_name='search_entries')
+    content = models.TextField(blank=True, default='')
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Entrada de búsqueda"
+        verbose_name_plural = "Índice de búsqueda"
+        constraints = [
+            models.UniqueConstraint(fields=['asset_type', 'asset_id'], name='searchentry_unique_asset'),
+        ]
+        indexes = [
+            models.Index(fields=['asset_type', 'repositorio'], name='searchentry_type_repo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_type}:{self.asset_id}"
+
+
+class MetadataTerm(models.Model):
+    """Diccionario de valores distintos de cliente/agencia/producto por repositorio.
+
+    Se mantiene incrementalmente con señales (core.terms) y alimenta el
+    autocompletado: las búsquedas por prefijo son un rango sobre
+    ``valor_normalizado`` usando el índice, sin tocar la tabla de broadcasts.
+    """
+
+    CAMPO_CHOICES = [
+        ('cliente', 'Cliente'),
+        ('agencia', 'Agencia'),
+        ('producto', 'Producto'),
+    ]
+
+    repositorio = models.ForeignKey(Repositorio, on_delete=models.CASCADE, related_name='terminos')
+    campo = models.CharField(max_length=20, choices=CAMPO_CHOICES)
+    valor = models.CharField(max_length=255, help_text="Valor tal como se capturó (primera aparición)")
+    valor_normalizado = models.CharField(max_length=255, help_text="Minúsculas y sin acentos, para búsqueda por prefijo")
+    conteo = models.PositiveIntegerField(default=0, help_text="Número de broadcasts con este valor")
+
+    class Meta:
+        verbose_name = "Término de metadata"
+        verbose_name_plural = "Términos de metadata"
+        constraints = [
+            models.UniqueConstraint(fields=['repositorio', 'campo', 'valor_normalizado'], name='metadataterm_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['campo', 'valor_normalizado'], name='metadataterm_prefix_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.campo}: {self.valor} ({self.conteo})"
+
+
+class MediaDirectory(models.Model):
+    """Carpeta del inventario de media (core.inventory).
+
+    ``mtime_ns`` es el mtime de la carpeta en el último escaneo: si no cambió,
+    su lista de archivos tampoco, y el escáner incremental no la vuelve a listar.
+    """
+
+    path = models.CharField(max_length=1024, unique=True, help_text="Ruta relativa a MEDIA_ROOT (ej. sources/CNT-abc)")
+    raiz = models.CharField(max_length=255, db_index=True, help_text="Carpeta raíz inventariada (ej. sources)")
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subdirectorios')
+    mtime_ns = models.BigIntegerField(default=0)
+    fecha_escaneo = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Carpeta de media"
+        verbose_name_plural = "Inventario de carpetas de media"
+
+    def __str__(self):
+        return self.path
+
+
+class MediaFile(models.Model):
+    """Archivo del inventario de media: evita recorrer el disco en cada consulta."""
+
+    path = models.CharField(max_length=1024, unique=True, help_text="Ruta relativa a MEDIA_ROOT (ej. sources/CNT-abc/spot.mov)")
+    raiz = models.CharField(max_length=255, help_text="Carpeta raíz inventariada (ej. sources)")
+    directorio = models.ForeignKey(MediaDirectory, on_delete=models.CASCADE, related_name='archivos')
+    nombre = models.CharField(max_length=512)
+    extension = models.CharField(max_length=20, blank=True, default='', help_text="Extensión en minúsculas con punto ('' = sin extensión)")
+    size = models.BigIntegerField(default=0)
+    mtime_ns = models.BigIntegerField(default=0)
+    inode = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default='', help_text="Opcional (scan_media_inventory --hash)")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Archivo de media"
+        verbose_name_plural = "Inventario de archivos de media"
+        indexes = [
+            models.Index(fields=['raiz', 'extension'], name='mediafile_raiz_ext_idx'),
+            models.Index(fields=['directorio', 'nombre'], name='mediafile_dir_nombre_idx'),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+class UploadSession(models.Model):
+    """
+    Upload por partes (reanudable) de un archivo grande (ver core.uploads).
+
+    El archivo se crea con su tamaño final en ``ruta`` (sources/) y cada parte se
+    escribe directo en su offset; al confirmar (commit) se crea el asset con ese
+    mismo archivo y el mismo id que la sesión.
+    """
+    TIPO_CHOICES = [
+        ('broadcast', 'Broadcast'),
+        ('audio', 'Audio'),
+        ('image', 'Imagen'),
+        ('storage', 'Storage'),
+    ]
+    ESTADO_CHOICES = [
+        ('ABIERTA', 'Abierta'),
+        ('COMPLETADA', 'Completada'),
+        ('CANCELADA', 'Cancelada'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    nombre_original = models.CharField(max_length=512)
+    tamano = models.BigIntegerField(help_text="Tamaño total del archivo en bytes")
+    chunk_size = models.PositiveIntegerField(help_text="Tamaño de cada parte (la última puede ser menor)")
+    ruta = models.CharField(max_length=512, help_text="Ruta relativa a MEDIA_ROOT donde se escriben las partes")
+    datos = models.JSONField(default=dict, blank=True, help_text="Campos del asset a crear (repositorio, directorio, pizarra...)")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='ABIERTA')
+    sha256 = models.CharField(max_length=64, blank=True, default='', help_text="sha256 de la lista de sha256 de las partes (en orden)")
+    creado_por = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='upload_sessions')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sesión de upload"
+        verbose_name_plural = "Sesiones de upload"
+        indexes = [
+            models.Index(fields=['tipo', 'nombre_original', 'estado'], name='upload_session_nombre_idx'),
+            models.Index(fields=['estado', 'fecha_actualizacion'], name='upload_session_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre_original} ({self.estado})"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.tamano // self.chunk_size))
+
+    def chunk_range(self, indice):
+        """(offset, tamaño esperado) de la parte ``indice``."""
+        offset = indice * self.chunk_size
+        return offset, max(0, min(self.chunk_size, self.tamano - offset))
+
+
+class UploadChunk(models.Model):
+    """Parte recibida de una UploadSession (se reescribe si el cliente la reenvía)."""
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    indice = models.PositiveIntegerField()
+    tamano = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    fecha_recepcion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['indice']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'indice'], name='upload_chunk_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.session_id} #{self.indice}"
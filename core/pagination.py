@@ -0,0 +1,278 @@
+"""
+Paginación por cursor (keyset) para los listados de assets.
+
+El orden es estable sobre ``(fecha_subida, id)`` o sobre los campos pedidos en
+``ordering`` más ``id`` como desempate: cada página filtra con
+``WHERE (campos, id) < (último visto)`` y lee ``page_size + 1`` filas usando el
+índice correspondiente, así que el costo de pedir la página 1 o la 400 es el
+mismo (no hay OFFSET). El total (``count``) es opcional porque un COUNT(*)
+sobre todo el archivo sí crece con el tamaño de la tabla.
+
+Parámetros:
+  - cursor: token opaco devuelto en ``next`` / ``previous``
+  - page_size: tamaño de página (default ASSET_PAGE_SIZE, máximo ASSET_MAX_PAGE_SIZE)
+  - count=1: incluir el total de registros que cumplen los filtros
+  - ordering: ``-fecha_subida`` (default) o cualquier combinación de los
+    ``ordering_fields`` de la vista (``nombre_original``, ``-file_size,nombre_original``...)
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginador keyset sobre (campos de ``ordering``..., ``id``); por default (``ordering_field``, ``id``)."""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+    ordering_field = 'fecha_subida'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'ASSET_PAGE_SIZE', 100)
+        maximum = getattr(settings, 'ASSET_MAX_PAGE_SIZE', 1000)
+        raw = request.query_params.get(self.page_size_query_param)
+        if not raw:
+            return default
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({self.page_size_query_param: 'Debe ser un número entero'})
+        return max(1, min(size, maximum))
+
+    def is_requested(self, request):
+        """En modo legacy solo se pagina si el cliente lo pide explícitamente."""
+        if not getattr(settings, 'ASSET_PAGINATION_LEGACY', True):
+            return True
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    # ------------------------------------------------------------
+    # Orden: campos de ``ordering`` permitidos por la vista + pk como desempate
+    # ------------------------------------------------------------
+    def get_ordering(self, request, view=None):
+        """Lista de (campo, descendente). Los campos no permitidos se ignoran, igual que OrderingFilter."""
+        allowed = set(getattr(view, 'ordering_fields', None) or [self.ordering_field])
+        keys = []
+        for term in request.query_params.get(self.ordering_query_param, '').split(','):
+            term = term.strip()
+            name = term.lstrip('-')
+            if name in allowed and name not in ('id', 'pk') and name not in (k for k, _ in keys):
+                keys.append((name, term.startswith('-')))
+        return keys or [(self.ordering_field, True)]
+
+    def _order_by(self, keys, desc_pk):
+        # NULL se trata como el valor más grande (como Postgres): al final en ASC, al inicio en DESC
+        order = [F(name).desc(nulls_first=True) if desc else F(name).asc(nulls_last=True) for name, desc in keys]
+        return order + ['-pk' if desc_pk else 'pk']
+
+    @staticmethod
+    def _after(name, desc, value):
+        """Q de las filas que van después de ``value`` en la columna ``name`` (None = nada)."""
+        if value is None:
+            return Q(**{f'{name}__isnull': False}) if desc else None
+        if desc:
+            return Q(**{f'{name}__lt': value})
+        return Q(**{f'{name}__gt': value}) | Q(**{f'{name}__isnull': True})
+
+    def _keyset_filter(self, keys, values, desc_pk, pk):
+        """(k1, ..., kn, pk) > (v1, ..., vn, id) lexicográfico respetando la dirección de cada campo."""
+        condition = Q()
+        equal = Q()
+        for (name, desc), value in zip(keys, values):
+            after = self._after(name, desc, value)
+            if after is not None:
+                condition |= equal & after
+            equal &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+        return condition | (equal & Q(**{'pk__lt' if desc_pk else 'pk__gt': pk}))
+
+    # ------------------------------------------------------------
+    # Cursor: base64(json) con los últimos valores vistos y la dirección
+    # ------------------------------------------------------------
+    def encode_cursor(self, obj, reverse):
+        values = []
+        for name, _ in self.keys:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = {'v': values, 'id': str(obj.pk), 'r': int(reverse)}
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii'))
+        return replace_query_param(self.base_url, self.cursor_query_param, token.decode('ascii'))
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('ascii'))
+            raw = payload['v']
+            # Cursores anteriores: un solo valor (fecha_subida)
+            if not isinstance(raw, list):
+                raw = [raw]
+            if len(raw) != len(self.keys):
+                raise ValueError
+            values = []
+            for (name, _), value in zip(self.keys, raw):
+                if value is not None:
+                    value = model._meta.get_field(name).to_python(value)
+                    if value is None:
+                        raise ValueError
+                values.append(value)
+            return values, payload['id'], bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, DjangoValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_ordering(request, view)
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor[2] if cursor else False
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true', 'True'):
+            self.count = queryset.count()
+
+        # Al ir hacia atrás (previous) se recorre en orden inverso y luego se voltea la página
+        keys = [(name, desc != reverse) for name, desc in self.keys]
+        desc_pk = self.keys[-1][1] != reverse
+        queryset = queryset.order_by(*self._order_by(keys, desc_pk))
+
+        if cursor:
+            values, pk, _ = cursor
+            queryset = queryset.filter(self._keyset_filter(keys, values, desc_pk, pk))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_url = self.previous_url = None
+        if rows:
+            if reverse:
+                # Veníamos de una página posterior: siempre hay "next"; "previous" si sobraron filas
+                self.next_url = self.encode_cursor(rows[-1], reverse=False)
+                if has_more:
+                    self.previous_url = self.encode_cursor(rows[0], reverse=True)
+            else:
+                if has_more:
+                    self.next_url = self.encode_cursor(rows[-1], reverse=False)
+                if cursor:
+                    self.previous_url = self.encode_cursor(rows[0], reverse=True)
+        elif cursor and not reverse:
+            self.previous_url = remove_query_param(self.base_url, self.cursor_query_param)
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict([
+            ('next', self.next_url),
+            ('previous', self.previous_url),
+        ])
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        properties = {
+            'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            'count': {'type': 'integer'},
+            'results': schema,
+        }
+        return {'type': 'object', 'required': ['results'], 'properties': properties}
+
+
+class SincePagination(KeysetPagination):
+    """
+    Feed incremental para el log de errores (``?since=``).
+
+    Sin ``since`` en la URL el listado se comporta como antes (lista completa).
+    ``?since=`` vacío regresa las ``page_size`` filas más recientes y un token;
+    ``?since=<token>`` regresa solo las filas creadas después de ese token, de
+    la más reciente a la más antigua. Si hay más de ``page_size`` filas nuevas
+    ``has_more`` es true y el cliente debe pedir otra vez con el token devuelto
+    (o recargar todo).
+
+    Respuesta: ``{"results": [...], "since": "<token>", "has_more": false}``
+    """
+
+    since_query_param = 'since'
+    ordering_field = 'fecha_creacion'
+    invalid_cursor_message = 'Token since inválido'
+
+    def is_requested(self, request):
+        return self.since_query_param in request.query_params
+
+    def encode_token(self, value, pk):
+        payload = {'v': value.isoformat(), 'id': str(pk)}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii')).decode('ascii')
+
+    def decode_token(self, token):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('ascii'))
+            value = parse_datetime(payload['v'])
+            if value is None:
+                raise ValueError
+            return value, payload['id']
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.page_size = self.get_page_size(request)
+        token = request.query_params.get(self.since_query_param, '').strip()
+        field = self.ordering_field
+
+        if token:
+            value, pk = self.decode_token(token)
+            # Las más antiguas primero para no saltarse filas si hay más de page_size nuevas
+            queryset = queryset.filter(
+                Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+            ).order_by(field, 'pk')
+            rows = list(queryset[:self.page_size + 1])
+            self.has_more = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            newest = rows[-1] if rows else None
+            rows.reverse()
+            self.since = self.encode_token(getattr(newest, field), newest.pk) if newest else token
+        else:
+            rows = list(queryset.order_by(f'-{field}', '-pk')[:self.page_size + 1])
+            self.has_more = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            # Tabla vacía: since="" y el cliente vuelve a pedir desde el inicio
+            self.since = self.encode_token(getattr(rows[0], field), rows[0].pk) if rows else ''
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('results', data),
+            ('since', self.since),
+            ('has_more', self.has_more),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        properties = {
+            'results': schema,
+            'since': {'type': 'string'},
+            'has_more': {'type': 'boolean'},
+        }
+        return {'type': 'object', 'required': ['results', 'since'], 'properties': properties}
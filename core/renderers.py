@@ -0,0 +1,83 @@
+"""
+Renderer/parser JSON de la API con orjson.
+
+orjson serializa listados grandes varias veces más rápido que el módulo json de la
+stdlib. La salida es equivalente a la de ``rest_framework.renderers.JSONRenderer``:
+
+  - UUID, Decimal, fechas y lazy strings pasan por el encoder de DRF (``default``).
+  - U+2028/U+2029 se escapan igual que en DRF (son saltos de línea en JavaScript).
+  - NaN/Infinity se rechazan con ValueError, como DRF en modo ``strict``
+    (orjson los convertiría en ``null`` sin avisar).
+  - Única diferencia de bytes: los floats con exponente se escriben sin ``+``
+    ni ceros (``1e16`` en lugar de ``1e+16``); el valor es el mismo.
+
+Si orjson no está instalado, o el cliente pide indentación distinta de 2, se usa
+el renderer de DRF.
+"""
+import math
+
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+if orjson is not None:
+    # Datetimes al encoder de DRF (formato con 'Z' y milisegundos); llaves no-str como en json.dumps
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _check_finite(data):
+    """ValueError si hay floats no finitos (mismo error que json.dumps con allow_nan=False)."""
+    stack = [data]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        value = pop()
+        t = type(value)
+        # Atajo para las hojas comunes: recorrer 5,000 broadcasts cuesta ~30 ms
+        if t is str or t is int or t is bool or value is None:
+            continue
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                raise ValueError('Out of range float values are not JSON compliant')
+        elif isinstance(value, dict):
+            extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            extend(value)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.strict:
+            _check_finite(data)
+        options = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            ret = orjson.dumps(data, default=encoders.JSONEncoder().default, option=options)
+        except TypeError:
+            # Tipos que orjson no acepta ni con default (p. ej. enteros > 64 bits)
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: U+2028/U+2029 son válidos en JSON pero no en JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(parsers.JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,201 @@
+"""
+Búsqueda de texto indexada para broadcasts, audios, imágenes y storage.
+
+Cada asset tiene una fila en ``SearchEntry`` con su texto buscable normalizado
+(minúsculas, sin acentos). La búsqueda usa el índice del motor:
+
+  - Postgres: GIN sobre ``to_tsvector('simple', content)`` (palabras/prefijos) y
+    GIN ``gin_trgm_ops`` (subcadenas, equivalente a icontains).
+  - SQLite: tabla virtual FTS5 ``core_searchentry_fts`` con tokenizer trigram.
+
+Cada palabra del término debe aparecer (AND). La semántica es la del icontains
+anterior: "asdf" encuentra "CNT-asdfg", "mp4" encuentra "spot.mp4" y
+"2024-03-01" encuentra los assets subidos ese día.
+"""
+import logging
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PARAM = 'search'
+# Límite de texto indexado por asset (la metadata EXIF de imágenes puede ser muy grande)
+MAX_CONTENT_LENGTH = 4000
+# Claves de pizarra que siempre se indexan (aunque no sean texto)
+PIZARRA_FIELDS = ('producto', 'version', 'cliente', 'agencia', 'duracion', 'fecha', 'vtype')
+FTS_TABLE = 'core_searchentry_fts'
+# El tokenizer trigram de FTS5 necesita al menos 3 caracteres por término
+TRIGRAM_MIN = 3
+
+
+def normalize(text):
+    """Minúsculas y sin acentos/diacríticos ("Canción" -> "cancion")."""
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def _scalar_values(data):
+    if not isinstance(data, dict):
+        return []
+    return [str(v) for v in data.values() if isinstance(v, (str, int, float)) and str(v).strip()]
+
+
+def build_content(asset_type, obj):
+    """Texto buscable de un asset según su tipo."""
+    parts = [obj.nombre_original or '']
+    if asset_type == 'broadcast':
+        pizarra = obj.pizarra if isinstance(obj.pizarra, dict) else {}
+        parts.append(obj.id_content or '')
+        parts.extend(str(pizarra.get(k) or '') for k in PIZARRA_FIELDS)
+        parts.extend(v for k, v in pizarra.items() if k not in PIZARRA_FIELDS and isinstance(v, str))
+    elif asset_type == 'audio':
+        parts.append(obj.id_content or '')
+        parts.extend(_scalar_values(obj.metadata))
+    elif asset_type == 'image':
+        parts.append(obj.tipo_archivo or '')
+        parts.extend(_scalar_values(obj.metadata))
+    elif asset_type == 'storage':
+        parts.append(obj.tipo_archivo or '')
+    if getattr(obj, 'fecha_subida', None):
+        parts.append(obj.fecha_subida.date().isoformat())
+    content = ' '.join(p.strip() for p in parts if p and p.strip())
+    return normalize(content)[:MAX_CONTENT_LENGTH]
+
+
+def asset_type_for(model):
+    from .models import Broadcast, Audio, ImageAsset, StorageAsset
+    return {
+        Broadcast: 'broadcast',
+        Audio: 'audio',
+        ImageAsset: 'image',
+        StorageAsset: 'storage',
+    }.get(model)
+
+
+def index_asset(obj, asset_type=None):
+    """Crea o actualiza la entrada de búsqueda del asset."""
+    from .models import SearchEntry
+    asset_type = asset_type or asset_type_for(type(obj))
+    SearchEntry.objects.update_or_create(
+        asset_type=asset_type,
+        asset_id=obj.pk,
+        defaults={'repositorio_id': obj.repositorio_id, 'content': build_content(asset_type, obj)},
+    )
+
+
+def unindex_asset(obj, asset_type=None):
+    from .models import SearchEntry
+    asset_type = asset_type or asset_type_for(type(obj))
+    SearchEntry.objects.filter(asset_type=asset_type, asset_id=obj.pk).delete()
+
+
+def rebuild_index(model, batch_size=500):
+    """Reconstruye las entradas de un modelo completo. Regresa el número de assets indexados."""
+    from .models import SearchEntry
+    asset_type = asset_type_for(model)
+    SearchEntry.objects.filter(asset_type=asset_type).delete()
+    batch = []
+    total = 0
+    for obj in model.objects.order_by().iterator(chunk_size=batch_size):
+        batch.append(SearchEntry(
+            asset_type=asset_type,
+            asset_id=obj.pk,
+            repositorio_id=obj.repositorio_id,
+            content=build_content(asset_type, obj),
+        ))
+        if len(batch) >= batch_size:
+            SearchEntry.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        SearchEntry.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+# ------------------------------------------------------------
+# Consulta
+# ------------------------------------------------------------
+_sqlite_fts = None
+
+
+def _sqlite_fts_available():
+    global _sqlite_fts
+    if _sqlite_fts is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            _sqlite_fts = cursor.fetchone() is not None
+    return _sqlite_fts
+
+
+def split_terms(term):
+    return [t for t in normalize(term).split() if t][:10]
+
+
+def search_entries(asset_type, term):
+    """QuerySet de SearchEntry que contienen todas las palabras de ``term``."""
+    from .models import SearchEntry
+    qs = SearchEntry.objects.filter(asset_type=asset_type)
+    terms = split_terms(term)
+    if not terms:
+        return qs
+
+    if connection.vendor == 'postgresql':
+        for i, t in enumerate(terms):
+            words = re.findall(r'\w+', t)
+            cond = Q(content__contains=t)
+            if words:
+                # Prefijos de palabra vía GIN tsvector; subcadenas vía GIN trigram
+                tsquery = ' & '.join(f'{w}:*' for w in words)
+                alias = f'_fts{i}'
+                qs = qs.alias(**{alias: RawSQL(
+                    "to_tsvector('simple', content) @@ to_tsquery('simple', %s)", [tsquery],
+                    output_field=BooleanField(),
+                )})
+                cond = Q(**{alias: True}) | cond
+            qs = qs.filter(cond)
+        return qs
+
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        long_terms = [t for t in terms if len(t) >= TRIGRAM_MIN]
+        if long_terms:
+            match = ' AND '.join('"{}"'.format(t.replace('"', '""')) for t in long_terms)
+            qs = qs.filter(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+        for t in terms:
+            if len(t) < TRIGRAM_MIN:
+                qs = qs.filter(content__contains=t)
+        return qs
+
+    for t in terms:
+        qs = qs.filter(content__contains=t)
+    return qs
+
+
+class IndexedSearchFilter(BaseFilterBackend):
+    """
+    Filtro ``?search=`` que resuelve contra el índice SearchEntry en lugar de
+    hacer icontains sobre columnas/JSON. La vista define ``search_asset_type``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(SEARCH_PARAM, '').strip()
+        if not term:
+            return queryset
+        asset_type = getattr(view, 'search_asset_type', None) or asset_type_for(queryset.model)
+        if not asset_type:
+            return queryset
+        return queryset.filter(pk__in=search_entries(asset_type, term).values('asset_id'))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': SEARCH_PARAM,
+            'required': False,
+            'in': 'query',
+            'description': 'Texto a buscar (nombre, folio, pizarra/metadata, fecha YYYY-MM-DD)',
+            'schema': {'type': 'string'},
+        }]
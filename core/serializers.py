@@ -1,7 +1,11 @@
 import json
 import os
 from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from rest_framework import serializers
+from .duplicates import find_existing, reserve_name, release_name
+from .upload_handlers import record_upload
 from .models import Repositorio, Agencia, Broadcast, Audio, CustomUser, SharedLink, Directorio, RepositorioPermiso, Modulo, Perfil, SistemaInformacion, ImageAsset, StorageAsset, ProcessingError, EncodingPreset
 
 class PerfilSerializer(serializers.ModelSerializer):
@@ -139,45 +143,165 @@ class DirectorioSerializer(serializers.ModelSerializer):
         """
         Return total content contained in this directory including all nested subdirectories.
         Counts broadcasts for broadcast modules, audios for audio modules, or images/storage for those types.
-        Falls back to direct count if no children.
+        Uses the ``content_count`` annotation when the queryset provides it (see DirectorioQuerySet.with_content_count).
         """
-        # Collect all descendant directory IDs (BFS traversal)
-        try:
-            from .models import Directorio, Broadcast, Audio, ImageAsset, StorageAsset
-            ids = [obj.id]
-            queue = [obj.id]
-            while queue:
-                children = list(
-                    Directorio.objects.filter(parent__in=queue).values_list('id', flat=True)
-                )
-                queue = children
-                ids.extend(children)
-
-            # Count based on module type
-            if obj.modulo and obj.modulo.tipo == 'audio':
-                # Count audios for audio modules
-                return Audio.objects.filter(directorio_id__in=ids).count()
-            elif obj.modulo and obj.modulo.tipo == 'images':
-                # Count images for image modules
-                return ImageAsset.objects.filter(directorio_id__in=ids).count()
-            elif obj.modulo and obj.modulo.tipo == 'storage':
-                # Count storage files for storage modules
-                return StorageAsset.objects.filter(directorio_id__in=ids).count()
-            else:
-                # Default to broadcasts (reel/broadcast modules)
-                return Broadcast.objects.filter(directorio_id__in=ids).count()
-        except Exception:
-            # Safe fallback to direct related count
-            if hasattr(obj, 'audios'):
-                return obj.audios.count()
-            return obj.broadcasts.count()
+        if hasattr(obj, 'content_count'):
+            return obj.content_count
+        return Directorio.objects.filter(pk=obj.pk).with_content_count().values_list('content_count', flat=True).first() or 0
+
+    def validate(self, attrs):
+        """Un directorio no puede moverse dentro de sí mismo ni de uno de sus subdirectorios."""
+        parent = attrs.get('parent')
+        instance = getattr(self, 'instance', None)
+        if instance is not None and parent is not None and instance.path:
+            if parent.pk == instance.pk or parent.path.startswith(instance.path):
+                raise serializers.ValidationError({
+                    'parent': 'Un directorio no puede moverse dentro de sí mismo o de un subdirectorio.'
+                })
+        return attrs
 
 class AgenciaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Agencia
         fields = '__all__'
 
-class BroadcastSerializer(serializers.ModelSerializer):
+class UniqueUploadNameMixin:
+    """
+    No se permiten dos assets del mismo tipo con el mismo nombre de archivo.
+    ``check_upload_name`` reserva el nombre (candado en cache) y luego busca por el
+    índice de nombre_original; la reserva se libera al confirmar el guardado.
+    Desde ``validate()`` se usa ``validate_upload_name``: solo consulta la base y el
+    candado se toma en ``save()``, así un error entre is_valid() y save() no deja el
+    nombre bloqueado hasta que expire UPLOAD_NAME_LOCK_TIMEOUT.
+    """
+    _reserved_upload_name = None
+    _pending_upload_name = None
+
+    def check_upload_name(self, nombre, etiqueta='un archivo'):
+        model = self.Meta.model
+        if not reserve_name(model, nombre):
+            raise serializers.ValidationError({
+                'archivo_original': f'Ya se está subiendo {etiqueta} con el nombre "{nombre}". No se permiten duplicados.'
+            })
+        self._reserved_upload_name = nombre
+        try:
+            self._check_existing(nombre, etiqueta)
+        except serializers.ValidationError:
+            self.release_upload_name()
+            raise
+
+    def validate_upload_name(self, nombre, etiqueta='un archivo'):
+        self._check_existing(nombre, etiqueta)
+        self._pending_upload_name = (nombre, etiqueta)
+
+    def _check_existing(self, nombre, etiqueta):
+        instance = getattr(self, 'instance', None)
+        existing = find_existing(self.Meta.model, nombre, exclude_pk=instance.pk if instance is not None else None)
+        if existing:
+            raise serializers.ValidationError({
+                'archivo_original': f'Ya existe {etiqueta} con el nombre "{nombre}" en el repositorio {existing.repositorio.nombre}. No se permiten duplicados.'
+            })
+
+    def release_upload_name(self):
+        if self._reserved_upload_name:
+            release_name(self.Meta.model, self._reserved_upload_name)
+            self._reserved_upload_name = None
+
+    def save(self, **kwargs):
+        try:
+            if self._pending_upload_name:
+                # Validado en validate(): reservar y volver a verificar justo antes de insertar
+                self.check_upload_name(*self._pending_upload_name)
+                self._pending_upload_name = None
+            instance = super().save(**kwargs)
+        except Exception:
+            self.release_upload_name()
+            raise
+        if self._reserved_upload_name:
+            transaction.on_commit(self.release_upload_name)
+        return instance
+
+
+class UploadInventoryMixin:
+    """
+    Registra en el inventario (MediaFile) el archivo recién subido al guardar, con el
+    sha256 que calculó MediaRootUploadHandler mientras lo recibía (si lo hay).
+    """
+
+    def save(self, **kwargs):
+        instance = super().save(**kwargs)
+        uploaded = self.validated_data.get('archivo_original')
+        if isinstance(uploaded, UploadedFile) and instance.archivo_original:
+            relpath, sha256 = instance.archivo_original.name, getattr(uploaded, 'sha256', None) or ''
+            transaction.on_commit(lambda: record_upload(relpath, sha256))
+        return instance
+
+
+class SparseFieldsetMixin:
+    """
+    Campos a elegir en lecturas (GET):
+      ?fields=id,nombre_original   -> solo esos campos
+      ?omit=encoded_files,pizarra  -> todos menos esos
+      ?view=compact                -> ``Meta.compact_fields`` (vistas de grid)
+    ``projection()`` traduce la selección a columnas para .only()/select_related,
+    usando el ``source`` de cada campo y ``Meta.field_sources`` para los SerializerMethodField.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.requested_fields(self.context.get('request'))
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Nombres de campos pedidos, o None si se regresan todos."""
+        if request is None or request.method != 'GET':
+            return None
+        params = request.query_params
+        available = list(cls.Meta.fields)
+        selected = None
+        if params.get('view') == 'compact':
+            selected = list(getattr(cls.Meta, 'compact_fields', available))
+        fields = [f.strip() for f in params.get('fields', '').split(',') if f.strip()]
+        if fields:
+            selected = [f for f in available if f in fields]
+        omit = {f.strip() for f in params.get('omit', '').split(',') if f.strip()}
+        if omit:
+            selected = [f for f in (selected or available) if f not in omit]
+        if selected is None:
+            return None
+        # id siempre va: el frontend lo usa como llave de fila
+        return {'id', *selected}
+
+    @classmethod
+    def projection(cls, names):
+        """(only, select_related) para los campos ``names`` del serializer."""
+        model = cls.Meta.model
+        declared = cls._declared_fields
+        sources = getattr(cls.Meta, 'field_sources', {})
+        only, related = {'id'}, set()
+        for name in names:
+            if name in sources:
+                paths = sources[name]
+            elif name in declared and getattr(declared[name], 'source', None):
+                paths = (declared[name].source.replace('.', '__'),)
+            else:
+                paths = (name,)
+            for path in paths:
+                if '__' in path:
+                    relation = path.split('__', 1)[0]
+                    related.add(relation)
+                    only.add(relation)
+                only.add(path)
+        concrete = {f.name for f in model._meta.concrete_fields}
+        only = {p for p in only if '__' in p or p in concrete}
+        return sorted(only), sorted(related)
+
+
+class BroadcastSerializer(UploadInventoryMixin, UniqueUploadNameMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     repositorio_nombre = serializers.CharField(source='repositorio.nombre', read_only=True)
     repositorio_folio = serializers.CharField(source='repositorio.folio', read_only=True)
     repositorio_clave = serializers.CharField(source='repositorio.clave', read_only=True)
@@ -185,7 +309,7 @@ class BroadcastSerializer(serializers.ModelSerializer):
     modulo_info = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
     pizarra_thumbnail_url = serializers.SerializerMethodField()
-    file_size = serializers.SerializerMethodField()
+    file_size = serializers.IntegerField(read_only=True)
     creado_por_username = serializers.CharField(source='creado_por.username', read_only=True)
     status_display = serializers.SerializerMethodField()
     last_error = serializers.CharField(read_only=True)
@@ -220,6 +344,17 @@ class BroadcastSerializer(serializers.ModelSerializer):
             'status_display',
             'last_error'
         ]
+        # Vista de grid (?view=compact): sin encoded_files, pizarra ni last_error
+        compact_fields = [
+            'id', 'repositorio', 'directorio', 'nombre_original', 'file_size',
+            'estado_transcodificacion', 'thumbnail_url', 'fecha_subida', 'ruta_h264',
+        ]
+        field_sources = {
+            'modulo_info': ('modulo__nombre', 'modulo__tipo'),
+            'thumbnail_url': ('thumbnail',),
+            'pizarra_thumbnail_url': ('pizarra_thumbnail',),
+            'status_display': ('estado_transcodificacion',),
+        }
     
     def get_modulo_info(self, obj):
         """Retorna info del módulo si existe"""
@@ -231,15 +366,6 @@ class BroadcastSerializer(serializers.ModelSerializer):
             }
         return None
     
-    def get_file_size(self, obj):
-        """Retorna el tamaño del archivo original en bytes"""
-        if obj.archivo_original:
-            try:
-                return obj.archivo_original.size
-            except (OSError, AttributeError):
-                return None
-        return None
-
     def get_status_display(self, obj):
         # Map to human-friendly status for CSV "Status"
         mapping = {
@@ -290,12 +416,11 @@ class BroadcastSerializer(serializers.ModelSerializer):
         if archivo and hasattr(archivo, 'name'):
             nombre_archivo = archivo.name
             # Buscar si ya existe un broadcast con este nombre (sin importar repositorio/directorio)
-            existing = Broadcast.objects.filter(nombre_original=nombre_archivo).first()
-            if existing:
-                raise serializers.ValidationError({
-                    'archivo_original': f'Ya existe un archivo con el nombre "{nombre_archivo}" en el repositorio {existing.repositorio.nombre}. No se permiten duplicados.'
-                })
+            self.check_upload_name(nombre_archivo)
             validated_data['nombre_original'] = nombre_archivo
+            # Tamaño del upload (evita stat() del archivo en listados/exportaciones)
+            validated_data['file_size'] = archivo.size
+            validated_data['archivo_presente'] = True
         
         # Parseamos el string JSON de la pizarra a un diccionario de Python
         pizarra_str = validated_data.pop('pizarra', '{}')
@@ -337,11 +462,11 @@ class BroadcastSerializer(serializers.ModelSerializer):
         """
         representation = super().to_representation(instance)
         # Pizarra is already a dict in the model, no parsing needed
-        if hasattr(instance, 'pizarra') and instance.pizarra:
+        if 'pizarra' in representation and instance.pizarra:
             representation['pizarra'] = instance.pizarra
         return representation
 
-class AudioSerializer(serializers.ModelSerializer):
+class AudioSerializer(UploadInventoryMixin, UniqueUploadNameMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para archivos de audio, similar a BroadcastSerializer"""
     repositorio_nombre = serializers.CharField(source='repositorio.nombre', read_only=True)
     repositorio_folio = serializers.CharField(source='repositorio.folio', read_only=True)
@@ -350,7 +475,7 @@ class AudioSerializer(serializers.ModelSerializer):
     modulo_info = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
     pizarra_thumbnail_url = serializers.SerializerMethodField()
-    file_size = serializers.SerializerMethodField()
+    file_size = serializers.IntegerField(read_only=True)
     creado_por_username = serializers.CharField(source='creado_por.username', read_only=True)
     status_display = serializers.SerializerMethodField()
     
@@ -381,6 +506,16 @@ class AudioSerializer(serializers.ModelSerializer):
             'creado_por_username',
             'status_display'
         ]
+        compact_fields = [
+            'id', 'repositorio', 'directorio', 'nombre_original', 'file_size',
+            'estado_procesamiento', 'thumbnail_url', 'fecha_subida', 'ruta_mp3',
+        ]
+        field_sources = {
+            'modulo_info': ('modulo__nombre', 'modulo__tipo'),
+            'thumbnail_url': ('thumbnail',),
+            'pizarra_thumbnail_url': ('pizarra_thumbnail',),
+            'status_display': ('estado_procesamiento',),
+        }
     
     def get_modulo_info(self, obj):
         """Retorna info del módulo si existe"""
@@ -392,15 +527,6 @@ class AudioSerializer(serializers.ModelSerializer):
             }
         return None
     
-    def get_file_size(self, obj):
-        """Retorna el tamaño del archivo original en bytes"""
-        if obj.archivo_original:
-            try:
-                return obj.archivo_original.size
-            except (OSError, AttributeError):
-                return None
-        return None
-
     def get_status_display(self, obj):
         mapping = {
             'PENDIENTE': 'Pending',
@@ -446,12 +572,9 @@ class AudioSerializer(serializers.ModelSerializer):
         if archivo and hasattr(archivo, 'name'):
             nombre_archivo = archivo.name
             # Buscar si ya existe un audio con este nombre
-            existing = Audio.objects.filter(nombre_original=nombre_archivo).first()
-            if existing:
-                raise serializers.ValidationError({
-                    'archivo_original': f'Ya existe un archivo de audio con el nombre "{nombre_archivo}" en el repositorio {existing.repositorio.nombre}. No se permiten duplicados.'
-                })
+            self.check_upload_name(nombre_archivo, 'un archivo de audio')
             validated_data['nombre_original'] = nombre_archivo
+            validated_data['file_size'] = archivo.size
         
         # Parseamos metadata si viene como string
         metadata_str = validated_data.pop('metadata', '{}')
@@ -488,7 +611,7 @@ class AudioSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """Override to ensure metadata is serialized correctly"""
         representation = super().to_representation(instance)
-        if hasattr(instance, 'metadata') and instance.metadata:
+        if 'metadata' in representation and instance.metadata:
             representation['metadata'] = instance.metadata
         return representation
 
@@ -597,7 +720,8 @@ class UserSerializer(serializers.ModelSerializer):
         return 'cliente'
     
     def get_permisos_repositorios(self, obj):
-        permisos = RepositorioPermiso.objects.filter(usuario=obj).select_related('repositorio')
+        # UserViewSet hace prefetch de permisos_repositorio + repositorio
+        permisos = obj.permisos_repositorio.all()
         return [{
             'id': p.id,
             'repositorio_id': p.repositorio.id,
@@ -654,13 +778,13 @@ class SistemaInformacionSerializer(serializers.ModelSerializer):
         fields = ['id', 'version', 'release_date', 'updates', 'fecha_creacion', 'is_current']
         read_only_fields = ['fecha_creacion']
 
-class ImageAssetSerializer(serializers.ModelSerializer):
+class ImageAssetSerializer(UploadInventoryMixin, UniqueUploadNameMixin, serializers.ModelSerializer):
     repositorio_nombre = serializers.CharField(source='repositorio.nombre', read_only=True)
     directorio_nombre = serializers.CharField(source='directorio.nombre', read_only=True, allow_null=True)
     creado_por_username = serializers.CharField(source='creado_por.username', read_only=True, allow_null=True)
     thumbnail_url = serializers.SerializerMethodField()
     imagen_web_url = serializers.SerializerMethodField()
-    file_size = serializers.SerializerMethodField()
+    file_size = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = ImageAsset
@@ -701,16 +825,6 @@ class ImageAssetSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.imagen_web.url)
         return None
     
-    def get_file_size(self, obj):
-        """Retorna el tamaño del archivo original en bytes"""
-        try:
-            if obj.archivo_original and hasattr(obj.archivo_original, 'size'):
-                return obj.archivo_original.size
-        except (FileNotFoundError, OSError):
-            # Archivo no existe en el storage, retornar 0
-            pass
-        return 0
-    
     def validate(self, attrs):
         """Prevenir duplicados por nombre de archivo en todo el sistema."""
         archivo = attrs.get('archivo_original')
@@ -719,29 +833,19 @@ class ImageAssetSerializer(serializers.ModelSerializer):
             nombre_archivo = archivo.name
             
             # Buscar si ya existe una imagen con este nombre en cualquier parte del sistema
-            from .models import ImageAsset
-            existing = ImageAsset.objects.filter(nombre_original=nombre_archivo).first()
-            
-            # Excluir el propio registro en caso de actualización
-            if getattr(self, 'instance', None) is not None:
-                existing = ImageAsset.objects.filter(
-                    nombre_original=nombre_archivo
-                ).exclude(pk=self.instance.pk).first()
-            
-            if existing:
-                raise serializers.ValidationError({
-                    'archivo_original': f'Ya existe una imagen con el nombre "{nombre_archivo}" en el repositorio {existing.repositorio.nombre}. No se permiten duplicados.'
-                })
+            # (excluye el propio registro en caso de actualización)
+            self.validate_upload_name(nombre_archivo, 'una imagen')
             
             # Guardar nombre original y tipo de archivo
             attrs['nombre_original'] = nombre_archivo
+            attrs['file_size'] = archivo.size
             _, ext = os.path.splitext(nombre_archivo)
             if ext:
                 attrs['tipo_archivo'] = ext.lower()
         
         return attrs
 
-class StorageAssetSerializer(serializers.ModelSerializer):
+class StorageAssetSerializer(UploadInventoryMixin, UniqueUploadNameMixin, serializers.ModelSerializer):
     repositorio_nombre = serializers.CharField(source='repositorio.nombre', read_only=True)
     directorio_nombre = serializers.CharField(source='directorio.nombre', read_only=True, allow_null=True)
     creado_por_username = serializers.CharField(source='creado_por.username', read_only=True, allow_null=True)
@@ -781,19 +885,8 @@ class StorageAssetSerializer(serializers.ModelSerializer):
             nombre_archivo = uploaded.name
             
             # Buscar si ya existe un archivo storage con este nombre en cualquier parte del sistema
-            from .models import StorageAsset
-            existing = StorageAsset.objects.filter(nombre_original=nombre_archivo).first()
-            
-            # Excluir el propio registro en caso de actualización
-            if getattr(self, 'instance', None) is not None:
-                existing = StorageAsset.objects.filter(
-                    nombre_original=nombre_archivo
-                ).exclude(pk=self.instance.pk).first()
-            
-            if existing:
-                raise serializers.ValidationError({
-                    'archivo_original': f'Ya existe un archivo con el nombre "{nombre_archivo}" en el repositorio {existing.repositorio.nombre}. No se permiten duplicados.'
-                })
+            # (excluye el propio registro en caso de actualización)
+            self.validate_upload_name(nombre_archivo)
             
             # Guardar nombre original
             attrs['nombre_original'] = nombre_archivo
@@ -812,16 +905,23 @@ class StorageAssetSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.thumbnail.url)
         return None
 
+    def get_archivo_url(self, obj):
+        if obj.archivo_original:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.archivo_original.url)
+        return None
+
 
 class ProcessingErrorSerializer(serializers.ModelSerializer):
     repositorio_nombre = serializers.CharField(source='repositorio.nombre', read_only=True)
     modulo_tipo = serializers.CharField(source='modulo.tipo', read_only=True)
     directorio_nombre = serializers.CharField(source='directorio.nombre', read_only=True)
-    broadcast_id = serializers.UUIDField(source='broadcast.id', read_only=True)
-    audio_id = serializers.UUIDField(source='audio.id', read_only=True)
-    imagen_id = serializers.UUIDField(source='imagen.id', read_only=True)
-    storage_file_id = serializers.UUIDField(source='storage_file.id', read_only=True)
-    short_error = serializers.CharField(source='short_error', read_only=True)
+    broadcast_id = serializers.UUIDField(read_only=True)
+    audio_id = serializers.UUIDField(read_only=True)
+    imagen_id = serializers.UUIDField(read_only=True)
+    storage_file_id = serializers.UUIDField(read_only=True)
+    short_error = serializers.CharField(read_only=True)
 
     class Meta:
         model = ProcessingError
@@ -831,13 +931,7 @@ class ProcessingErrorSerializer(serializers.ModelSerializer):
             'stage', 'file_name', 'error_message', 'short_error', 'extra', 'resolved', 'fecha_creacion'
         ]
         read_only_fields = ['fecha_creacion']
-    
-    def get_archivo_url(self, obj):
-        if obj.archivo_original:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.archivo_original.url)
-        return None
+
 
 
 class EncodingPresetSerializer(serializers.ModelSerializer):
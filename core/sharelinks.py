@@ -0,0 +1,211 @@
+"""
+Links compartidos públicos (``GET/POST /api/shared/<id>/``) sin escrituras por visita.
+
+  - Lookup: el ``SharedLink`` (con su broadcast/imagen y repositorio) se guarda en
+    cache junto con la versión ``ASSETS`` del repositorio (core.versioning). Editar
+    el link lo borra (señal) y cualquier cambio de assets del repositorio cambia la
+    versión, así que un proxy o thumbnail nuevo se ve sin esperar al timeout.
+  - Analytics: vistas y reproducciones se acumulan con ``cache.incr`` (INCR atómico
+    en Redis) y ``flush()`` (tarea periódica) las pasa a la base de datos con
+    ``F('vistas') + n``. Si el cache no responde se hace el UPDATE con F() directo,
+    así que nunca se pierden incrementos concurrentes. Con Redis cada visita agrega
+    el link a un SET (``DIRTY_KEY``) y el flush solo revisa esos links (SPOP); con
+    otros backends de cache revisa todos.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('vistas', 'reproducciones')
+LINK_KEY = 'sharelink:{}'
+COUNTER_KEY = 'sharelink:{}:{}'
+LAST_VISIT_KEY = 'sharelink:{}:ultima_visita'
+DIRTY_KEY = 'sharelink:dirty'
+FLUSH_BATCH = 500
+
+
+def _repositorio_id(link):
+    content = link.broadcast if link.broadcast_id else link.image
+    return content.repositorio_id if content else None
+
+
+def _assets_version(repositorio_id):
+    from .signals import ASSETS
+    from .versioning import get_version
+    return get_version(ASSETS, repositorio_id) if repositorio_id else None
+
+
+def get_link(link_id):
+    """SharedLink listo para serializar (o None si no existe), desde cache cuando se puede."""
+    from .models import SharedLink
+
+    key = LINK_KEY.format(link_id)
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.debug(f"Cache no disponible para {key}: {e}")
+        cached = None
+    if cached is not None:
+        link, version = cached
+        if version == _assets_version(_repositorio_id(link)):
+            return link
+
+    link = (
+        SharedLink.objects.select_related('broadcast__repositorio', 'image__repositorio')
+        .filter(pk=link_id)
+        .first()
+    )
+    if link is None:
+        return None
+    try:
+        cache.set(key, (link, _assets_version(_repositorio_id(link))), getattr(settings, 'SHARED_LINK_CACHE_TIMEOUT', 300))
+    except Exception as e:
+        logger.debug(f"No se pudo cachear {key}: {e}")
+    return link
+
+
+def invalidate(link_id, counters=False):
+    """Borra el link cacheado (y sus contadores pendientes si el link se eliminó)."""
+    keys = [LINK_KEY.format(link_id)]
+    if counters:
+        keys += [COUNTER_KEY.format(link_id, field) for field in COUNTERS] + [LAST_VISIT_KEY.format(link_id)]
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo invalidar el link compartido {link_id}: {e}")
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # La llave no existe: add() es atómico, si otro proceso la creó primero se reintenta incr()
+        if cache.add(key, delta, None):
+            return delta
+        return cache.incr(key, delta)
+
+
+def _dirty_set():
+    """(cliente Redis, llave) del SET de links con contadores pendientes, o (None, None) si el cache no es Redis."""
+    from django.core.cache import caches
+    from django.core.cache.backends.redis import RedisCache
+
+    backend = caches['default']
+    if not isinstance(backend, RedisCache):
+        return None, None
+    key = backend.make_and_validate_key(DIRTY_KEY)
+    return backend._cache.get_client(key, write=True), key
+
+
+def record(link_id, field):
+    """Suma 1 a ``field`` ('vistas' o 'reproducciones') del link."""
+    from .models import SharedLink
+
+    now = datetime.now(dt_timezone.utc)
+    try:
+        # Marcar antes de incrementar: un contador en cache siempre tiene su link en el SET
+        client, dirty_key = _dirty_set()
+        if client is not None:
+            client.sadd(dirty_key, str(link_id))
+        # La fecha va antes que el contador: si flush() lee la visita también lee su fecha (o una posterior)
+        if field == 'vistas':
+            cache.set(LAST_VISIT_KEY.format(link_id), now.timestamp(), None)
+        _incr(COUNTER_KEY.format(link_id, field))
+        return
+    except Exception as e:
+        logger.warning(f"⚠️ Contador de {link_id} sin cache, escribiendo directo: {e}")
+    updates = {field: F(field) + 1}
+    if field == 'vistas':
+        updates['ultima_visita'] = now
+    SharedLink.objects.filter(pk=link_id).update(**updates)
+
+
+def pending(link_id):
+    """Incrementos en cache aún no guardados: {'vistas': n, 'reproducciones': n}."""
+    keys = {COUNTER_KEY.format(link_id, field): field for field in COUNTERS}
+    try:
+        values = cache.get_many(list(keys))
+    except Exception:
+        return {field: 0 for field in COUNTERS}
+    return {field: int(values.get(key) or 0) for key, field in keys.items()}
+
+
+def flush():
+    """
+    Pasa los contadores acumulados a SharedLink. Cada contador se descuenta con
+    ``decr`` por lo que se leyó, así que las visitas que llegan durante el flush
+    quedan para la siguiente corrida.
+    """
+    from .models import SharedLink
+
+    flushed = links = 0
+    client, dirty_key = _dirty_set()
+    batches = _dirty_batches(client, dirty_key) if client is not None else _all_batches(SharedLink)
+    for batch in batches:
+        try:
+            n, m = _flush_batch(SharedLink, batch)
+        except Exception:
+            if client is not None:
+                # Los contadores siguen en cache: regresar los links al SET para la siguiente corrida
+                client.sadd(dirty_key, *batch)
+            raise
+        flushed, links = flushed + n, links + m
+    if flushed:
+        logger.info(f"🔗 Analytics de links compartidos: {flushed} eventos en {links} links")
+    return {'events': flushed, 'links': links}
+
+
+def _dirty_batches(client, dirty_key):
+    while True:
+        # SPOP es atómico: una visita que llega después vuelve a agregar el link
+        popped = client.spop(dirty_key, FLUSH_BATCH)
+        if not popped:
+            return
+        yield [v.decode() if isinstance(v, bytes) else v for v in popped]
+
+
+def _all_batches(model):
+    # Sin SET de pendientes: todos los links, no solo los activos (uno desactivado puede tener visitas)
+    batch = []
+    for link_id in model.objects.order_by().values_list('pk', flat=True).iterator(chunk_size=FLUSH_BATCH):
+        batch.append(link_id)
+        if len(batch) >= FLUSH_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _flush_batch(model, link_ids):
+    keys = [COUNTER_KEY.format(pk, field) for pk in link_ids for field in COUNTERS]
+    keys += [LAST_VISIT_KEY.format(pk) for pk in link_ids]
+    values = cache.get_many(keys)
+    if not values:
+        return 0, 0
+
+    flushed = links = 0
+    for pk in link_ids:
+        updates = {}
+        for field in COUNTERS:
+            key = COUNTER_KEY.format(pk, field)
+            n = int(values.get(key) or 0)
+            if n > 0:
+                cache.decr(key, n)
+                updates[field] = F(field) + n
+                flushed += n
+        last = values.get(LAST_VISIT_KEY.format(pk))
+        # La fecha no se borra: una visita que llega entre la lectura y un delete la perdería.
+        # Solo se escribe si hubo vistas nuevas; Greatest() nunca retrocede ultima_visita
+        if last and 'vistas' in updates:
+            visita = datetime.fromtimestamp(last, dt_timezone.utc)
+            updates['ultima_visita'] = Greatest(Coalesce('ultima_visita', visita), visita)
+        if updates:
+            model.objects.filter(pk=pk).update(**updates)
+            links += 1
+    return flushed, links
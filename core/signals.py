@@ -0,0 +1,214 @@
+"""
+Señales del módulo core: mantienen las versiones por repositorio (ver core.versioning)
+para que los ETags/caches derivados se invaliden solos, el índice de búsqueda y el
+contexto de autorización cacheado por usuario (core.authz).
+"""
+import logging
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Directorio, Broadcast, Audio, ImageAsset, StorageAsset, CustomUser, Perfil, RepositorioPermiso, Repositorio, ProcessingError, SharedLink
+from . import errorlog, events, sharelinks
+from .versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Scope del árbol de directorios (estructura + conteos por carpeta)
+DIRECTORIOS = 'directorios'
+# Scope de cualquier escritura de assets (facets, listados cacheados)
+ASSETS = 'assets'
+# Versión global de assets (consultas que no se limitan a un repositorio)
+ALL_REPOS = 'all'
+
+ASSET_MODELS = (Broadcast, Audio, ImageAsset, StorageAsset)
+# Campo de estado de procesamiento por modelo (se incluye en los eventos asset.updated)
+STATE_FIELDS = {Broadcast: 'estado_transcodificacion', Audio: 'estado_procesamiento', ImageAsset: 'estado', StorageAsset: 'estado'}
+# Actualizaciones que no se muestran en el frontend y no generan evento
+SILENT_FIELDS = {'archivo_presente'}
+
+
+def table_scope(model):
+    """Scope por tabla (listados cacheados de core.listcache): 'table:broadcast', 'table:processingerror'..."""
+    return f'table:{model._meta.model_name}'
+
+
+def _estado(instance):
+    field = STATE_FIELDS.get(type(instance))
+    return getattr(instance, field) if field else None
+
+
+def bump_tables(repositorio_id, *models, notify=True):
+    for model in models:
+        bump_version(table_scope(model), repositorio_id)
+        bump_version(table_scope(model), ALL_REPOS)
+    # Los suscriptores de /api/events/ refrescan sus listados (core.events)
+    if notify:
+        events.publish('table.changed', repositorio_id, tables=[m._meta.model_name for m in models])
+
+
+@receiver(post_save, sender=Directorio)
+@receiver(post_delete, sender=Directorio)
+def directorio_changed(sender, instance, created=False, **kwargs):
+    bump_version(DIRECTORIOS, instance.repositorio_id)
+    # Renombrar/borrar una carpeta cambia directorio_nombre en los listados de assets
+    if not created:
+        bump_tables(instance.repositorio_id, *ASSET_MODELS, ProcessingError)
+
+
+@receiver(post_save, sender=Repositorio)
+def repositorio_changed(sender, instance, created, **kwargs):
+    # repositorio_nombre / folio / clave aparecen en cada fila de los listados
+    if not created:
+        bump_tables(instance.pk, *ASSET_MODELS, ProcessingError)
+
+
+@receiver(post_save, sender=ProcessingError)
+@receiver(post_delete, sender=ProcessingError)
+def processing_error_changed(sender, instance, created=None, **kwargs):
+    if created is None and errorlog.bulk_delete_active():
+        # errorlog.compact invalida y publica table.changed una sola vez al terminar
+        return
+    bump_tables(instance.repositorio_id, ProcessingError, notify=False)
+    if created:
+        # Los conteos diarios no dependen de que el error siga guardado (core.errorlog.compact)
+        errorlog.record_rollup(instance)
+    action = 'deleted' if created is None else ('created' if created else 'updated')
+    events.publish(f'error.{action}', instance.repositorio_id, id=instance.pk, stage=instance.stage,
+                   broadcast=instance.broadcast_id)
+
+
+@receiver(post_save, sender=SharedLink)
+@receiver(post_delete, sender=SharedLink)
+def shared_link_changed(sender, instance, created=None, **kwargs):
+    # core.sharelinks cachea el link para la vista pública
+    sharelinks.invalidate(instance.pk, counters=created is None)
+
+
+def asset_saved(sender, instance, created, update_fields=None, **kwargs):
+    bump_version(ASSETS, instance.repositorio_id)
+    bump_version(ASSETS, ALL_REPOS)
+    bump_tables(instance.repositorio_id, sender, notify=False)
+    if update_fields is None or set(update_fields) - SILENT_FIELDS:
+        events.publish('asset.updated', instance.repositorio_id, asset_type=sender._meta.model_name,
+                       id=str(instance.pk), created=created, estado=_estado(instance))
+    # Los conteos del árbol solo cambian al crear o mover un asset de carpeta;
+    # las actualizaciones de estado (transcodificación, thumbnails) no los afectan
+    if created or update_fields is None or 'directorio' in update_fields:
+        bump_version(DIRECTORIOS, instance.repositorio_id)
+
+
+def asset_deleted(sender, instance, **kwargs):
+    bump_version(ASSETS, instance.repositorio_id)
+    bump_version(ASSETS, ALL_REPOS)
+    bump_tables(instance.repositorio_id, sender, notify=False)
+    events.publish('asset.deleted', instance.repositorio_id, asset_type=sender._meta.model_name, id=str(instance.pk))
+    bump_version(DIRECTORIOS, instance.repositorio_id)
+
+
+for _model in ASSET_MODELS:
+    post_save.connect(asset_saved, sender=_model, dispatch_uid=f'tree_version_save_{_model.__name__}')
+    post_delete.connect(asset_deleted, sender=_model, dispatch_uid=f'tree_version_delete_{_model.__name__}')
+
+
+# ------------------------------------------------------------
+# Índice de búsqueda (core.search / SearchEntry)
+# ------------------------------------------------------------
+SEARCH_FIELDS = {'nombre_original', 'id_content', 'pizarra', 'metadata', 'tipo_archivo', 'repositorio'}
+
+
+def search_index_saved(sender, instance, created, update_fields=None, **kwargs):
+    from .search import index_asset
+    # Las actualizaciones parciales de estado/rutas no cambian el texto indexado
+    if update_fields is not None and not (set(update_fields) & SEARCH_FIELDS):
+        return
+    try:
+        index_asset(instance)
+    except Exception as e:
+        logger.warning(f"No se pudo indexar {sender.__name__} {instance.pk}: {e}")
+
+
+def search_index_deleted(sender, instance, **kwargs):
+    from .search import unindex_asset
+    unindex_asset(instance)
+
+
+for _model in ASSET_MODELS:
+    post_save.connect(search_index_saved, sender=_model, dispatch_uid=f'search_index_save_{_model.__name__}')
+    post_delete.connect(search_index_deleted, sender=_model, dispatch_uid=f'search_index_delete_{_model.__name__}')
+
+
+# ------------------------------------------------------------
+# Diccionario de términos para autocompletado (core.terms / MetadataTerm)
+# ------------------------------------------------------------
+TERM_SOURCE_FIELDS = {'pizarra', 'repositorio', 'cliente', 'agencia', 'producto'}
+
+
+@receiver(pre_save, sender=Broadcast)
+def terms_before_save(sender, instance, update_fields=None, **kwargs):
+    from .terms import term_values
+    instance._terms_before = None
+    if update_fields is not None and not (set(update_fields) & TERM_SOURCE_FIELDS):
+        return
+    if instance._state.adding:
+        instance._terms_before = {}
+        return
+    row = Broadcast.objects.filter(pk=instance.pk).values_list('repositorio_id', 'cliente', 'agencia', 'producto').first()
+    instance._terms_before = term_values(*row) if row else {}
+
+
+@receiver(post_save, sender=Broadcast)
+def terms_after_save(sender, instance, **kwargs):
+    from .terms import apply_delta, snapshot
+    before = getattr(instance, '_terms_before', None)
+    if before is None:
+        return
+    try:
+        apply_delta(before, snapshot(instance))
+    except Exception as e:
+        logger.warning(f"No se pudo actualizar el diccionario de términos para {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=Broadcast)
+def terms_after_delete(sender, instance, **kwargs):
+    from .terms import apply_delta, snapshot
+    try:
+        apply_delta(snapshot(instance), {})
+    except Exception as e:
+        logger.warning(f"No se pudo actualizar el diccionario de términos para {instance.pk}: {e}")
+
+
+# ------------------------------------------------------------
+# Contexto de autorización por usuario (core.authz)
+# ------------------------------------------------------------
+@receiver(post_save, sender=RepositorioPermiso)
+@receiver(post_delete, sender=RepositorioPermiso)
+def authz_permiso_changed(sender, instance, **kwargs):
+    from .authz import invalidate
+    invalidate(instance.usuario_id)
+
+
+@receiver(m2m_changed, sender=RepositorioPermiso.modulos_permitidos.through)
+def authz_modulos_changed(sender, instance, action, pk_set=None, **kwargs):
+    from .authz import invalidate
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, RepositorioPermiso):
+        invalidate(instance.usuario_id)
+    elif pk_set:
+        # Cambio desde el lado de Modulo (modulo.permisos_repositorio.add(...))
+        invalidate(*RepositorioPermiso.objects.filter(pk__in=pk_set).values_list('usuario_id', flat=True))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def authz_user_changed(sender, instance, **kwargs):
+    from .authz import invalidate
+    invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Perfil)
+@receiver(pre_delete, sender=Perfil)  # antes del SET_NULL en los usuarios
+def authz_perfil_changed(sender, instance, **kwargs):
+    from .authz import invalidate
+    invalidate(*CustomUser.objects.filter(perfil_id=instance.pk).values_list('pk', flat=True))
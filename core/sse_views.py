@@ -0,0 +1,53 @@
+"""
+Stream de eventos (Server-Sent Events) para reemplazar el polling del frontend.
+
+GET /api/events/?repositorio=<id>  -> eventos de ese repositorio
+GET /api/events/                    -> eventos de todos los repositorios visibles
+
+Es una vista async de Django (no DRF): bajo ASGI (uvicorn/daphne) cada conexión
+abierta solo cuesta una suscripción de Redis; bajo WSGI se usa la versión
+síncrona que se cierra periódicamente (ver core.events.stream).
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from . import events
+from .authz import get_context
+
+
+@require_GET
+async def event_stream(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Autenticación requerida'}, status=401)
+    if not events.enabled():
+        return JsonResponse({'error': 'Canal de eventos no configurado'}, status=503)
+
+    ctx = await sync_to_async(get_context)(user)
+    repositorio = request.GET.get('repositorio', '').strip()
+    channels, patterns = [], []
+    if repositorio:
+        if not repositorio.isdigit() or not ctx.puede_ver(int(repositorio)):
+            return JsonResponse({'error': 'No tienes acceso a este repositorio'}, status=403)
+        channels = [events.channel(int(repositorio))]
+    else:
+        visibles = ctx.visible_repositorios()
+        if visibles is None:
+            patterns = [events.channel('*')]
+        else:
+            channels = [events.channel(r) for r in sorted(visibles)]
+    if not channels and not patterns:
+        # 204 hace que EventSource deje de reconectar
+        return HttpResponse(status=204)
+
+    if isinstance(request, ASGIRequest):
+        body = events.astream(channels, patterns)
+    else:
+        body = events.stream(channels, patterns)
+    response = StreamingHttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx: no bufferizar el stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
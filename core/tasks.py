@@ -164,7 +164,16 @@ def transcode_video(broadcast_id):
                     print(f"⚠️ Archivo original no existe: {input_path}")
         except Exception as _e:
             print(f"⚠️ Fallback búsqueda archivo original falló: {_e}")
-        
+
+        # Registrar el tamaño si el broadcast llegó sin él (ej. importado por CSV)
+        presente = os.path.exists(input_path)
+        if broadcast.file_size is None and presente:
+            broadcast.file_size = os.path.getsize(input_path)
+            broadcast.save(update_fields=['file_size'])
+        if broadcast.archivo_presente != presente:
+            broadcast.archivo_presente = presente
+            broadcast.save(update_fields=['archivo_presente'])
+
         # Usar solo los primeros 8 caracteres del UUID
         short_id = str(broadcast.id)[:8]
         
@@ -1190,3 +1199,143 @@ def process_image(image_id):
         return {'status': 'error', 'error': str(e)}
 
 
+@shared_task
+def scan_media_inventory(full=False, hash_files=False):
+    """Escaneo incremental del inventario de media (ver core.inventory)."""
+    from . import inventory
+    return inventory.scan(full=full, hash_files=hash_files)
+
+
+@shared_task
+def hash_media_file(relpath):
+    """sha256 de un archivo del inventario que no se pudo hashear al recibirlo (uploads por partes)."""
+    from . import inventory
+    return inventory.hash_file(relpath)
+
+
+@shared_task
+def match_source_files_task(job_id, repositorio_id, dry_run=False, rescan=False):
+    """
+    Versión en background de match_source_files. El progreso y el resultado se
+    guardan en cache (core.matching.get_job_state) para que el frontend haga polling.
+    """
+    from . import events, inventory
+    from .matching import match_sources, set_job_state
+    from .models import Repositorio
+
+    def _state(**state):
+        set_job_state(job_id, **state)
+        # Los suscriptores de /api/events/ reciben el progreso sin consultar el job
+        events.publish('job.progress', repositorio_id, job='match_source_files', job_id=job_id,
+                       **{k: v for k, v in state.items() if k != 'result'})
+
+    _state(status='PROCESANDO')
+    try:
+        repositorio = Repositorio.objects.get(id=repositorio_id)
+        inventory.ensure_scanned(['sources'])
+        if rescan:
+            inventory.scan(['sources'])
+        result = match_sources(
+            repositorio,
+            dry_run=dry_run,
+            progress=lambda processed, total: _state(processed=processed, total=total),
+        )
+        _state(status='COMPLETADO', result=result)
+        return {'status': 'success', 'matched': result['matched'], 'not_matched': result['not_matched']}
+    except Exception as e:
+        print(f"❌ Error en match_source_files job {job_id}: {e}")
+        _state(status='ERROR', error=str(e))
+        return {'status': 'error', 'error': str(e)}
+
+
+@shared_task
+def check_source_presence(batch_size=500, estados=None):
+    """
+    Guarda en ``Broadcast.archivo_presente`` si el archivo original existe en disco,
+    para que transcode_status y pending_details respondan con SQL en vez de hacer
+    stat() por fila.
+
+    Los originales dentro de MEDIA_INVENTORY_ROOTS se resuelven contra el inventario
+    (MediaFile, refrescado con un escaneo incremental) con dos UPDATE; los que quedan
+    fuera se verifican con stat() en lotes.
+
+    Args:
+        batch_size: filas por lote para los originales fuera del inventario
+        estados: limitar a estos estados de transcodificación (None = todos)
+    """
+    from django.db.models import Exists, OuterRef, Q
+    from . import inventory
+    from .models import MediaFile
+
+    qs = Broadcast.objects.exclude(archivo_original__isnull=True).exclude(archivo_original='')
+    if estados:
+        qs = qs.filter(estado_transcodificacion__in=estados)
+
+    roots = inventory.inventory_roots()
+    # Escaneo incremental antes de comparar: no todos los caminos de escritura llaman a
+    # sync_path, y un original escrito después del último escaneo se marcaría faltante.
+    # Solo se listan las carpetas cuyo mtime cambió.
+    inventory.scan(roots)
+    en_raices = Q()
+    for root in roots:
+        en_raices |= Q(archivo_original__startswith=f'{root}/')
+    inventariados = qs.filter(en_raices) if roots else qs.none()
+    inventariados = inventariados.alias(en_disco=Exists(MediaFile.objects.filter(path=OuterRef('archivo_original'))))
+    changed = inventariados.filter(en_disco=True).exclude(archivo_presente=True).update(archivo_presente=True)
+    changed += inventariados.filter(en_disco=False).exclude(archivo_presente=False).update(archivo_presente=False)
+    checked = inventariados.count()
+    missing = inventariados.filter(archivo_presente=False).count()
+
+    # Originales fuera de las carpetas inventariadas: stat() directo
+    media_root = str(settings.MEDIA_ROOT)
+
+    def _flush(to_true, to_false):
+        if to_true:
+            Broadcast.objects.filter(pk__in=to_true).update(archivo_presente=True)
+        if to_false:
+            Broadcast.objects.filter(pk__in=to_false).update(archivo_presente=False)
+
+    to_true, to_false = [], []
+    rest = qs.exclude(en_raices) if roots else qs
+    for pk, name, presente_actual in rest.order_by().values_list('pk', 'archivo_original', 'archivo_presente').iterator(chunk_size=batch_size):
+        checked += 1
+        presente = os.path.exists(os.path.join(media_root, str(name)))
+        if not presente:
+            missing += 1
+        if presente != presente_actual:
+            (to_true if presente else to_false).append(pk)
+            changed += 1
+        if len(to_true) + len(to_false) >= batch_size:
+            _flush(to_true, to_false)
+            to_true, to_false = [], []
+    _flush(to_true, to_false)
+
+    print(f"🔎 Presencia de originales: {checked} verificados, {missing} faltantes, {changed} actualizados")
+    return {'checked': checked, 'missing': missing, 'changed': changed}
+
+
+@shared_task
+def compact_processing_errors(retention_days=None, archive_days=None):
+    """Resuelve, archiva (stderr comprimido) y purga el log de errores (ver core.errorlog)."""
+    from . import errorlog
+    return errorlog.compact(retention_days=retention_days, archive_days=archive_days)
+
+
+@shared_task
+def flush_shared_link_counters():
+    """Guarda en SharedLink las vistas/reproducciones acumuladas en cache (ver core.sharelinks)."""
+    from . import sharelinks
+    return sharelinks.flush()
+
+
+@shared_task
+def cleanup_upload_sessions():
+    """
+    Cancela los uploads por partes abandonados y borra sus archivos parciales (ver core.uploads),
+    y los temporales huérfanos de MediaRootUploadHandler.
+    """
+    from . import uploads
+    from .upload_handlers import cleanup_temp_dir
+    result = uploads.cleanup()
+    result['temporales'] = cleanup_temp_dir()
+    return result
@@ -0,0 +1,132 @@
+"""
+Diccionario de términos (cliente / agencia / producto) para autocompletado.
+
+``MetadataTerm`` guarda cada valor distinto por repositorio con su conteo. Las
+señales de Broadcast aplican solo la diferencia entre el valor anterior y el
+nuevo (+1 / -1 con F()), así que nunca se recorre la tabla de broadcasts.
+"""
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .search import normalize
+
+logger = logging.getLogger(__name__)
+
+TERM_FIELDS = ('cliente', 'agencia', 'producto')
+
+
+def term_values(repositorio_id, cliente='', agencia='', producto=''):
+    """{(repositorio, campo, valor_normalizado): valor} de un broadcast."""
+    values = {}
+    for campo, valor in zip(TERM_FIELDS, (cliente, agencia, producto)):
+        valor = (valor or '').strip()
+        if repositorio_id and valor:
+            values[(repositorio_id, campo, normalize(valor)[:255])] = valor[:255]
+    return values
+
+
+def snapshot(broadcast):
+    return term_values(broadcast.repositorio_id, broadcast.cliente, broadcast.agencia, broadcast.producto)
+
+
+def _increment(key, valor):
+    from .models import MetadataTerm, Agencia
+    repositorio_id, campo, normalizado = key
+    updated = MetadataTerm.objects.filter(
+        repositorio_id=repositorio_id, campo=campo, valor_normalizado=normalizado
+    ).update(conteo=F('conteo') + 1)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            MetadataTerm.objects.create(
+                repositorio_id=repositorio_id, campo=campo, valor=valor, valor_normalizado=normalizado, conteo=1
+            )
+    except IntegrityError:
+        # Otro proceso lo creó en paralelo
+        MetadataTerm.objects.filter(
+            repositorio_id=repositorio_id, campo=campo, valor_normalizado=normalizado
+        ).update(conteo=F('conteo') + 1)
+    if campo == 'agencia':
+        # Catálogo global de agencias (antes nunca se llenaba)
+        Agencia.objects.get_or_create(nombre=valor)
+
+
+def _decrement(key):
+    from .models import MetadataTerm
+    repositorio_id, campo, normalizado = key
+    qs = MetadataTerm.objects.filter(repositorio_id=repositorio_id, campo=campo, valor_normalizado=normalizado)
+    qs.filter(conteo__gt=0).update(conteo=F('conteo') - 1)
+    qs.filter(conteo__lte=0).delete()
+
+
+def apply_delta(old, new):
+    """Aplica la diferencia entre dos snapshots (ver ``snapshot``)."""
+    for key in old.keys() - new.keys():
+        _decrement(key)
+    for key in new.keys() - old.keys():
+        _increment(key, new[key])
+
+
+def _prefix_upper_bound(prefix):
+    """Menor cadena mayor que todas las que empiezan con ``prefix`` ("abc" -> "abd")."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def autocomplete(prefix, repositorio_ids=None, campos=TERM_FIELDS, limit=10):
+    """
+    Términos que empiezan con ``prefix`` (sin importar mayúsculas/acentos), agregados
+    entre repositorios y ordenados por número de broadcasts.
+    ``repositorio_ids=None`` significa sin restricción (staff).
+    """
+    from .models import MetadataTerm
+    normalizado = normalize(prefix).strip()
+    if not normalizado:
+        return []
+    # Rango sobre el índice ordenado en lugar de LIKE (funciona igual en SQLite y Postgres)
+    qs = MetadataTerm.objects.filter(
+        campo__in=campos,
+        valor_normalizado__gte=normalizado,
+        valor_normalizado__lt=_prefix_upper_bound(normalizado),
+        conteo__gt=0,
+    )
+    if repositorio_ids is not None:
+        qs = qs.filter(repositorio_id__in=repositorio_ids)
+    rows = (
+        qs.values('campo', 'valor_normalizado')
+        .annotate(total=Sum('conteo'))
+        .order_by('-total', 'valor_normalizado')[:limit]
+    )
+    rows = list(rows)
+    # Valor a mostrar: el capturado en cualquiera de los repositorios
+    display = dict(
+        ((campo, norm), valor) for campo, norm, valor in
+        qs.filter(valor_normalizado__in=[r['valor_normalizado'] for r in rows]).values_list('campo', 'valor_normalizado', 'valor')
+    )
+    return [
+        {'campo': r['campo'], 'valor': display.get((r['campo'], r['valor_normalizado']), r['valor_normalizado']), 'conteo': r['total']}
+        for r in rows
+    ]
+
+
+def rebuild_terms(Broadcast, MetadataTerm, Agencia=None):
+    """Recalcula el diccionario completo (migración inicial / mantenimiento). Acepta modelos históricos."""
+    counts = {}
+    display = {}
+    rows = Broadcast.objects.order_by().values_list('repositorio_id', 'cliente', 'agencia', 'producto').iterator()
+    for repositorio_id, cliente, agencia, producto in rows:
+        for key, valor in term_values(repositorio_id, cliente, agencia, producto).items():
+            counts[key] = counts.get(key, 0) + 1
+            display.setdefault(key, valor)
+    MetadataTerm.objects.all().delete()
+    MetadataTerm.objects.bulk_create([
+        MetadataTerm(repositorio_id=r, campo=c, valor=display[(r, c, n)], valor_normalizado=n, conteo=total)
+        for (r, c, n), total in counts.items()
+    ], batch_size=1000)
+    if Agencia is not None:
+        agencias = {display[key] for key in counts if key[1] == 'agencia'}
+        existentes = set(Agencia.objects.values_list('nombre', flat=True))
+        Agencia.objects.bulk_create([Agencia(nombre=n) for n in sorted(agencias - existentes)], ignore_conflicts=True)
+    return len(counts)
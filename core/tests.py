@@ -1,3 +1,1561 @@
-from django.test import TestCase
+import os
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import CustomUser, Repositorio, Directorio, Modulo, Broadcast, Audio, ImageAsset, StorageAsset, ProcessingError
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ZipDownloadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import Perfil, RepositorioPermiso
+        cls.perfil = Perfil.objects.create(clave='descarga', nombre='Descarga', puede_descargar=True)
+        cls.user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x', perfil=cls.perfil)
+        cls.repo_a = Repositorio.objects.create(nombre='A', clave='AAAA')
+        cls.repo_b = Repositorio.objects.create(nombre='B', clave='BBBB')
+        RepositorioPermiso.objects.create(usuario=cls.user, repositorio=cls.repo_a, puede_ver=True)
+        cls.root = Directorio.objects.create(nombre='Campaña', repositorio=cls.repo_a)
+        cls.sub = Directorio.objects.create(nombre='../../etc', repositorio=cls.repo_a, parent=cls.root)
+        cls.spot = Broadcast.objects.create(repositorio=cls.repo_a, directorio=cls.root, nombre_original='spot.mov',
+                                            archivo_original='sources/spot.mov', ruta_h264='encoded/spot.mp4')
+        cls.evil = Broadcast.objects.create(repositorio=cls.repo_a, directorio=cls.sub, nombre_original='..\\x.mov',
+                                            archivo_original='sources/x.mov')
+        cls.doc = StorageAsset.objects.create(repositorio=cls.repo_a, directorio=cls.root, nombre_original='doc.pdf',
+                                              archivo_original='sources/doc.pdf')
+        cls.ajeno = Broadcast.objects.create(repositorio=cls.repo_b, nombre_original='ajeno.mov', archivo_original='sources/ajeno.mov')
+        cls.dir_ajeno = Directorio.objects.create(nombre='Ajena', repositorio=cls.repo_b)
+
+    def setUp(self):
+        import tempfile
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        for relpath in ('sources/spot.mov', 'encoded/spot.mp4', 'sources/x.mov', 'sources/doc.pdf', 'sources/ajeno.mov'):
+            path = os.path.join(tmp.name, relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fh:
+                fh.write(relpath.encode() * 100)
+        self.client.force_login(self.user)
+
+    def _unzip(self, response):
+        import io
+        import zipfile
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        zf = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(zf.testzip())
+        return zf
+
+    def test_folder_download_is_stored_and_sanitized(self):
+        zf = self._unzip(self.client.get(f'/api/directorios/{self.root.pk}/download/'))
+        self.assertEqual(sorted(zf.namelist()), ['Campaña/.._.._etc/.._x.mov', 'Campaña/doc.pdf', 'Campaña/spot.mov'])
+        self.assertTrue(all(i.compress_type == 0 for i in zf.infolist()))
+        self.assertEqual(zf.read('Campaña/spot.mov'), b'sources/spot.mov' * 100)
+
+        zf = self._unzip(self.client.get(f'/api/directorios/{self.root.pk}/download/?variant=rendition'))
+        # Storage no tiene rendition (va el original); el broadcast sin rendition se omite
+        self.assertEqual(sorted(zf.namelist()), ['Campaña/doc.pdf', 'Campaña/spot.mp4'])
+        self.assertEqual(zf.read('Campaña/spot.mp4'), b'encoded/spot.mp4' * 100)
+
+        self.assertEqual(self.client.get(f'/api/directorios/{self.dir_ajeno.pk}/download/').status_code, 403)
+
+    def test_selection_is_scoped_to_visible_repositories(self):
+        payload = {'broadcasts': [str(self.spot.pk), str(self.ajeno.pk)], 'storage': [str(self.doc.pk)]}
+        zf = self._unzip(self.client.post('/api/downloads/zip/', payload, content_type='application/json'))
+        self.assertEqual(sorted(zf.namelist()), ['doc.pdf', 'spot.mov'])
+
+        response = self.client.get(f'/api/downloads/zip/?broadcasts={self.ajeno.pk}')
+        self.assertEqual(response.status_code, 404)
+
+        self.perfil.puede_descargar = False
+        self.perfil.save()
+        self.assertEqual(self.client.post('/api/downloads/zip/', payload, content_type='application/json').status_code, 403)
+        self.assertEqual(self.client.get(f'/api/directorios/{self.root.pk}/download/').status_code, 403)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FileSizeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def setUp(self):
+        import tempfile
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.media_root = tmp.name
+        self.client.force_login(self.user)
+
+    def _touch(self, relpath, size):
+        path = os.path.join(self.media_root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(b'x' * size)
+
+    def test_size_is_stored_at_create_and_exported(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        with mock.patch('core.views.transcode_video.delay'):
+            response = self.client.post('/api/broadcasts/', {
+                'repositorio': self.repositorio.pk,
+                'pizarra': '{"producto": "Spot"}',
+                'archivo_original': SimpleUploadedFile('spot.mov', b'x' * 3 * 1024 * 1024),
+            })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['file_size'], 3 * 1024 * 1024)
+        self.assertEqual(Broadcast.objects.get(pk=response.json()['id']).file_size, 3 * 1024 * 1024)
+
+        # Los listados no hacen stat() del archivo
+        with mock.patch('os.path.getsize') as getsize, mock.patch('os.stat') as stat:
+            data = self.client.get('/api/broadcasts/').json()
+            export = self.client.get('/api/csv/export-broadcasts/')
+        getsize.assert_not_called()
+        stat.assert_not_called()
+        self.assertEqual(data[0]['file_size'], 3 * 1024 * 1024)
+
+        import csv
+        import io
+        rows = list(csv.DictReader(io.StringIO(export.content.decode('utf-8'))))
+        self.assertEqual((rows[0]['size_mb'], rows[0]['size_bytes']), ('3.00 MB', str(3 * 1024 * 1024)))
+
+    def test_backfill_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        common = dict(repositorio=self.repositorio)
+        viejo = Broadcast.objects.create(nombre_original='viejo.mov', archivo_original='sources/viejo.mov', **common)
+        perdido = Broadcast.objects.create(nombre_original='perdido.mov', archivo_original='sources/perdido.mov', **common)
+        audio = Audio.objects.create(nombre_original='a.wav', archivo_original='sources/a.wav', file_size=7, **common)
+        doc = StorageAsset.objects.create(nombre_original='doc.pdf', archivo_original='sources/doc.pdf', **common)
+        self._touch('sources/viejo.mov', 10)
+        self._touch('sources/a.wav', 20)
+        self._touch('sources/doc.pdf', 30)
+
+        out = StringIO()
+        call_command('backfill_file_sizes', '--dry-run', stdout=out)
+        viejo.refresh_from_db()
+        self.assertIsNone(viejo.file_size)
+
+        out = StringIO()
+        call_command('backfill_file_sizes', stdout=out)
+        self.assertIn('Broadcast: 1 actualizados', out.getvalue())
+        self.assertIn('Broadcast: 1 archivos no encontrados', out.getvalue())
+        for obj in (viejo, perdido, audio, doc):
+            obj.refresh_from_db()
+        # Audio ya tenía tamaño: solo se recalcula con --force
+        self.assertEqual((viejo.file_size, perdido.file_size, audio.file_size, doc.file_size), (10, None, 7, 30))
+
+        call_command('backfill_file_sizes', '--force', '--model', 'audio', stdout=StringIO())
+        audio.refresh_from_db()
+        self.assertEqual(audio.file_size, 20)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ListQueryCountTests(TestCase):
+    """Los listados deben hacer un número constante de queries sin importar cuántos registros haya."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+        cls.modulo, _ = Modulo.objects.get_or_create(tipo='broadcast', defaults={'nombre': 'Broadcast'})
+        cls.directorio = Directorio.objects.create(nombre='Carpeta', repositorio=cls.repositorio, modulo=cls.modulo)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _create(self, n):
+        common = dict(repositorio=self.repositorio, directorio=self.directorio, modulo=self.modulo, creado_por=self.user)
+        Broadcast.objects.bulk_create([
+            Broadcast(nombre_original=f'spot_{i}.mov', pizarra={'producto': f'P{i}'}, **common) for i in range(n)
+        ])
+        Audio.objects.bulk_create([Audio(nombre_original=f'audio_{i}.wav', **common) for i in range(n)])
+        ImageAsset.objects.bulk_create([ImageAsset(nombre_original=f'img_{i}.jpg', **common) for i in range(n)])
+        StorageAsset.objects.bulk_create([
+            StorageAsset(nombre_original=f'doc_{i}.pdf', archivo_original=f'sources/doc_{i}.pdf', **common) for i in range(n)
+        ])
+        ProcessingError.objects.bulk_create([
+            ProcessingError(repositorio=self.repositorio, modulo=self.modulo, directorio=self.directorio,
+                            broadcast=b, stage='transcode', error_message='ffmpeg failed')
+            for b in Broadcast.objects.filter(errores__isnull=True)
+        ])
+        # bulk_create no dispara señales: descartar los listados cacheados (core.listcache)
+        cache.clear()
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        urls = ['/api/broadcasts/', '/api/audios/', '/api/images/', '/api/storage/', '/api/processing-errors/']
+        self._create(3)
+        small = {url: self._count_queries(url)[0] for url in urls}
+
+        self._create(497)
+        for url in urls:
+            with self.subTest(url=url):
+                count, response = self._count_queries(url)
+                self.assertEqual(len(response.json()), 500)
+                self.assertEqual(count, small[url])
+
+    def test_sparse_fieldsets(self):
+        self._create(20)
+        renditions = {name: {'path': f'encoded/{name}.mp4', 'settings': {'vcodec': 'libx264', 'crf': 23, 'preset': 'slow'}}
+                      for name in ('h264_1080', 'h264_720', 'proxy')}
+        Broadcast.objects.update(encoded_files=renditions, last_error='ffmpeg: ' + 'x' * 2000)
+        cache.clear()
+        full = self.client.get('/api/broadcasts/').content
+        compact_count, response = self._count_queries('/api/broadcasts/?view=compact')
+        compact = response.json()
+        self.assertEqual(set(compact[0]), {
+            'id', 'repositorio', 'directorio', 'nombre_original', 'file_size',
+            'estado_transcodificacion', 'thumbnail_url', 'fecha_subida', 'ruta_h264',
+        })
+        self.assertLess(len(response.content) * 5, len(full))
+
+        count, response = self._count_queries('/api/broadcasts/?fields=nombre_original,repositorio_nombre,modulo_info')
+        row = response.json()[0]
+        self.assertEqual(set(row), {'id', 'nombre_original', 'repositorio_nombre', 'modulo_info'})
+        self.assertEqual(row['repositorio_nombre'], 'Repo')
+        self.assertEqual(row['modulo_info']['tipo'], 'broadcast')
+        self.assertEqual(count, compact_count)
+
+        row = self.client.get('/api/broadcasts/?omit=encoded_files,pizarra,last_error').json()[0]
+        self.assertNotIn('pizarra', row)
+        self.assertIn('status_display', row)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ASSET_PAGINATION_LEGACY=True)
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+        Broadcast.objects.bulk_create([Broadcast(repositorio=repositorio, nombre_original=f'spot_{i}.mov') for i in range(25)])
+        # Varias filas con la misma fecha para probar el desempate por id
+        Broadcast.objects.filter(nombre_original__in=['spot_3.mov', 'spot_4.mov', 'spot_5.mov']).update(
+            fecha_subida=Broadcast.objects.get(nombre_original='spot_6.mov').fecha_subida
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_legacy_list_is_unpaginated(self):
+        data = self.client.get('/api/broadcasts/').json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 25)
+
+    def test_walk_pages_forward_and_back(self):
+        expected = [str(pk) for pk in Broadcast.objects.order_by('-fecha_subida', '-pk').values_list('pk', flat=True)]
+        data = self.client.get('/api/broadcasts/?page_size=10&count=1').json()
+        self.assertEqual(data['count'], 25)
+        self.assertIsNone(data['previous'])
+        pages = [data]
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).json())
+        self.assertEqual([len(p['results']) for p in pages], [10, 10, 5])
+        self.assertEqual([r['id'] for p in pages for r in p['results']], expected)
+
+        back = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual([r['id'] for r in back['results']], expected[10:20])
+        back = self.client.get(back['previous']).json()
+        self.assertEqual([r['id'] for r in back['results']], expected[:10])
+        self.assertIsNone(back['previous'])
+
+    def _walk(self, url):
+        pages = [self.client.get(url).json()]
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).json())
+        ids = [r['id'] for p in pages for r in p['results']]
+        back = []
+        page = pages[-1]
+        while page['previous']:
+            page = self.client.get(page['previous']).json()
+            back = [r['id'] for r in page['results']] + back
+        self.assertEqual(back, ids[:len(back)])
+        self.assertEqual(len(back), len(ids) - len(pages[-1]['results']))
+        return ids
+
+    def test_cursor_follows_requested_ordering(self):
+        from django.db.models import F
+        repositorio = Repositorio.objects.get()
+        # Nombres y tipos repetidos, y NULL en tipo_archivo, para probar desempates
+        ImageAsset.objects.bulk_create([
+            ImageAsset(repositorio=repositorio, nombre_original=f'img_{i % 4}.jpg', tipo_archivo=[None, '.jpg', '.png'][i % 3])
+            for i in range(17)
+        ])
+        StorageAsset.objects.bulk_create([
+            StorageAsset(repositorio=repositorio, nombre_original=f'doc_{i}.pdf', file_size=i % 5) for i in range(13)
+        ])
+
+        expected = [str(pk) for pk in ImageAsset.objects.order_by(
+            F('tipo_archivo').asc(nulls_last=True), F('nombre_original').desc(nulls_first=True), '-pk'
+        ).values_list('pk', flat=True)]
+        self.assertEqual(self._walk('/api/images/?page_size=4&ordering=tipo_archivo,-nombre_original'), expected)
+
+        expected = [str(pk) for pk in StorageAsset.objects.order_by('-file_size', '-pk').values_list('pk', flat=True)]
+        self.assertEqual(self._walk('/api/storage/?page_size=5&ordering=-file_size'), expected)
+        # Con ?fields= la columna del orden se lee igual (sin una query extra por cursor)
+        expected = [str(pk) for pk in Broadcast.objects.order_by('-nombre_original', '-pk').values_list('pk', flat=True)]
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get('/api/broadcasts/?page_size=10&ordering=-nombre_original&fields=estado_transcodificacion').json()
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "core_broadcast"' in q['sql']]), 1)
+        self.assertEqual(set(data['results'][0]), {'id', 'estado_transcodificacion'})
+        self.assertEqual(self._walk('/api/broadcasts/?page_size=10&ordering=-nombre_original&fields=estado_transcodificacion'), expected)
+
+        expected = [str(pk) for pk in StorageAsset.objects.order_by('nombre_original', 'pk').values_list('pk', flat=True)]
+        self.assertEqual(self._walk('/api/storage/?page_size=5&ordering=nombre_original'), expected)
+
+        # Campos no permitidos se ignoran (orden default) y un cursor de otro orden es inválido
+        data = self.client.get('/api/images/?page_size=4&ordering=estado').json()
+        self.assertEqual(data['results'][0]['id'], str(ImageAsset.objects.order_by('-fecha_subida', '-pk')[0].pk))
+        from urllib.parse import parse_qs, urlparse
+        next_url = self.client.get('/api/images/?page_size=4&ordering=tipo_archivo,-nombre_original').json()['next']
+        cursor = parse_qs(urlparse(next_url).query)['cursor'][0]
+        self.assertEqual(self.client.get(f'/api/images/?page_size=4&cursor={cursor}').status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DirectorioTreeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+        cls.audio_modulo, _ = Modulo.objects.get_or_create(tipo='audio', defaults={'nombre': 'Audio'})
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _dir(self, nombre, parent=None, modulo=None):
+        return Directorio.objects.create(nombre=nombre, repositorio=self.repositorio, parent=parent, modulo=modulo)
+
+    def test_subtree_counts_and_move(self):
+        a = self._dir('A')
+        b = self._dir('B', parent=a)
+        c = self._dir('C', parent=b)
+        other = self._dir('Otro')
+        Broadcast.objects.create(repositorio=self.repositorio, directorio=a)
+        Broadcast.objects.create(repositorio=self.repositorio, directorio=c)
+        Broadcast.objects.create(repositorio=self.repositorio, directorio=other)
+        sonidos = self._dir('Sonidos', modulo=self.audio_modulo)
+        Audio.objects.create(repositorio=self.repositorio, directorio=self._dir('Sub', parent=sonidos, modulo=self.audio_modulo))
+
+        self.assertEqual(c.path, f'/{a.pk}/{b.pk}/{c.pk}/')
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get('/api/directorios/').json()
+        counts = {d['nombre']: d['broadcasts_count'] for d in data}
+        self.assertEqual(counts, {'A': 2, 'B': 1, 'C': 1, 'Otro': 1, 'Sonidos': 1, 'Sub': 1})
+        self.assertLessEqual(len(ctx.captured_queries), 3)
+
+        # Mover B (con C) debajo de "Otro"
+        response = self.client.patch(f'/api/directorios/{b.pk}/', {'parent': other.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        c.refresh_from_db()
+        self.assertEqual(c.path, f'/{other.pk}/{b.pk}/{c.pk}/')
+        counts = {d['nombre']: d['broadcasts_count'] for d in self.client.get('/api/directorios/').json()}
+        self.assertEqual((counts['A'], counts['Otro']), (1, 2))
+
+        # No se permite mover una carpeta dentro de su propio subárbol
+        response = self.client.patch(f'/api/directorios/{other.pk}/', {'parent': c.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_tree_endpoint_and_etag(self):
+        a = self._dir('A')
+        b = self._dir('B', parent=a)
+        Broadcast.objects.create(repositorio=self.repositorio, directorio=b)
+        url = f'/api/directorios/tree/?repositorio={self.repositorio.pk}'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        tree = response.json()['tree']
+        self.assertEqual([n['nombre'] for n in tree], ['A'])
+        self.assertEqual(tree[0]['broadcasts_count'], 1)
+        self.assertEqual(tree[0]['children'][0]['id'], b.pk)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self._dir('C', parent=a)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IndexedSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _search(self, url, term):
+        return sorted(r['nombre_original'] for r in self.client.get(url, {'search': term}).json())
+
+    def test_search_uses_index_and_follows_updates(self):
+        b = Broadcast.objects.create(repositorio=self.repositorio, nombre_original='spot_navidad.mov', id_content='CNT-asdfg',
+                                     pizarra={'producto': 'Refresco Limón', 'cliente': 'Acme', 'version': 'V1'})
+        Broadcast.objects.create(repositorio=self.repositorio, nombre_original='otro.mp4', pizarra={'producto': 'Galletas'})
+        Audio.objects.create(repositorio=self.repositorio, nombre_original='jingle.wav', metadata={'titulo': 'Canción'})
+        StorageAsset.objects.create(repositorio=self.repositorio, nombre_original='brief.pdf', archivo_original='sources/brief.pdf')
+
+        self.assertEqual(self._search('/api/broadcasts/', 'limon acme'), ['spot_navidad.mov'])
+        self.assertEqual(self._search('/api/broadcasts/', 'sdfg'), ['spot_navidad.mov'])
+        self.assertEqual(self._search('/api/broadcasts/', 'mp4'), ['otro.mp4'])
+        self.assertEqual(self._search('/api/broadcasts/', b.fecha_subida.date().isoformat()), ['otro.mp4', 'spot_navidad.mov'])
+        self.assertEqual(self._search('/api/audios/', 'cancion'), ['jingle.wav'])
+        self.assertEqual(self._search('/api/storage/', 'brief'), ['brief.pdf'])
+
+        b.pizarra = {'producto': 'Agua'}
+        b.save()
+        self.assertEqual(self._search('/api/broadcasts/', 'limon'), [])
+        b.delete()
+        self.assertEqual(self._search('/api/broadcasts/', 'agua'), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PizarraColumnsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def test_columns_follow_pizarra(self):
+        b = Broadcast.objects.create(repositorio=self.repositorio, pizarra={'cliente': 'Acme', 'fecha': '2019-05-02'})
+        self.assertEqual((b.cliente, b.anio), ('Acme', 2019))
+
+        # update_or_create (importación CSV) guarda con update_fields=['pizarra', ...]
+        Broadcast.objects.update_or_create(pk=b.pk, defaults={'pizarra': {'cliente': 'Otro', 'fecha': '2021-01-01'}})
+        b.refresh_from_db()
+        self.assertEqual((b.cliente, b.anio), ('Otro', 2021))
+
+        b.pizarra = {'cliente': 'Bulk', 'producto': 'X'}
+        Broadcast.objects.bulk_update([b], ['pizarra'])
+        b.refresh_from_db()
+        self.assertEqual((b.cliente, b.producto, b.anio), ('Bulk', 'X', None))
+
+    def test_filter_and_order_by_columns(self):
+        for cliente, fecha in [('Acme', '2019-01-01'), ('Acme', '2020-01-01'), ('Beta', '2020-06-01')]:
+            Broadcast.objects.create(repositorio=self.repositorio, pizarra={'cliente': cliente, 'fecha': fecha})
+        self.client.force_login(self.user)
+        data = self.client.get('/api/broadcasts/', {'cliente': 'Acme', 'anio': 2020}).json()
+        self.assertEqual(len(data), 1)
+        data = self.client.get('/api/broadcasts/', {'ordering': '-cliente,anio'}).json()
+        self.assertEqual([(d['pizarra']['cliente'], d['pizarra']['fecha'][:4]) for d in data],
+                         [('Beta', '2020'), ('Acme', '2019'), ('Acme', '2020')])
+
+    def test_client_year_browse_with_cursor(self):
+        rows = [('Acme', '2019-01-01'), ('Acme', '2020-01-01'), ('Acme', None), ('Beta', '2020-06-01'),
+                ('Beta', '2018-06-01'), ('', '2021-01-01'), ('Acme', '2020-03-01')]
+        for cliente, fecha in rows:
+            Broadcast.objects.create(repositorio=self.repositorio, pizarra={'cliente': cliente, 'fecha': fecha})
+        self.client.force_login(self.user)
+
+        url = f'/api/broadcasts/?page_size=2&repositorio={self.repositorio.pk}&ordering=cliente,-anio&fields=nombre_original'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [r['id'] for r in response.json()['results']]
+            url = response.json()['next']
+        expected = sorted(Broadcast.objects.all(), key=lambda b: (b.cliente, -(b.anio or 10000), -b.pk.int))
+        self.assertEqual(seen, [str(b.pk) for b in expected])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repo_a = Repositorio.objects.create(nombre='A', clave='AAAA')
+        cls.repo_b = Repositorio.objects.create(nombre='B', clave='BBBB')
+
+    def _suggest(self, **params):
+        return [(r['campo'], r['valor'], r['conteo']) for r in self.client.get('/api/broadcasts/autocomplete/', params).json()['results']]
+
+    def test_terms_are_maintained_incrementally(self):
+        from .models import Agencia, MetadataTerm, RepositorioPermiso
+        b1 = Broadcast.objects.create(repositorio=self.repo_a, pizarra={'cliente': 'Acmé', 'agencia': 'Ogilvy'})
+        Broadcast.objects.create(repositorio=self.repo_a, pizarra={'cliente': 'ACME'})
+        Broadcast.objects.create(repositorio=self.repo_b, pizarra={'cliente': 'Acme Corp'})
+        self.assertTrue(Agencia.objects.filter(nombre='Ogilvy').exists())
+
+        self.client.force_login(self.admin)
+        self.assertEqual(self._suggest(q='ac', campo='cliente'), [('cliente', 'Acmé', 2), ('cliente', 'Acme Corp', 1)])
+
+        b1.pizarra = {'cliente': 'Zeta'}
+        b1.save()
+        self.assertEqual(self._suggest(q='acme', campo='cliente'), [('cliente', 'Acmé', 1), ('cliente', 'Acme Corp', 1)])
+        self.assertFalse(MetadataTerm.objects.filter(campo='agencia').exists())
+
+        # Usuario normal: solo términos de sus repositorios
+        user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x')
+        RepositorioPermiso.objects.create(usuario=user, repositorio=self.repo_b, puede_ver=True)
+        self.client.force_login(user)
+        self.assertEqual(self._suggest(q='acm'), [('cliente', 'Acme Corp', 1)])
+
+    def test_term_errors_do_not_block_broadcast_delete(self):
+        b = Broadcast.objects.create(repositorio=self.repo_a, pizarra={'cliente': 'Acme'})
+        with mock.patch('core.terms.apply_delta', side_effect=RuntimeError('db')):
+            b.delete()
+        self.assertFalse(Broadcast.objects.filter(pk=b.pk).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FacetsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def test_facets_are_cached_until_a_write(self):
+        for cliente, fecha in [('Acme', '2019-01-01'), ('Acme', '2020-01-01'), ('Beta', '2020-06-01')]:
+            Broadcast.objects.create(repositorio=self.repositorio, pizarra={'cliente': cliente, 'fecha': fecha})
+        self.client.force_login(self.user)
+        url = f'/api/broadcasts/facets/?repositorio={self.repositorio.pk}&facets=cliente,anio'
+
+        data = self.client.get(url).json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['facets']['cliente'], [{'value': 'Acme', 'count': 2}, {'value': 'Beta', 'count': 1}])
+        self.assertEqual(data['facets']['anio'], [{'value': 2020, 'count': 2}, {'value': 2019, 'count': 1}])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertFalse([q for q in ctx.captured_queries if 'core_broadcast' in q['sql']])
+
+        Broadcast.objects.create(repositorio=self.repositorio, pizarra={'cliente': 'Beta'})
+        self.assertEqual(self.client.get(url).json()['total'], 4)
+        self.assertEqual(self.client.get(url + '&cliente=Acme').json()['total'], 2)
+
+    def test_cached_facets_follow_repository_permissions(self):
+        from .models import RepositorioPermiso
+        otro = Repositorio.objects.create(nombre='Otro', clave='OTRO')
+        Broadcast.objects.create(repositorio=self.repositorio, pizarra={'cliente': 'Acme'})
+        Broadcast.objects.create(repositorio=otro, pizarra={'cliente': 'Secreto'})
+        user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x')
+        RepositorioPermiso.objects.create(usuario=user, repositorio=self.repositorio, puede_ver=True)
+        permiso = RepositorioPermiso.objects.create(usuario=user, repositorio=otro, puede_ver=True)
+        self.client.force_login(user)
+        url = '/api/broadcasts/facets/?facets=cliente'
+
+        self.assertEqual(self.client.get(url).json()['total'], 2)
+        permiso.delete()
+        data = self.client.get(url).json()
+        self.assertEqual(data['facets']['cliente'], [{'value': 'Acme', 'count': 1}])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TranscodeStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def test_status_and_pending_details_use_presence_flag(self):
+        import tempfile
+        from .tasks import check_source_presence
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            os.makedirs(os.path.join(media_root, 'sources'))
+            for i in range(3):
+                open(os.path.join(media_root, 'sources', f'ok_{i}.mov'), 'wb').close()
+            common = dict(repositorio=self.repositorio)
+            Broadcast.objects.bulk_create(
+                [Broadcast(archivo_original=f'sources/ok_{i}.mov', **common) for i in range(3)]
+                + [Broadcast(archivo_original=f'sources/missing_{i}.mov', **common) for i in range(2)]
+                + [Broadcast(**common), Broadcast(estado_transcodificacion='ERROR', last_error='boom', **common)]
+            )
+            self.assertEqual(check_source_presence(), {'checked': 5, 'missing': 2, 'changed': 5})
+            self.assertEqual(check_source_presence()['changed'], 0)
+
+            # Un original escrito sin pasar por sync_path (después del último escaneo) no se marca faltante
+            open(os.path.join(media_root, 'sources', 'nuevo.mov'), 'wb').close()
+            os.utime(os.path.join(media_root, 'sources'), ns=(1, 1))
+            nuevo = Broadcast.objects.create(archivo_original='sources/nuevo.mov', **common)
+            check_source_presence(estados=['PENDIENTE'])
+            nuevo.refresh_from_db()
+            self.assertTrue(nuevo.archivo_presente)
+            nuevo.delete()
+
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(f'/api/broadcasts/transcode_status/?repositorio={self.repositorio.pk}').json()
+        self.assertEqual(len([q for q in ctx.captured_queries if 'core_broadcast' in q['sql']]), 3)
+        self.assertEqual(data['total'], 7)
+        self.assertEqual(data['estados'], {'PENDIENTE': 6, 'PROCESANDO': 0, 'COMPLETADO': 0, 'ERROR': 1})
+        self.assertEqual(data['pendientes_por_razon'], {
+            'Sin archivo original': 1, 'Archivo no existe': 2, 'Listo para iniciar': 3,
+        })
+        self.assertEqual(len(data['muestras_archivo_no_existe']), 2)
+        self.assertEqual(data['errores_muestras'][0]['last_error'], 'boom')
+
+        url = '/api/broadcasts/pending_details/?reason=listo_para_iniciar&limit=2'
+        first = self.client.get(url).json()
+        second = self.client.get(url + '&offset=2').json()
+        self.assertEqual((first['total'], first['count'], second['count']), (3, 2, 1))
+        ids = {i['id'] for i in first['items'] + second['items']}
+        self.assertEqual(len(ids), 3)
+        self.assertTrue(all(i['archivo'].startswith('sources/ok_') for i in first['items'] + second['items']))
+        self.assertEqual(self.client.get('/api/broadcasts/pending_details/?reason=x').status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, MEDIA_INVENTORY_ROOTS=['sources'])
+class MediaInventoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def setUp(self):
+        import tempfile
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = tmp.name
+        media = self.settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self._touch('sources/top.mov')
+        self._touch('sources/CNT-abc12/master.mov', b'x' * 10)
+        self._touch('sources/CNT-abc12/notes.txt')
+        self._touch('sources/otros/deep/spot.mp4')
+
+    def _touch(self, relpath, data=b''):
+        path = os.path.join(self.media_root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+
+    def test_incremental_scan_only_lists_changed_directories(self):
+        from . import inventory
+        from .models import MediaFile
+
+        stats = inventory.scan()['sources']
+        self.assertEqual((stats['dirs_listed'], stats['created']), (4, 4))
+        self.assertEqual(MediaFile.objects.get(nombre='master.mov').size, 10)
+
+        stats = inventory.scan()['sources']
+        self.assertEqual((stats['dirs_listed'], stats['dirs_skipped']), (0, 4))
+
+        self._touch('sources/otros/deep/nuevo.mov')
+        os.remove(os.path.join(self.media_root, 'sources/top.mov'))
+        os.utime(os.path.join(self.media_root, 'sources'), ns=(1, 1))
+        os.utime(os.path.join(self.media_root, 'sources/otros/deep'), ns=(2, 2))
+        stats = inventory.scan()['sources']
+        self.assertEqual((stats['dirs_listed'], stats['created'], stats['deleted']), (2, 1, 1))
+        self.assertEqual(
+            sorted(inventory.video_files().values_list('path', flat=True)),
+            ['sources/CNT-abc12/master.mov', 'sources/otros/deep/nuevo.mov', 'sources/otros/deep/spot.mp4'],
+        )
+
+        inventory.sync_path('sources/CNT-abc12/master.mov')
+        self._touch('sources/CNT-abc12/master.mov', b'x' * 20)
+        inventory.sync_path('sources/CNT-abc12/master.mov')
+        self.assertEqual(MediaFile.objects.get(nombre='master.mov').size, 20)
+
+    def test_endpoints_read_from_inventory(self):
+        from . import inventory
+        inventory.scan()
+        b = Broadcast.objects.create(repositorio=self.repositorio, id_content='CNT-abc12', nombre_original='master.mov')
+        self.client.force_login(self.user)
+
+        with mock.patch('os.walk') as walk, mock.patch('os.scandir') as scandir:
+            overview = self.client.get('/api/broadcasts/sources_overview/').json()
+            response = self.client.post('/api/broadcasts/match_source_files/', {'repositorio_id': self.repositorio.pk},
+                                        content_type='application/json')
+        walk.assert_not_called()
+        scandir.assert_not_called()
+
+        self.assertEqual((overview['files_total'], overview['dirs_total'], overview['top_level_files']), (2, 2, ['top.mov']))
+        dirs = {d['name']: d for d in overview['dirs']}
+        self.assertEqual(dirs['CNT-abc12']['sample_files'], ['master.mov'])
+        self.assertEqual(dirs['otros']['file_count'], 0)
+
+        self.assertEqual(response.status_code, 200)
+        b.refresh_from_db()
+        self.assertEqual((b.archivo_original.name, b.file_size, b.archivo_presente), ('sources/CNT-abc12/master.mov', 10, True))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class MatchSourceFilesTests(TestCase):
+
+    def test_index_priorities(self):
+        from .matching import SourceFileIndex
+        files = [
+            {'filename': name, 'relative_path': path, 'size': 1}
+            for path, name in [
+                ('sources/a/CNT-zz999_v2.mov', 'CNT-zz999_v2.mov'),
+                ('sources/b/CNT-zz999/master.mov', 'master.mov'),
+                ('sources/c/spot final.mxf', 'spot final.mxf'),
+                ('sources/c/ESsTY', 'ESsTY'),
+            ]
+        ]
+        index = SourceFileIndex(files)
+        # Carpeta igual al folio gana sobre el token en el nombre de archivo
+        self.assertEqual(index.find('CNT-zz999')['relative_path'], 'sources/b/CNT-zz999/master.mov')
+        self.assertEqual(index.find('XX-v2')['relative_path'], 'sources/a/CNT-zz999_v2.mov')
+        self.assertEqual(index.find(None, 'Spot Final.mxf')['relative_path'], 'sources/c/spot final.mxf')
+        self.assertEqual(index.find('CNT-nada', 'essty.mov')['relative_path'], 'sources/c/ESsTY')
+        self.assertIsNone(index.find('CNT-nada', 'otro.mov'))
+
+    def test_id_embedded_mid_token_still_matches(self):
+        from .matching import SourceFileIndex
+        files = [
+            {'filename': name, 'relative_path': path, 'size': 1}
+            for path, name in [
+                ('sources/CNTabc12final.mov', 'CNTabc12final.mov'),
+                ('sources/SPOT12345.mov', 'SPOT12345.mov'),
+                ('sources/x/spot12345_alt.mov', 'spot12345_alt.mov'),
+            ]
+        ]
+        index = SourceFileIndex(files)
+        # Sin componente ni token igual al folio: se busca como subcadena (gana la primera ruta)
+        self.assertEqual(index.find('CNT-12345')['relative_path'], 'sources/SPOT12345.mov')
+        self.assertEqual(index.find('CNT-abc12')['relative_path'], 'sources/CNTabc12final.mov')
+        # La subcadena del folio tiene prioridad sobre el nombre, como antes
+        self.assertEqual(index.find('CNT-12345', 'spot12345_alt.mov')['relative_path'], 'sources/SPOT12345.mov')
+        self.assertIsNone(index.find('CNT-99999'))
+
+    def test_links_are_applied_in_bulk_and_job_reports_progress(self):
+        from .matching import get_job_state
+        from .models import MediaDirectory, MediaFile
+        from .tasks import match_source_files_task
+        from django.utils import timezone
+
+        repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+        root = MediaDirectory.objects.create(path='sources', raiz='sources', fecha_escaneo=timezone.now())
+        n = 40
+        MediaFile.objects.bulk_create([
+            MediaFile(path=f'sources/CNT-f{i:04d}.mov', raiz='sources', directorio=root,
+                      nombre=f'CNT-f{i:04d}.mov', extension='.mov', size=i)
+            for i in range(n)
+        ])
+        Broadcast.objects.bulk_create(
+            [Broadcast(repositorio=repositorio, id_content=f'CNT-f{i:04d}') for i in range(n)]
+            + [Broadcast(repositorio=repositorio, id_content='CNT-none')]
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            match_source_files_task('job1', repositorio.pk)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        state = get_job_state('job1')
+        self.assertEqual(state['status'], 'COMPLETADO')
+        self.assertEqual((state['processed'], state['total']), (n + 1, n + 1))
+        self.assertEqual((state['result']['matched'], state['result']['not_matched']), (n, 1))
+        b = Broadcast.objects.get(id_content='CNT-f0007')
+        self.assertEqual((b.archivo_original.name, b.file_size, b.archivo_presente), ('sources/CNT-f0007.mov', 7, True))
+
+        user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(user)
+        response = self.client.get('/api/broadcasts/match_source_files_status/?job_id=job1')
+        self.assertEqual(response.json()['status'], 'COMPLETADO')
+        self.assertEqual(self.client.get('/api/broadcasts/match_source_files_status/?job_id=x').status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AuthorizationContextTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import Perfil, RepositorioPermiso
+        cls.repo_a = Repositorio.objects.create(nombre='A', clave='AAAA')
+        cls.repo_b = Repositorio.objects.create(nombre='B', clave='BBBB')
+        cls.perfil = Perfil.objects.create(clave='cliente-x', nombre='Cliente X', puede_descargar=True)
+        cls.user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x', perfil=cls.perfil)
+        RepositorioPermiso.objects.create(usuario=cls.user, repositorio=cls.repo_a, puede_ver=True)
+        Broadcast.objects.create(repositorio=cls.repo_a)
+        Broadcast.objects.create(repositorio=cls.repo_b)
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def _permission_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q for q in ctx.captured_queries if 'core_repositoriopermiso' in q['sql'] or 'core_perfil' in q['sql']]
+
+    def test_context_is_cached_and_invalidated_by_signals(self):
+        from .models import RepositorioPermiso
+        response, queries = self._permission_queries('/api/broadcasts/')
+        self.assertEqual(len(response.json()), 1)
+        self.assertTrue(queries)
+
+        for url in ['/api/broadcasts/', '/api/audios/', '/api/processing-errors/', '/api/repositorios/']:
+            with self.subTest(url=url):
+                self.assertEqual(self._permission_queries(url)[1], [])
+        self.assertEqual([r['id'] for r in self.client.get('/api/repositorios/').json()], [self.repo_a.pk])
+
+        RepositorioPermiso.objects.create(usuario=self.user, repositorio=self.repo_b, puede_ver=True)
+        self.assertEqual(len(self.client.get('/api/broadcasts/').json()), 2)
+
+        self.perfil.puede_descargar = False
+        self.perfil.save()
+        user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertFalse(user.tiene_permiso('puede_descargar'))
+
+    def test_user_list_has_constant_queries(self):
+        from .models import RepositorioPermiso
+        admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/users/')
+        small = len(ctx.captured_queries)
+        for i in range(5):
+            u = CustomUser.objects.create_user(username=f'u{i}', email=f'u{i}@example.com', password='x', perfil=self.perfil)
+            RepositorioPermiso.objects.create(usuario=u, repositorio=self.repo_b)
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get('/api/users/').json()
+        self.assertEqual(len(ctx.captured_queries), small)
+        self.assertEqual(len(data), 7)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ListCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import RepositorioPermiso
+        cls.admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repo_a = Repositorio.objects.create(nombre='A', clave='AAAA')
+        cls.repo_b = Repositorio.objects.create(nombre='B', clave='BBBB')
+        cls.user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x')
+        RepositorioPermiso.objects.create(usuario=cls.user, repositorio=cls.repo_a, puede_ver=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, url, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, **headers)
+        tables = ('core_broadcast', 'core_processingerror')
+        return response, [q for q in ctx.captured_queries if any(t in q['sql'] for t in tables)]
+
+    def test_unchanged_polls_hit_cache_and_etag(self):
+        b = Broadcast.objects.create(repositorio=self.repo_a, nombre_original='a.mov')
+        ProcessingError.objects.create(repositorio=self.repo_a, broadcast=b, stage='transcode', error_message='x')
+        self.client.force_login(self.admin)
+
+        for url in [f'/api/broadcasts/?repositorio={self.repo_a.pk}', '/api/processing-errors/']:
+            with self.subTest(url=url):
+                first, queries = self._get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertTrue(queries)
+                etag = first['ETag']
+
+                again, queries = self._get(url)
+                self.assertEqual((again.json(), queries), (first.json(), []))
+
+                not_modified, queries = self._get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual((not_modified.status_code, queries), (304, []))
+
+        # Una escritura cambia la versión: el ETag anterior ya no coincide
+        url = f'/api/broadcasts/?repositorio={self.repo_a.pk}'
+        etag = self.client.get(url)['ETag']
+        Broadcast.objects.create(repositorio=self.repo_a, nombre_original='b.mov')
+        response, _ = self._get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, len(response.json())), (200, 2))
+
+        etag = self.client.get('/api/processing-errors/')['ETag']
+        ProcessingError.objects.create(repositorio=self.repo_a, stage='transcode', error_message='y')
+        self.assertEqual(self.client.get('/api/processing-errors/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cache_is_scoped_by_user_permissions(self):
+        Broadcast.objects.create(repositorio=self.repo_a)
+        Broadcast.objects.create(repositorio=self.repo_b)
+        self.client.force_login(self.admin)
+        self.assertEqual(len(self.client.get('/api/broadcasts/').json()), 2)
+        self.client.force_login(self.user)
+        self.assertEqual(len(self.client.get('/api/broadcasts/').json()), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, API_COMPRESSION_MIN_SIZE=512)
+class JSONRenderingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+        Broadcast.objects.bulk_create([
+            Broadcast(repositorio=repositorio, nombre_original=f'spot_{i}.mov', pizarra={'producto': 'Café'})
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_orjson_renderer_matches_drf(self):
+        import datetime
+        import decimal
+        import json
+        import uuid
+        from django.utils import timezone
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer
+        data = {'id': uuid.uuid4(), 'size': decimal.Decimal('1.5'), 'at': timezone.now(),
+                'day': datetime.date(2025, 1, 15), 'by_id': {1: 'x'}, 'nombre': 'Café',
+                'notas': 'línea\u2028separada\u2029fin', 'ratio': 0.1, 'items': [1.5, None, True]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b'\\u2028', ORJSONRenderer().render(data))
+
+        # Floats con exponente: mismo valor, distinta notación (1e16 vs 1e+16)
+        data = {'big': 1e16, 'small': 1e-7}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+        # NaN/Infinity se rechazan como en DRF (strict), también anidados
+        for value in (float('nan'), float('inf'), {'a': [1, {'b': float('-inf')}]}):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'x': value})
+                with self.assertRaises(ValueError):
+                    ORJSONRenderer().render({'x': value})
+
+    def test_json_responses_are_compressed(self):
+        import gzip
+        import json
+        plain = self.client.get('/api/broadcasts/')
+        self.assertNotIn('Content-Encoding', plain)
+
+        response = self.client.get('/api/broadcasts/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), plain.json())
+
+        response = self.client.get('/api/broadcasts/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        # Respuestas pequeñas no se comprimen
+        response = self.client.get('/api/auth/me/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_media_paths_are_not_compressed(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from .middleware import JSONCompressionMiddleware
+        body = b'{"x": "' + b'a' * 4096 + b'"}'
+        middleware = JSONCompressionMiddleware(lambda request: HttpResponse(body, content_type='application/json'))
+        request = RequestFactory().get('/media/encoded/info.json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', middleware(request))
+        request = RequestFactory().get('/api/anything/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(middleware(request)['Content-Encoding'], 'gzip')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, EVENTS_ENABLED=True, EVENTS_REDIS_URL='redis://localhost:6379/0')
+class ServerEventsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def setUp(self):
+        from . import events
+        events._retry_at = 0.0
+        self.redis = mock.Mock()
+        patcher = mock.patch.object(events, '_get_client', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _published(self):
+        import json
+        return [(c.args[0], json.loads(c.args[1])) for c in self.redis.publish.call_args_list]
+
+    def test_state_and_error_changes_are_published_per_repository(self):
+        b = Broadcast.objects.create(repositorio=self.repositorio, nombre_original='a.mov')
+        with self.captureOnCommitCallbacks(execute=True):
+            b.estado_transcodificacion = 'PROCESANDO'
+            b.save(update_fields=['estado_transcodificacion'])
+            # Columnas que el frontend no muestra no generan evento
+            b.archivo_presente = True
+            b.save(update_fields=['archivo_presente'])
+            ProcessingError.objects.create(repositorio=self.repositorio, broadcast=b, stage='transcode', error_message='x')
+
+        published = self._published()
+        self.assertEqual([m['event'] for _, m in published], ['asset.updated', 'error.created'])
+        channel, message = published[0]
+        self.assertEqual(channel, f'archivoplus:events:repo:{self.repositorio.pk}')
+        self.assertEqual((message['id'], message['estado']), (str(b.pk), 'PROCESANDO'))
+
+        # Nada se publica si la transacción no se confirma
+        self.redis.reset_mock()
+        with self.captureOnCommitCallbacks(execute=False):
+            b.save(update_fields=['estado_transcodificacion'])
+        self.assertEqual(self._published(), [])
+
+    def test_compaction_publishes_one_table_change_per_repository(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .errorlog import compact
+        for i in range(3):
+            ProcessingError.objects.create(repositorio=self.repositorio, stage='transcode', error_message='x', resolved=True)
+        ProcessingError.objects.update(fecha_creacion=timezone.now() - timedelta(days=60))
+        self.redis.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(compact(retention_days=30)['deleted'], 3)
+        self.assertEqual([m['event'] for _, m in self._published()], ['table.changed'])
+        self.assertEqual(self._published()[0][1]['tables'], ['processingerror'])
+
+    def test_event_stream_requires_access_to_repository(self):
+        from . import events
+        self.assertEqual(self.client.get('/api/events/').status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(f'/api/events/?repositorio={self.repositorio.pk}').status_code, 403)
+        # Sin repositorios visibles no hay nada que escuchar
+        self.assertEqual(self.client.get('/api/events/').status_code, 204)
+
+        self.client.force_login(self.admin)
+        with mock.patch.object(events, 'stream', return_value=iter(['retry: 5000\n\n', 'data: {}\n\n'])) as stream:
+            response = self.client.get(f'/api/events/?repositorio={self.repositorio.pk}')
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertEqual(b''.join(response.streaming_content), b'retry: 5000\n\ndata: {}\n\n')
+        stream.assert_called_once_with([f'archivoplus:events:repo:{self.repositorio.pk}'], [])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ASSET_STATUS_MAX_IDS=100)
+class AssetsStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import RepositorioPermiso
+        cls.user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x')
+        cls.repo_a = Repositorio.objects.create(nombre='A', clave='AAAA')
+        cls.repo_b = Repositorio.objects.create(nombre='B', clave='BBBB')
+        RepositorioPermiso.objects.create(usuario=cls.user, repositorio=cls.repo_a, puede_ver=True)
+        cls.broadcasts = Broadcast.objects.bulk_create([
+            Broadcast(repositorio=cls.repo_a, nombre_original=f'spot_{i}.mov', thumbnail=f'thumbnails/{i}.jpg')
+            for i in range(40)
+        ])
+        cls.audio = Audio.objects.create(repositorio=cls.repo_a, nombre_original='a.wav', estado_procesamiento='COMPLETADO')
+        cls.image = ImageAsset.objects.create(repositorio=cls.repo_a, nombre_original='i.jpg')
+        cls.ajeno = Broadcast.objects.create(repositorio=cls.repo_b, nombre_original='otro.mov')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _post(self, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/assets/status/', payload, content_type='application/json')
+        tables = ('core_broadcast', 'core_audio', 'core_imageasset', 'core_storageasset')
+        return response, [q for q in ctx.captured_queries if any(t in q['sql'] for t in tables)]
+
+    def test_batch_status_uses_one_query_per_table(self):
+        ids = [str(b.pk) for b in self.broadcasts]
+        response, queries = self._post({'broadcasts': ids, 'audios': [str(self.audio.pk)], 'images': [str(self.image.pk)]})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['results']), 42)
+        self.assertEqual(len(queries), 3)
+        row = next(r for r in data['results'] if r['id'] == ids[0])
+        self.assertEqual(set(row), {'id', 'tipo', 'estado', 'progress', 'thumbnail_url'})
+        self.assertEqual((row['estado'], row['progress']), ('PENDIENTE', 0))
+        self.assertTrue(row['thumbnail_url'].endswith('/media/thumbnails/0.jpg'))
+        audio = next(r for r in data['results'] if r['tipo'] == 'audios')
+        self.assertEqual(audio['progress'], 100)
+
+    def test_untyped_ids_respect_permissions_and_limit(self):
+        response, _ = self._post({'ids': [str(self.audio.pk), str(self.ajeno.pk), 'no-es-uuid']})
+        data = response.json()
+        self.assertEqual([r['id'] for r in data['results']], [str(self.audio.pk)])
+        self.assertEqual(data['not_found'], [str(self.ajeno.pk), 'no-es-uuid'])
+
+        response, _ = self._post({'ids': [str(self.audio.pk)] * 101})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ids_are_matched_after_normalization(self):
+        upper, compact = str(self.audio.pk).upper(), self.image.pk.hex
+        response, _ = self._post({'audios': [upper], 'images': [compact]})
+        data = response.json()
+        self.assertEqual({r['id'] for r in data['results']}, {str(self.audio.pk), str(self.image.pk)})
+        self.assertEqual(data['not_found'], [])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UploadDuplicateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='u', email='u@example.com', password='x')
+        from .models import RepositorioPermiso
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+        cls.ajeno = Repositorio.objects.create(nombre='Ajeno', clave='AJEN')
+        RepositorioPermiso.objects.create(usuario=cls.user, repositorio=cls.repositorio, puede_ver=True)
+        Broadcast.objects.create(repositorio=cls.repositorio, nombre_original='existe.mov')
+        Broadcast.objects.create(repositorio=cls.ajeno, nombre_original='oculto.mov')
+        ImageAsset.objects.create(repositorio=cls.repositorio, nombre_original='foto.jpg')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_precheck_validates_manifest_in_one_query(self):
+        files = ['nuevo.mov', {'name': 'carpeta/existe.mov'}, 'nuevo.mov', 'foto.jpg']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/uploads/precheck/', {'tipo': 'broadcast', 'files': files},
+                                        content_type='application/json')
+        data = response.json()
+        self.assertEqual(data['ok'], ['nuevo.mov', 'foto.jpg'])
+        self.assertEqual([d['name'] for d in data['duplicates']], ['existe.mov'])
+        self.assertEqual(data['duplicates'][0]['repositorio'], 'Repo')
+        self.assertEqual(data['repeated'], ['nuevo.mov'])
+        self.assertEqual(len([q for q in ctx.captured_queries if 'core_broadcast' in q['sql']]), 1)
+
+        response = self.client.post('/api/uploads/precheck/', {'tipo': 'images', 'files': ['foto.jpg']},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['ok'], [])
+        self.assertEqual(self.client.post('/api/uploads/precheck/', {'tipo': 'x', 'files': ['a']},
+                                          content_type='application/json').status_code, 400)
+
+        # Un duplicado en un repositorio que el usuario no ve se rechaza sin revelar el asset
+        response = self.client.post('/api/uploads/precheck/', {'tipo': 'broadcast', 'files': ['oculto.mov']},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['duplicates'], [{'name': 'oculto.mov', 'id': None, 'repositorio': None}])
+
+    def test_concurrent_uploads_with_same_name_are_rejected(self):
+        from rest_framework.exceptions import ValidationError
+        from .duplicates import reserve_name
+        from .serializers import ImageAssetSerializer
+
+        # Otro upload con el mismo nombre está en curso
+        self.assertTrue(reserve_name(ImageAsset, 'simultaneo.jpg'))
+        with self.assertRaises(ValidationError):
+            ImageAssetSerializer().check_upload_name('simultaneo.jpg', 'una imagen')
+
+        serializer = ImageAssetSerializer()
+        serializer.check_upload_name('libre.jpg', 'una imagen')
+        self.assertFalse(reserve_name(ImageAsset, 'libre.jpg'))
+        serializer.release_upload_name()
+        self.assertTrue(reserve_name(ImageAsset, 'libre.jpg'))
+
+        # Un nombre ya existente se rechaza y no deja la reserva tomada
+        with self.assertRaises(ValidationError):
+            ImageAssetSerializer().check_upload_name('foto.jpg', 'una imagen')
+        self.assertTrue(reserve_name(ImageAsset, 'foto.jpg'))
+
+    def test_name_lock_is_taken_on_save_not_on_validate(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.exceptions import ValidationError
+        from .duplicates import release_name, reserve_name
+        from .serializers import StorageAssetSerializer
+
+        serializer = StorageAssetSerializer(data={'repositorio': self.repositorio.pk, 'nombre_original': 'doc.pdf',
+                                                  'archivo_original': SimpleUploadedFile('doc.pdf', b'%PDF')})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        # is_valid() no reservó el nombre: si la petición falla antes de save() no queda bloqueado
+        self.assertTrue(reserve_name(StorageAsset, 'doc.pdf'))
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.assertFalse(StorageAsset.objects.filter(nombre_original='doc.pdf').exists())
+        release_name(StorageAsset, 'doc.pdf')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProcessingErrorFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def _error(self, **kwargs):
+        return ProcessingError.objects.create(repositorio=self.repositorio, stage='transcode', error_message='x', **kwargs)
+
+    def test_since_returns_only_new_errors(self):
+        for _ in range(3):
+            self._error()
+        url = f'/api/processing-errors/?repositorio={self.repositorio.pk}'
+        self.assertIsInstance(self.client.get(url).json(), list)
+
+        first = self.client.get(f'{url}&since=&page_size=2').json()
+        self.assertEqual((len(first['results']), first['has_more']), (2, True))
+
+        empty = self.client.get(f'{url}&since={first["since"]}').json()
+        self.assertEqual((empty['results'], empty['since']), ([], first['since']))
+
+        nuevos = [self._error(), self._error()]
+        data = self.client.get(f'{url}&since={first["since"]}').json()
+        self.assertEqual({e['id'] for e in data['results']}, {str(e.pk) for e in nuevos})
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.client.get(f'{url}&since={data["since"]}').json()['results'], [])
+        self.assertEqual(self.client.get(f'{url}&since=basura').status_code, 404)
+
+    def test_rollup_and_compaction(self):
+        import zlib
+        from datetime import timedelta
+        from django.utils import timezone
+        from .errorlog import compact
+        from .models import ProcessingErrorDetalle, ProcessingErrorRollup
+
+        completado = Broadcast.objects.create(repositorio=self.repositorio, estado_transcodificacion='COMPLETADO')
+        pendiente = Broadcast.objects.create(repositorio=self.repositorio, estado_transcodificacion='ERROR')
+        stderr = 'frame=1 fps=0\n' * 500
+        viejo = self._error(broadcast=completado)
+        largo = ProcessingError.objects.create(repositorio=self.repositorio, broadcast=pendiente,
+                                               stage='transcode', error_message=stderr)
+        reciente = self._error(broadcast=completado)
+        hace = timezone.now() - timedelta(days=40)
+        ProcessingError.objects.filter(pk__in=[viejo.pk, largo.pk]).update(fecha_creacion=hace)
+
+        self.assertEqual(sum(ProcessingErrorRollup.objects.values_list('total', flat=True)), 3)
+        stats = compact(retention_days=30, archive_days=7, min_length=1000)
+        self.assertEqual(stats, {'resolved': 2, 'archived': 1, 'deleted': 1})
+
+        self.assertFalse(ProcessingError.objects.filter(pk=viejo.pk).exists())
+        self.assertTrue(ProcessingError.objects.get(pk=reciente.pk).resolved)
+        largo.refresh_from_db()
+        self.assertLess(len(largo.error_message), 1100)
+        detalle = ProcessingErrorDetalle.objects.get(error=largo)
+        self.assertEqual(zlib.decompress(bytes(detalle.contenido)).decode(), stderr)
+        response = self.client.get(f'/api/processing-errors/{largo.pk}/stderr/').json()
+        self.assertEqual((response['archivado'], response['error_message']), (True, stderr))
+
+        # Los conteos sobreviven a la purga
+        rollup = self.client.get(f'/api/processing-errors/rollup/?repositorio={self.repositorio.pk}').json()
+        self.assertEqual((rollup['total'], rollup['por_stage']), (3, {'transcode': 3}))
+        self.assertEqual(self.client.get('/api/processing-errors/rollup/?desde=ayer').status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SharedLinkCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import SharedLink
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+        cls.broadcast = Broadcast.objects.create(repositorio=cls.repositorio, nombre_original='spot.mov')
+        cls.link = SharedLink.objects.create(broadcast=cls.broadcast, titulo='Spot')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_public_traffic_is_buffered_and_flushed(self):
+        from .sharelinks import flush
+        url = f'/api/shared/{self.link.pk}/'
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(4):
+                self.assertEqual(self.client.get(url).status_code, 200)
+            response = self.client.post(url, {'action': 'play'}, content_type='application/json')
+        self.assertEqual(response.json()['reproducciones'], 1)
+        self.assertEqual([q for q in ctx.captured_queries if 'core_sharedlink' in q['sql']], [])
+
+        self.link.refresh_from_db()
+        self.assertEqual((self.link.vistas, self.link.reproducciones), (0, 0))
+        self.assertEqual(flush(), {'events': 6, 'links': 1})
+        self.link.refresh_from_db()
+        self.assertEqual((self.link.vistas, self.link.reproducciones), (5, 1))
+        self.assertIsNotNone(self.link.ultima_visita)
+        self.assertEqual(flush(), {'events': 0, 'links': 0})
+
+    def test_visit_during_flush_keeps_latest_visit_date(self):
+        from datetime import datetime, timezone as dt_timezone
+        from . import sharelinks
+
+        antes = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        despues = datetime(2026, 1, 2, tzinfo=dt_timezone.utc)
+        with mock.patch.object(sharelinks, 'datetime', wraps=datetime) as dt:
+            dt.now.return_value = antes
+            sharelinks.record(self.link.pk, 'vistas')
+            real_get_many = cache.get_many
+
+            def get_many_then_visit(keys):
+                values = real_get_many(keys)
+                # Otra visita llega después de leer y antes de terminar el flush
+                dt.now.return_value = despues
+                sharelinks.record(self.link.pk, 'vistas')
+                return values
+
+            with mock.patch.object(sharelinks.cache, 'get_many', side_effect=get_many_then_visit):
+                sharelinks.flush()
+        self.link.refresh_from_db()
+        self.assertEqual((self.link.vistas, self.link.ultima_visita), (1, antes))
+
+        sharelinks.flush()
+        self.link.refresh_from_db()
+        self.assertEqual((self.link.vistas, self.link.ultima_visita), (2, despues))
+
+    def test_flush_only_visits_links_marked_dirty(self):
+        from . import sharelinks
+
+        class FakeRedisSet:
+            def __init__(self):
+                self.members = set()
+
+            def sadd(self, key, *values):
+                self.members.update(v.encode() for v in values)
+
+            def spop(self, key, count):
+                return [self.members.pop() for _ in range(min(count, len(self.members)))]
+
+        fake = FakeRedisSet()
+        with mock.patch.object(sharelinks, '_dirty_set', return_value=(fake, 'sharelink:dirty')):
+            sharelinks.record(self.link.pk, 'vistas')
+            self.assertEqual(fake.members, {str(self.link.pk).encode()})
+            with mock.patch.object(sharelinks, '_all_batches') as all_batches:
+                self.assertEqual(sharelinks.flush(), {'events': 1, 'links': 1})
+            all_batches.assert_not_called()
+            self.assertEqual(fake.members, set())
+
+            # Si el flush falla los links regresan al SET (los contadores siguen en cache)
+            sharelinks.record(self.link.pk, 'reproducciones')
+            with mock.patch.object(sharelinks, '_flush_batch', side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError):
+                    sharelinks.flush()
+            self.assertEqual(fake.members, {str(self.link.pk).encode()})
+            self.assertEqual(sharelinks.flush(), {'events': 1, 'links': 1})
+        self.link.refresh_from_db()
+        self.assertEqual((self.link.vistas, self.link.reproducciones), (1, 1))
+
+    def test_edits_invalidate_cached_link(self):
+        url = f'/api/shared/{self.link.pk}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.link.activo = False
+        self.link.save()
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.link.activo = True
+        self.link.save()
+
+        self.broadcast.ruta_proxy = 'proxies/spot.mp4'
+        self.broadcast.save(update_fields=['ruta_proxy'])
+        self.assertIn('proxies/spot.mp4', self.client.get(url).json()['broadcast_data']['video_url'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, WORKER_HEARTBEAT_TTL=30, WORKER_REGISTRY_REFRESH=10)
+class WorkerRegistryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_registry_tracks_heartbeats_and_queues(self):
+        from . import workers
+        from .views import BroadcastViewSet
+
+        with mock.patch('celery.app.control.Inspect.stats') as stats:
+            self.assertFalse(BroadcastViewSet()._celery_workers_online())
+            workers.register('w1@host', queues=['celery', 'video'])
+            workers.register('w2@host', queues=['celery'])
+            self.assertTrue(BroadcastViewSet()._celery_workers_online())
+            stats.assert_not_called()
+        self.assertEqual(workers.snapshot()['queues'], {'celery': 2, 'video': 1})
+        self.assertFalse(workers.workers_online('audio'))
+
+        # Sin heartbeat durante más de WORKER_HEARTBEAT_TTL el worker se da por caído
+        with mock.patch('core.workers.time.time', return_value=time.time() + 31):
+            self.assertEqual(workers.snapshot()['workers'], [])
+            workers.heartbeat()
+            self.assertEqual([w['hostname'] for w in workers.snapshot()['workers']], ['w2@host'])
+
+        workers.unregister('w2@host')
+        workers.register('w1@host', queues=['celery', 'video'])
+        admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+        data = self.client.get('/api/health/workers/').json()
+        self.assertEqual((data['online'], data['queues']), (True, {'celery': 1, 'video': 1}))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, EVENTS_ENABLED=False)
+class ChunkedUploadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def setUp(self):
+        import tempfile
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.media_root = tmp.name
+        self.client.force_login(self.user)
+
+    def _open(self, nombre, data, tipo='broadcast'):
+        return self.client.post('/api/uploads/sessions/', {
+            'tipo': tipo, 'nombre': nombre, 'tamano': len(data), 'chunk_size': 256 * 1024,
+            'repositorio': self.repositorio.pk, 'pizarra': {'producto': 'Spot'},
+        }, content_type='application/json')
+
+    def _put(self, session_id, indice, body, **headers):
+        return self.client.put(f'/api/uploads/sessions/{session_id}/chunks/{indice}/', body,
+                               content_type='application/octet-stream', **headers)
+
+    def test_parallel_chunks_resume_and_commit(self):
+        import base64
+        import hashlib
+        data = os.urandom(600 * 1024)
+        size = 256 * 1024
+        parts = [data[i:i + size] for i in range(0, len(data), size)]
+
+        response = self._open('master.mov', data)
+        self.assertEqual(response.status_code, 201)
+        session = response.json()
+        self.assertEqual((session['total_chunks'], session['faltantes']), (3, [0, 1, 2]))
+
+        # Partes fuera de orden; una con checksum equivocado se rechaza
+        self.assertEqual(self._put(session['id'], 2, parts[2]).status_code, 200)
+        bad = 'sha256 ' + base64.b64encode(hashlib.sha256(b'otra cosa').digest()).decode()
+        self.assertEqual(self._put(session['id'], 0, parts[0], HTTP_UPLOAD_CHECKSUM=bad).status_code, 400)
+        self.assertEqual(self._put(session['id'], 1, parts[1][:-1]).status_code, 400)
+        good = 'sha256 ' + base64.b64encode(hashlib.sha256(parts[0]).digest()).decode()
+        self.assertEqual(self._put(session['id'], 0, parts[0], HTTP_UPLOAD_CHECKSUM=good).status_code, 200)
+
+        status_ = self.client.get(f'/api/uploads/sessions/{session["id"]}/')
+        self.assertEqual((status_.json()['faltantes'], status_['Upload-Offset']), ([1], str(size)))
+        self.assertEqual(self.client.post(f'/api/uploads/sessions/{session["id"]}/commit/').status_code, 400)
+
+        self.assertEqual(self._put(session['id'], 1, parts[1]).status_code, 200)
+        with mock.patch('core.tasks.transcode_video.delay') as delay, mock.patch('core.tasks.hash_media_file.delay') as hash_delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/uploads/sessions/{session["id"]}/commit/')
+        self.assertEqual(response.status_code, 201)
+        delay.assert_called_once_with(session['id'])
+        # Una parte que llega después del commit no toca el archivo del asset
+        self.assertEqual(self._put(session['id'], 1, parts[1]).status_code, 409)
+
+        broadcast = Broadcast.objects.get(pk=session['id'])
+        self.assertEqual((broadcast.nombre_original, broadcast.file_size, broadcast.pizarra['producto']),
+                         ('master.mov', len(data), 'Spot'))
+        with open(os.path.join(self.media_root, broadcast.archivo_original.name), 'rb') as f:
+            self.assertEqual(f.read(), data)
+        expected = hashlib.sha256(''.join(hashlib.sha256(p).hexdigest() for p in parts).encode()).hexdigest()
+        self.assertEqual(response.json()['sha256'], expected)
+
+        # El archivo queda en el inventario al confirmar; el sha256 completo lo calcula la tarea
+        from .models import MediaFile
+        from .tasks import hash_media_file
+        relpath = broadcast.archivo_original.name
+        self.assertTrue(MediaFile.objects.filter(path=relpath, size=len(data)).exists())
+        hash_delay.assert_called_once_with(relpath)
+        self.assertEqual(hash_media_file(relpath), hashlib.sha256(data).hexdigest())
+        self.assertEqual(MediaFile.objects.get(path=relpath).sha256, hashlib.sha256(data).hexdigest())
+
+        # El nombre ya existe: no se puede abrir otra sesión
+        self.assertEqual(self._open('master.mov', data).status_code, 400)
+
+    def test_cancel_and_cleanup_remove_partial_file(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import UploadSession
+        from .uploads import cleanup
+
+        data = b'x' * (300 * 1024)
+        first = self._open('a.wav', data, tipo='audio').json()
+        second = self._open('b.wav', data, tipo='audio').json()
+        path = os.path.join(self.media_root, UploadSession.objects.get(pk=first['id']).ruta)
+        self.assertEqual(os.path.getsize(path), len(data))
+
+        self.assertEqual(self.client.delete(f'/api/uploads/sessions/{first["id"]}/').status_code, 204)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self._put(first['id'], 0, data[:256 * 1024]).status_code, 409)
+        # cancel() en otra petición ya borró el archivo pero la sesión se leyó abierta
+        with mock.patch('core.uploads._path', return_value=path):
+            self.assertEqual(self._put(second['id'], 0, data[:256 * 1024]).status_code, 409)
+
+        UploadSession.objects.filter(pk=second['id']).update(fecha_actualizacion=timezone.now() - timedelta(days=2))
+        self.assertEqual(cleanup(), {'expiradas': 1})
+        self.assertEqual(UploadSession.objects.get(pk=second['id']).estado, 'CANCELADA')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, EVENTS_ENABLED=False, MEDIA_INVENTORY_ROOTS=['sources'], FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+class UploadHandlerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.repositorio = Repositorio.objects.create(nombre='Repo', clave='REPO')
+
+    def setUp(self):
+        import tempfile
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name, UPLOAD_TEMP_DIR='')
+        media.enable()
+        self.addCleanup(media.disable)
+        self.media_root = tmp.name
+        self.client.force_login(self.user)
+
+    def test_large_upload_is_renamed_into_place_with_hash(self):
+        import hashlib
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import MediaFile
+
+        data = os.urandom(64 * 1024)
+        renames = []
+        real_rename = os.rename
+
+        def rename(src, dst):
+            renames.append((src, dst))
+            return real_rename(src, dst)
+
+        with mock.patch('django.core.files.move.os.rename', side_effect=rename), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/storage/', {
+                'repositorio': self.repositorio.pk,
+                'nombre_original': 'manual',
+                'archivo_original': SimpleUploadedFile('manual.pdf', data, content_type='application/pdf'),
+            })
+        self.assertEqual(response.status_code, 201, response.content)
+        asset = StorageAsset.objects.get(pk=response.json()['id'])
+
+        # El temporal estaba dentro de MEDIA_ROOT y se movió sin copiar
+        self.assertEqual(len(renames), 1)
+        src, dst = renames[0]
+        self.assertEqual(os.path.dirname(src), os.path.join(self.media_root, '.uploads'))
+        self.assertEqual(dst, os.path.join(self.media_root, asset.archivo_original.name))
+        self.assertEqual(os.listdir(os.path.join(self.media_root, '.uploads')), [])
+
+        self.assertEqual(asset.file_size, len(data))
+        self.assertEqual(MediaFile.objects.get(path=asset.archivo_original.name).sha256, hashlib.sha256(data).hexdigest())
+
+    def test_small_uploads_are_inventoried_without_hash(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import MediaFile
+
+        # Por debajo de FILE_UPLOAD_MAX_MEMORY_SIZE el archivo queda en memoria: no hay sha256, pero sí inventario
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/storage/', {
+                'repositorio': self.repositorio.pk,
+                'nombre_original': 'nota',
+                'archivo_original': SimpleUploadedFile('nota.txt', b'hola', content_type='text/plain'),
+            })
+        self.assertEqual(response.status_code, 201, response.content)
+        asset = StorageAsset.objects.get(pk=response.json()['id'])
+        self.assertEqual(MediaFile.objects.get(path=asset.archivo_original.name).sha256, '')
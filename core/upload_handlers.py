@@ -0,0 +1,80 @@
+"""
+Upload handler que escribe los archivos grandes directo en el volumen de MEDIA_ROOT.
+
+Con ``TemporaryFileUploadHandler`` el archivo se escribe primero en /tmp y luego
+el storage lo copia a ``MEDIA_ROOT/sources/``; si /tmp está en otro disco que
+MEDIA_ROOT (p. ej. /Volumes/SSD/media) cada byte se escribe dos veces.
+``MediaRootUploadHandler`` crea el temporal en ``UPLOAD_TEMP_DIR`` (una carpeta
+oculta dentro de MEDIA_ROOT), así que ``FileSystemStorage`` lo mueve con un
+``os.rename`` atómico en lugar de copiarlo. El sha256 se calcula mientras llegan
+los bytes y se guarda en el inventario (MediaFile) al crear el asset.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+logger = logging.getLogger(__name__)
+
+
+def upload_temp_dir():
+    path = getattr(settings, 'UPLOAD_TEMP_DIR', None) or os.path.join(settings.MEDIA_ROOT, '.uploads')
+    os.makedirs(path, exist_ok=True)
+    return str(path)
+
+
+class MediaRootUploadedFile(TemporaryUploadedFile):
+    """TemporaryUploadedFile en el volumen de MEDIA_ROOT, con ``sha256`` al terminar de recibirse."""
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(suffix='.upload' + ext, dir=upload_temp_dir())
+        UploadedFile.__init__(self, file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = None
+
+
+class MediaRootUploadHandler(TemporaryFileUploadHandler):
+    """Reemplaza a TemporaryFileUploadHandler en FILE_UPLOAD_HANDLERS."""
+
+    def new_file(self, *args, **kwargs):
+        super(TemporaryFileUploadHandler, self).new_file(*args, **kwargs)
+        self.file = MediaRootUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+        self.digest.update(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.sha256 = self.digest.hexdigest()
+        return super().file_complete(file_size)
+
+
+def record_upload(relpath, sha256):
+    """Guarda en el inventario el hash calculado al recibir el archivo (scan --hash no lo recalcula)."""
+    from . import inventory
+    try:
+        inventory.sync_path(relpath, sha256=sha256)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo registrar {relpath} en el inventario: {e}")
+
+
+def cleanup_temp_dir(max_age=24 * 60 * 60):
+    """Borra temporales huérfanos (procesos que murieron a media subida)."""
+    path = upload_temp_dir()
+    limite = time.time() - max_age
+    removed = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < limite:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"⚠️ No se pudo borrar el temporal {entry.path}: {e}")
+    return removed
@@ -0,0 +1,124 @@
+"""
+Endpoints de upload reanudable por partes (protocolo en core.uploads).
+
+POST   /api/uploads/sessions/                    {tipo, nombre, tamano, repositorio, directorio?, modulo?, pizarra?|metadata?, chunk_size?}
+GET    /api/uploads/sessions/<id>/               estado: partes recibidas, faltantes y offset contiguo
+PUT    /api/uploads/sessions/<id>/chunks/<n>/    cuerpo binario de la parte n; header opcional Upload-Checksum: sha256 <base64>
+POST   /api/uploads/sessions/<id>/commit/        crea el asset y dispara su procesamiento
+DELETE /api/uploads/sessions/<id>/               cancela la sesión
+"""
+import io
+import os
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import uploads
+from .authz import get_context
+from .models import Directorio, Modulo, Repositorio, UploadSession
+
+TIPOS = {
+    'broadcast': 'broadcast', 'broadcasts': 'broadcast',
+    'audio': 'audio', 'audios': 'audio',
+    'image': 'image', 'images': 'image',
+    'storage': 'storage',
+}
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _get_session(request, session_id):
+    # Cada sesión solo la usa quien la abrió
+    return get_object_or_404(UploadSession, pk=session_id, creado_por=request.user)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_sessions(request):
+    data = request.data if isinstance(request.data, dict) else {}
+    tipo = TIPOS.get(str(data.get('tipo') or 'broadcast').lower())
+    if tipo is None:
+        return Response({'error': 'tipo inválido (broadcast | audio | images | storage)'}, status=status.HTTP_400_BAD_REQUEST)
+    # Igual que en el upload normal: solo cuenta el nombre del archivo, no la carpeta
+    nombre = os.path.basename(str(data.get('nombre') or '').replace('\\', '/')).strip()
+    if not nombre:
+        return Response({'error': 'nombre es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+    tamano = _int(data.get('tamano'))
+    max_size = getattr(settings, 'UPLOAD_MAX_SIZE', 200 * 1024 ** 3)
+    if tamano is None or not 0 < tamano <= max_size:
+        return Response({'error': f'tamano debe ser un entero entre 1 y {max_size}'}, status=status.HTTP_400_BAD_REQUEST)
+    repositorio = _int(data.get('repositorio'))
+    if repositorio is None:
+        return Response({'error': 'repositorio es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+    if not get_context(request.user).puede_ver(repositorio):
+        return Response({'error': 'No tienes acceso a este repositorio'}, status=status.HTTP_403_FORBIDDEN)
+    chunk_size = _int(data.get('chunk_size')) if data.get('chunk_size') else None
+
+    datos = {'repositorio': repositorio, 'directorio': _int(data.get('directorio')), 'modulo': _int(data.get('modulo'))}
+    # Se validan ahora para no descubrirlo hasta el commit, con el archivo ya subido
+    if not Repositorio.objects.filter(pk=repositorio).exists():
+        return Response({'error': 'Repositorio no encontrado'}, status=status.HTTP_400_BAD_REQUEST)
+    if datos['directorio'] and not Directorio.objects.filter(pk=datos['directorio'], repositorio_id=repositorio).exists():
+        return Response({'error': 'El directorio no pertenece al repositorio'}, status=status.HTTP_400_BAD_REQUEST)
+    if datos['modulo'] and not Modulo.objects.filter(pk=datos['modulo']).exists():
+        return Response({'error': 'Módulo no encontrado'}, status=status.HTTP_400_BAD_REQUEST)
+    json_field = uploads.JSON_FIELDS.get(tipo)
+    if json_field and isinstance(data.get(json_field), dict):
+        datos[json_field] = data[json_field]
+
+    session = uploads.open_session(request.user, tipo, nombre, tamano, datos, chunk_size=chunk_size)
+    response = Response(uploads.status(session), status=status.HTTP_201_CREATED)
+    response['Location'] = request.build_absolute_uri(f'/api/uploads/sessions/{session.pk}/')
+    return response
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session_detail(request, session_id):
+    session = _get_session(request, session_id)
+    if request.method == 'DELETE':
+        uploads.cancel(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    data = uploads.status(session)
+    response = Response(data)
+    response['Upload-Offset'] = str(data['offset'])
+    response['Upload-Length'] = str(session.tamano)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def upload_chunk(request, session_id, indice):
+    session = _get_session(request, session_id)
+    # Se lee el cuerpo por bloques desde el stream (sin request.body ni parsers)
+    stream = request.stream or io.BytesIO()
+    sha256 = uploads.write_chunk(session, indice, stream, checksum=request.headers.get('Upload-Checksum'))
+    return Response({'indice': indice, 'sha256': sha256})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_session_commit(request, session_id):
+    from .serializers import BroadcastSerializer, AudioSerializer, ImageAssetSerializer, StorageAssetSerializer
+
+    session = _get_session(request, session_id)
+    asset = uploads.commit(session)
+    serializer_class = {
+        'broadcast': BroadcastSerializer, 'audio': AudioSerializer,
+        'image': ImageAssetSerializer, 'storage': StorageAssetSerializer,
+    }[session.tipo]
+    return Response({
+        'sha256': session.sha256,
+        'tipo': session.tipo,
+        'asset': serializer_class(asset, context={'request': request}).data,
+    }, status=status.HTTP_201_CREATED)
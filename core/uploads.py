@@ -0,0 +1,310 @@
+"""
+Uploads reanudables por partes (estilo tus) para masters de varios GB.
+
+Flujo (ver core.upload_views):
+  1. POST   /api/uploads/sessions/                   -> crea la sesión y el archivo en sources/
+  2. PUT    /api/uploads/sessions/<id>/chunks/<n>/   -> cuerpo = bytes de la parte n (en paralelo, cualquier orden)
+  3. GET    /api/uploads/sessions/<id>/              -> partes recibidas / faltantes (para reanudar)
+  4. POST   /api/uploads/sessions/<id>/commit/       -> crea el asset y dispara su procesamiento
+     DELETE /api/uploads/sessions/<id>/              -> cancela y borra el archivo parcial
+
+El archivo se crea con su tamaño final y cada parte se escribe con ``os.pwrite``
+en su offset, así que no hay archivos temporales ni un ensamblado final: al
+confirmar, el asset apunta al mismo archivo. Cada parte se hashea (sha256)
+mientras se escribe; el ``sha256`` de la sesión es el sha256 de la lista de
+hashes de las partes en orden, que se calcula sin volver a leer el archivo.
+Como las partes llegan en cualquier orden, el sha256 del archivo completo (el
+del inventario, MediaFile) lo calcula una tarea (``hash_media_file``) después
+del commit.
+"""
+import base64
+import hashlib
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status as http_status
+from rest_framework.exceptions import APIException, ValidationError
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1024 * 1024
+# Campo JSON que recibe los metadatos libres de cada tipo de asset
+JSON_FIELDS = {'broadcast': 'pizarra', 'audio': 'metadata', 'storage': 'metadata'}
+ETIQUETAS = {'broadcast': 'un archivo', 'audio': 'un archivo de audio', 'image': 'una imagen', 'storage': 'un archivo'}
+
+
+class UploadConflict(APIException):
+    """La sesión ya se confirmó o se canceló, o la parte se está escribiendo en otra petición (409)."""
+    status_code = http_status.HTTP_409_CONFLICT
+    default_detail = 'La sesión ya no está abierta'
+    default_code = 'conflict'
+
+
+def _check_open(session):
+    if session.estado != 'ABIERTA':
+        raise UploadConflict({'estado': f'La sesión está {session.estado.lower()}'})
+
+
+def asset_model(tipo):
+    from .models import Broadcast, Audio, ImageAsset, StorageAsset
+    return {'broadcast': Broadcast, 'audio': Audio, 'image': ImageAsset, 'storage': StorageAsset}[tipo]
+
+
+def _path(session):
+    return os.path.join(settings.MEDIA_ROOT, session.ruta)
+
+
+def _check_name(tipo, nombre, exclude_session=None):
+    from .duplicates import find_existing
+    from .models import UploadSession
+
+    existing = find_existing(asset_model(tipo), nombre)
+    if existing:
+        raise ValidationError({
+            'nombre': f'Ya existe {ETIQUETAS[tipo]} con el nombre "{nombre}" en el repositorio {existing.repositorio.nombre}. No se permiten duplicados.'
+        })
+    abiertas = UploadSession.objects.filter(tipo=tipo, nombre_original=nombre, estado='ABIERTA')
+    if exclude_session is not None:
+        abiertas = abiertas.exclude(pk=exclude_session)
+    if abiertas.filter(fecha_actualizacion__gte=timezone.now() - _ttl()).exists():
+        raise ValidationError({'nombre': f'Ya se está subiendo {ETIQUETAS[tipo]} con el nombre "{nombre}". No se permiten duplicados.'})
+
+
+def _ttl():
+    return timedelta(hours=getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24))
+
+
+def open_session(user, tipo, nombre, tamano, datos, chunk_size=None):
+    """Crea la sesión y reserva el archivo (tamaño final, sin escribir bytes)."""
+    from .models import UploadSession
+
+    chunk_size = chunk_size or getattr(settings, 'UPLOAD_CHUNK_SIZE', 16 * 1024 * 1024)
+    max_chunk = getattr(settings, 'UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024)
+    if not 256 * 1024 <= chunk_size <= max_chunk:
+        raise ValidationError({'chunk_size': f'Debe estar entre 256 KB y {max_chunk} bytes'})
+    _check_name(tipo, nombre)
+
+    # El asset tendrá el id de la sesión: misma ruta que upload_to_originals (sources/<id[:8]><ext>)
+    ext = os.path.splitext(nombre)[1]
+    sources = os.path.join(settings.MEDIA_ROOT, 'sources')
+    os.makedirs(sources, exist_ok=True)
+    while True:
+        session_id = uuid.uuid4()
+        ruta = f'sources/{str(session_id)[:8]}{ext}'
+        try:
+            fd = os.open(os.path.join(settings.MEDIA_ROOT, ruta), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            break
+        except FileExistsError:
+            continue
+    try:
+        # Archivo disperso con el tamaño final: las partes se escriben en su offset
+        os.ftruncate(fd, tamano)
+    finally:
+        os.close(fd)
+
+    session = UploadSession.objects.create(
+        id=session_id, tipo=tipo, nombre_original=nombre, tamano=tamano, chunk_size=chunk_size,
+        ruta=ruta, datos=datos, creado_por=user,
+    )
+    logger.info(f"⬆️ Sesión de upload {session.pk}: {nombre} ({tamano} bytes, {session.total_chunks} partes)")
+    return session
+
+
+def _expected_digest(header):
+    """``Upload-Checksum: sha256 <base64>`` (tus) o el hex directo; regresa el hex o None."""
+    if not header:
+        return None
+    algoritmo, _, valor = header.strip().partition(' ')
+    if not valor:
+        algoritmo, valor = 'sha256', algoritmo
+    if algoritmo.lower() != 'sha256':
+        raise ValidationError({'checksum': 'Solo se admite sha256'})
+    valor = valor.strip()
+    if len(valor) == 64:
+        return valor.lower()
+    try:
+        return base64.b64decode(valor).hex()
+    except (ValueError, TypeError):
+        raise ValidationError({'checksum': 'Checksum inválido'})
+
+
+def write_chunk(session, indice, stream, checksum=None):
+    """
+    Escribe la parte ``indice`` leyendo ``stream`` por bloques, directo en su offset.
+    Los bytes se escriben sin bloquear la sesión (las partes llegan en paralelo);
+    la parte se registra con la fila de la sesión bloqueada (select_for_update), así
+    que dos PUT de la misma parte no chocan y una sesión cancelada o confirmada
+    mientras tanto regresa 409.
+    """
+    from .models import UploadChunk, UploadSession
+
+    session.refresh_from_db(fields=['estado'])
+    _check_open(session)
+    if not 0 <= indice < session.total_chunks:
+        raise ValidationError({'indice': f'La sesión tiene {session.total_chunks} partes (0-{session.total_chunks - 1})'})
+    expected_digest = _expected_digest(checksum)
+    offset, expected = session.chunk_range(indice)
+
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        fd = os.open(_path(session), os.O_WRONLY)
+    except FileNotFoundError:
+        # cancel() borró el archivo parcial entre la verificación y la escritura
+        raise UploadConflict({'estado': 'La sesión está cancelada'})
+    try:
+        while written < expected:
+            data = stream.read(min(READ_SIZE, expected - written))
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                n = os.pwrite(fd, view, offset + written)
+                view = view[n:]
+                written += n
+            digest.update(data)
+        sobrante = stream.read(1)
+    finally:
+        os.close(fd)
+
+    if written != expected or sobrante:
+        raise ValidationError({'indice': f'La parte {indice} debe medir {expected} bytes'})
+    sha256 = digest.hexdigest()
+    if expected_digest and expected_digest != sha256:
+        raise ValidationError({'checksum': f'El sha256 de la parte {indice} no coincide'})
+
+    try:
+        with transaction.atomic():
+            locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+            _check_open(locked)
+            UploadChunk.objects.update_or_create(session=locked, indice=indice, defaults={'tamano': written, 'sha256': sha256})
+            # Mantiene viva la sesión para cleanup_upload_sessions
+            UploadSession.objects.filter(pk=session.pk).update(fecha_actualizacion=timezone.now())
+    except IntegrityError:
+        # SQLite no bloquea filas: otro PUT de la misma parte la registró primero
+        raise UploadConflict({'indice': f'La parte {indice} se está subiendo en otra petición'})
+    return sha256
+
+
+def status(session):
+    recibidas = list(session.chunks.order_by('indice').values_list('indice', 'tamano'))
+    indices = {i for i, _ in recibidas}
+    # Offset contiguo (Upload-Offset de tus) para clientes que suben en orden
+    offset = 0
+    for i in range(session.total_chunks):
+        if i not in indices:
+            break
+        offset += session.chunk_range(i)[1]
+    return {
+        'id': str(session.pk),
+        'tipo': session.tipo,
+        'nombre': session.nombre_original,
+        'estado': session.estado,
+        'tamano': session.tamano,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'recibidos': sum(t for _, t in recibidas),
+        'offset': offset,
+        'faltantes': [i for i in range(session.total_chunks) if i not in indices],
+        'sha256': session.sha256 or None,
+    }
+
+
+def _asset_fields(session):
+    datos = session.datos or {}
+    ext = os.path.splitext(session.nombre_original)[1].lower()
+    fields = {
+        'id': session.pk,
+        'repositorio_id': datos['repositorio'],
+        'directorio_id': datos.get('directorio'),
+        'modulo_id': datos.get('modulo'),
+        'creado_por': session.creado_por,
+        'archivo_original': session.ruta,
+        'nombre_original': session.nombre_original,
+        'file_size': session.tamano,
+    }
+    json_field = JSON_FIELDS.get(session.tipo)
+    if json_field and isinstance(datos.get(json_field), dict):
+        fields[json_field] = datos[json_field]
+    if session.tipo == 'broadcast':
+        fields.update(archivo_presente=True, estado_transcodificacion='PROCESANDO')
+    elif session.tipo == 'audio':
+        fields['estado_procesamiento'] = 'PROCESANDO'
+    elif session.tipo == 'image':
+        fields['tipo_archivo'] = ext or None
+    elif session.tipo == 'storage':
+        fields.update(tipo_archivo=ext or 'unknown', estado='COMPLETADO')
+    return fields
+
+
+def commit(session):
+    """Verifica que estén todas las partes, crea el asset y encola su procesamiento."""
+    from .duplicates import release_name, reserve_name
+    from .models import UploadSession
+    from .tasks import hash_media_file, transcode_video, process_audio, process_image
+    from .upload_handlers import record_upload
+
+    _check_open(session)
+    chunks = list(session.chunks.order_by('indice').values_list('indice', 'sha256'))
+    faltantes = session.total_chunks - len(chunks)
+    if faltantes:
+        raise ValidationError({'faltantes': f'Faltan {faltantes} partes por subir'})
+
+    model = asset_model(session.tipo)
+    if not reserve_name(model, session.nombre_original):
+        raise ValidationError({'nombre': f'Ya se está subiendo {ETIQUETAS[session.tipo]} con el nombre "{session.nombre_original}".'})
+    try:
+        _check_name(session.tipo, session.nombre_original, exclude_session=session.pk)
+        with transaction.atomic():
+            locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+            _check_open(locked)
+            asset = model.objects.create(**_asset_fields(session))
+            session.sha256 = hashlib.sha256(''.join(sha for _, sha in chunks).encode('ascii')).hexdigest()
+            session.estado = 'COMPLETADA'
+            session.save(update_fields=['sha256', 'estado', 'fecha_actualizacion'])
+    finally:
+        transaction.on_commit(lambda: release_name(model, session.nombre_original))
+
+    # Registrar el archivo en el inventario ya (la verificación de presencia lo busca ahí);
+    # el sha256 del archivo completo se calcula aparte, releerlo tarda en masters de varios GB
+    transaction.on_commit(lambda: record_upload(session.ruta, ''))
+    transaction.on_commit(lambda: hash_media_file.delay(session.ruta))
+    task = {'broadcast': transcode_video, 'audio': process_audio, 'image': process_image}.get(session.tipo)
+    if task is not None:
+        transaction.on_commit(lambda: task.delay(str(asset.pk)))
+    logger.info(f"✅ Upload {session.pk} confirmado: {session.tipo} {asset.pk} ({session.nombre_original})")
+    return asset
+
+
+def cancel(session):
+    from .models import UploadSession
+
+    if session.estado == 'COMPLETADA':
+        raise UploadConflict({'estado': 'La sesión ya se confirmó'})
+    try:
+        os.remove(_path(session))
+    except FileNotFoundError:
+        pass
+    UploadSession.objects.filter(pk=session.pk).update(estado='CANCELADA')
+    session.chunks.all().delete()
+
+
+def cleanup(ttl=None):
+    """Cancela las sesiones abiertas sin actividad en ``UPLOAD_SESSION_TTL_HOURS`` y borra sus archivos."""
+    from .models import UploadSession
+
+    limite = timezone.now() - (ttl or _ttl())
+    expiradas = 0
+    for session in UploadSession.objects.filter(estado='ABIERTA', fecha_actualizacion__lt=limite).iterator():
+        cancel(session)
+        expiradas += 1
+    # Las sesiones cerradas solo sirven de historial unos días
+    UploadSession.objects.exclude(estado='ABIERTA').filter(fecha_actualizacion__lt=limite - timedelta(days=7)).delete()
+    if expiradas:
+        logger.info(f"🧹 Uploads expirados cancelados: {expiradas}")
+    return {'expiradas': expiradas}
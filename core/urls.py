@@ -5,10 +5,10 @@ from .views import (
     UserViewSet, DirectorioViewSet, RepositorioPermisoViewSet, ModuloViewSet,
     PerfilViewSet, SistemaInformacionViewSet, current_user, shared_link_public, 
     login_view, logout_view, forgot_password, reset_password, smtp_config, smtp_test,
-    ImageAssetViewSet, StorageAssetViewSet, purge_all, ffmpeg_health, ProcessingErrorViewSet, EncodingPresetViewSet,
-    stream_broadcast_media
+    ImageAssetViewSet, StorageAssetViewSet, purge_all, ffmpeg_health, workers_health, ProcessingErrorViewSet, EncodingPresetViewSet,
+    stream_broadcast_media, download_zip, assets_status, uploads_precheck
 )
-from . import csv_views
+from . import csv_views, sse_views, upload_views
 
 router = DefaultRouter()
 router.register(r'repositorios', RepositorioViewSet, basename='repositorio')
@@ -34,8 +34,22 @@ urlpatterns = [
     path('admin/purge-all/', purge_all, name='purge-all'),
     path('auth/me/', current_user, name='current-user'),
     path('health/ffmpeg/', ffmpeg_health, name='ffmpeg-health'),
+    path('health/workers/', workers_health, name='workers-health'),
     # Streaming con soporte de Range para el proxy de reproducción
     path('broadcasts/<uuid:pk>/stream/', stream_broadcast_media, name='stream-broadcast-media'),
+    # Descarga ZIP en streaming de una selección de assets
+    path('downloads/zip/', download_zip, name='download-zip'),
+    # Estado de muchos assets a la vez (seguimiento de uploads masivos)
+    path('assets/status/', assets_status, name='assets-status'),
+    # Validación de duplicados de un manifiesto de upload antes de enviar archivos
+    path('uploads/precheck/', uploads_precheck, name='uploads-precheck'),
+    # Upload reanudable por partes (core.uploads)
+    path('uploads/sessions/', upload_views.upload_sessions, name='upload-sessions'),
+    path('uploads/sessions/<uuid:session_id>/', upload_views.upload_session_detail, name='upload-session-detail'),
+    path('uploads/sessions/<uuid:session_id>/chunks/<int:indice>/', upload_views.upload_chunk, name='upload-chunk'),
+    path('uploads/sessions/<uuid:session_id>/commit/', upload_views.upload_session_commit, name='upload-session-commit'),
+    # Eventos en tiempo real (SSE) por repositorio, en lugar de polling
+    path('events/', sse_views.event_stream, name='event-stream'),
     path('auth/login/', login_view, name='login'),
     path('auth/logout/', logout_view, name='logout'),
     path('auth/forgot-password/', forgot_password, name='forgot-password'),
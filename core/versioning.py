@@ -0,0 +1,61 @@
+"""
+Contadores de versión por repositorio guardados en el cache (Redis).
+
+Cada vez que cambia algo dentro de un repositorio (directorios, assets) se
+incrementa su versión para ese ``scope``. Los endpoints la usan para construir
+ETags y claves de cache, así que nunca hay que borrar cache explícitamente:
+una versión nueva simplemente deja de coincidir con lo anterior.
+
+Si el cache no está disponible las funciones regresan ``None`` y los endpoints
+se comportan como antes (sin ETag / sin cache).
+"""
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Las versiones no deben expirar mientras se usen; 30 días se renuevan con cada bump
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _key(scope, repositorio_id):
+    return f'ver:{scope}:{repositorio_id}'
+
+
+def _initial_version():
+    # Basada en el reloj para que una llave expirada/borrada nunca repita una versión anterior
+    return int(time.time() * 1000)
+
+
+def get_version(scope, repositorio_id):
+    """Versión actual de ``scope`` para el repositorio (la inicializa si no existe)."""
+    key = _key(scope, repositorio_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, _initial_version(), VERSION_TIMEOUT)
+            version = cache.get(key)
+        return version
+    except Exception as e:
+        logger.debug(f"Cache no disponible para {key}: {e}")
+        return None
+
+
+def bump_version(scope, repositorio_id):
+    """Invalida todo lo derivado de ``scope`` en el repositorio incrementando su versión."""
+    if repositorio_id is None:
+        return None
+    key = _key(scope, repositorio_id)
+    try:
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # La llave no existía (o expiró)
+            version = _initial_version()
+            cache.set(key, version, VERSION_TIMEOUT)
+            return version
+    except Exception as e:
+        logger.debug(f"No se pudo incrementar {key}: {e}")
+        return None
@@ -5,22 +5,71 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
-from .models import Repositorio, Agencia, Broadcast, Audio, CustomUser, SharedLink, Directorio, RepositorioPermiso, Modulo, Perfil, SistemaInformacion, ImageAsset, StorageAsset, ProcessingError, EncodingPreset
+from .models import Repositorio, Agencia, Broadcast, Audio, CustomUser, Directorio, RepositorioPermiso, Modulo, Perfil, SistemaInformacion, ImageAsset, StorageAsset, ProcessingError, ProcessingErrorRollup, EncodingPreset
 from .serializers import (
     RepositorioSerializer, AgenciaSerializer, BroadcastSerializer, AudioSerializer,
     UserSerializer, SharedLinkSerializer, SharedLinkPublicSerializer, DirectorioSerializer,
     RepositorioPermisoSerializer, ModuloSerializer, PerfilSerializer, SistemaInformacionSerializer, ImageAssetSerializer, StorageAssetSerializer, ProcessingErrorSerializer, EncodingPresetSerializer
 )
 from .tasks import transcode_video, process_audio, process_image
+from .pagination import KeysetPagination, SincePagination
+from .search import IndexedSearchFilter
+from .authz import get_context
+from .listcache import VersionedListCacheMixin, user_scope
+from .signals import table_scope
 from django.http import StreamingHttpResponse, HttpResponse, FileResponse
 from pathlib import Path
 import mimetypes
 
 logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# Proyecciones para listados (evitan N+1 y columnas que no se serializan)
+# ------------------------------------------------------------
+ASSET_SELECT_RELATED = ('repositorio', 'directorio', 'modulo', 'creado_por')
+
+
+def _list_only(model, *related_fields, exclude=()):
+    """Campos para .only(): columnas propias del modelo + campos de relaciones usados por el serializer."""
+    own = [f.name for f in model._meta.concrete_fields if f.name not in exclude]
+    return own + list(related_fields)
+
+
+BROADCAST_LIST_ONLY = _list_only(
+    Broadcast,
+    'repositorio__nombre', 'repositorio__folio', 'repositorio__clave',
+    'directorio__nombre', 'modulo__nombre', 'modulo__tipo', 'creado_por__username',
+)
+AUDIO_LIST_ONLY = _list_only(
+    Audio,
+    'repositorio__nombre', 'repositorio__folio', 'repositorio__clave',
+    'directorio__nombre', 'modulo__nombre', 'modulo__tipo', 'creado_por__username',
+)
+IMAGE_LIST_ONLY = _list_only(ImageAsset, 'repositorio__nombre', 'directorio__nombre', 'creado_por__username')
+STORAGE_LIST_ONLY = _list_only(StorageAsset, 'repositorio__nombre', 'directorio__nombre', 'creado_por__username')
+
+
+def _list_projection(qs, serializer_class, request, default_only):
+    """
+    Proyección de listados con campos elegibles (?fields= / ?omit= / ?view=compact):
+    solo se leen las columnas y se hacen los JOIN que necesitan los campos pedidos.
+    """
+    selected = serializer_class.requested_fields(request)
+    if selected is None:
+        return qs.only(*default_only)
+    # KeysetPagination arma el cursor con fecha_subida o los campos de ?ordering=
+    ordering = {t.strip().lstrip('-') for t in request.query_params.get('ordering', '').split(',') if t.strip() and '__' not in t}
+    only, related = serializer_class.projection(selected | {'fecha_subida'} | ordering)
+    qs = qs.select_related(None)
+    if related:
+        qs = qs.select_related(*related)
+    return qs.only(*only)
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def ffmpeg_health(request):
@@ -50,6 +99,21 @@ def ffmpeg_health(request):
         'subdirs': created
     })
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def workers_health(request):
+    """Workers Celery vivos y cuántos consumen cada cola (registro de core.workers)."""
+    from .workers import snapshot
+    state = snapshot()
+    if state is None:
+        return Response({'error': 'Registro de workers no disponible'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response({
+        'online': bool(state['workers']),
+        'workers': state['workers'],
+        'queues': state['queues'],
+        'heartbeat_ttl': getattr(settings, 'WORKER_HEARTBEAT_TTL', 30),
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def stream_broadcast_media(request, pk):
@@ -114,6 +178,274 @@ def stream_broadcast_media(request, pk):
     resp['Accept-Ranges'] = 'bytes'
     resp['Cache-Control'] = 'no-store'
     return resp
+
+
+# ------------------------------------------------------------
+# Descargas ZIP en streaming (directorio completo o selección)
+# ------------------------------------------------------------
+ZIP_VARIANTS = {'original', 'rendition'}
+
+
+def _repositorios_descargables(user):
+    """IDs de repositorios visibles para el usuario, o None si puede ver todos."""
+    if not user.is_authenticated:
+        return set()
+    visibles = get_context(user).visible_repositorios()
+    return None if visibles is None else set(visibles)
+
+
+def _zip_source(asset, variant):
+    """Regresa (ruta_absoluta, nombre_en_zip) del archivo a incluir para un asset, o None."""
+    original_name = os.path.basename(str(asset.nombre_original or '')) or None
+    rel_path = None
+    if variant == 'rendition':
+        if isinstance(asset, Broadcast):
+            rel_path = asset.ruta_h264 or asset.ruta_proxy
+        elif isinstance(asset, Audio):
+            rel_path = asset.ruta_mp3
+        elif isinstance(asset, ImageAsset):
+            rel_path = asset.imagen_web.name if asset.imagen_web else None
+    # Storage no tiene renditions: siempre se entrega el original
+    if not rel_path:
+        if variant == 'rendition' and not isinstance(asset, StorageAsset):
+            return None
+        rel_path = asset.archivo_original.name if asset.archivo_original else None
+        if not rel_path:
+            return None
+        arcname = original_name or os.path.basename(rel_path)
+    else:
+        # La rendition conserva el nombre original con la extensión del archivo generado
+        stem = os.path.splitext(original_name)[0] if original_name else str(asset.id)[:8]
+        arcname = f"{stem}{os.path.splitext(rel_path)[1]}"
+    return os.path.join(settings.MEDIA_ROOT, rel_path), arcname
+
+
+def _zip_response(entries, filename):
+    from .zipstream import iter_zip
+    resp = StreamingHttpResponse(iter_zip(entries), content_type='application/zip')
+    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+    resp['Cache-Control'] = 'no-store'
+    return resp
+
+
+def _zip_assets(assets, variant, prefix=''):
+    """Convierte assets a entradas (arcname, ruta) con nombres únicos."""
+    from .zipstream import safe_arcname, safe_component, unique_arcname
+    used = set()
+    entries = []
+    for asset, folder in assets:
+        source = _zip_source(asset, variant)
+        if not source:
+            continue
+        path, arcname = source
+        # Los nombres vienen de la base (carpetas, nombre_original): nunca deben salir de la raíz del ZIP
+        arcname = safe_arcname('/'.join(p for p in (prefix, folder, safe_component(arcname)) if p))
+        entries.append((unique_arcname(arcname, used), path))
+    return entries
+
+
+# Campos mínimos para construir rutas de descarga sin cargar pizarra/metadata
+_ZIP_ONLY = {
+    Broadcast: ('id', 'repositorio_id', 'directorio_id', 'nombre_original', 'archivo_original', 'ruta_h264', 'ruta_proxy'),
+    Audio: ('id', 'repositorio_id', 'directorio_id', 'nombre_original', 'archivo_original', 'ruta_mp3'),
+    ImageAsset: ('id', 'repositorio_id', 'directorio_id', 'nombre_original', 'archivo_original', 'imagen_web'),
+    StorageAsset: ('id', 'repositorio_id', 'directorio_id', 'nombre_original', 'archivo_original'),
+}
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def download_zip(request):
+    """Descarga una selección de broadcasts, audios, imágenes y archivos storage como un ZIP en streaming.
+
+    Body (POST) o query params (GET, IDs separados por coma):
+      - broadcasts, audios, images, storage: listas de IDs
+      - variant: original (default) | rendition
+      - filename: nombre del ZIP (opcional)
+    """
+    if not request.user.tiene_permiso('puede_descargar'):
+        return Response({'error': 'No tienes permiso para descargar archivos'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.data if request.method == 'POST' else request.query_params
+    variant = params.get('variant') or 'original'
+    if variant not in ZIP_VARIANTS:
+        return Response({'error': 'variant inválido (original | rendition)'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _ids(key):
+        value = params.getlist(key) if hasattr(params, 'getlist') and request.method == 'GET' else params.get(key)
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        ids = []
+        for v in value:
+            ids.extend(x.strip() for x in str(v).split(',') if x.strip())
+        return ids
+
+    selection = [
+        (Broadcast, _ids('broadcasts')),
+        (Audio, _ids('audios')),
+        (ImageAsset, _ids('images')),
+        (StorageAsset, _ids('storage')),
+    ]
+    if not any(ids for _, ids in selection):
+        return Response({'error': 'No se seleccionaron archivos'}, status=status.HTTP_400_BAD_REQUEST)
+
+    allowed_repos = _repositorios_descargables(request.user)
+    assets = []
+    try:
+        for model, ids in selection:
+            if not ids:
+                continue
+            qs = model.objects.filter(id__in=ids).only(*_ZIP_ONLY[model])
+            if allowed_repos is not None:
+                qs = qs.filter(repositorio_id__in=allowed_repos)
+            assets.extend((asset, '') for asset in qs.iterator())
+    except Exception:
+        return Response({'error': 'IDs inválidos'}, status=status.HTTP_400_BAD_REQUEST)
+
+    entries = _zip_assets(assets, variant)
+    if not entries:
+        return Response({'error': 'Ninguno de los archivos seleccionados está disponible'}, status=status.HTTP_404_NOT_FOUND)
+
+    filename = os.path.basename(str(params.get('filename') or '')) or f"archivoplus_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+    if not filename.lower().endswith('.zip'):
+        filename += '.zip'
+    return _zip_response(entries, filename)
+
+
+# Estado por tipo de asset: (modelo, campo de estado)
+ASSET_STATUS_MODELS = {
+    'broadcasts': (Broadcast, 'estado_transcodificacion'),
+    'audios': (Audio, 'estado_procesamiento'),
+    'images': (ImageAsset, 'estado'),
+    'storage': (StorageAsset, 'estado'),
+}
+# Las tareas no reportan avance parcial: PROCESANDO/ERROR regresan progress=None
+ESTADO_PROGRESS = {'PENDIENTE': 0, 'COMPLETADO': 100}
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def assets_status(request):
+    """Estado de muchos assets en una sola petición (seguimiento de uploads masivos).
+
+    Body: {"broadcasts": [...], "audios": [...], "images": [...], "storage": [...]}
+    o {"ids": [...]} si no se conoce el tipo (se busca en todas las tablas).
+    Regresa {"results": [{id, tipo, estado, progress, thumbnail_url}], "not_found": [...]}.
+    Cada tabla se resuelve con una sola consulta por llave primaria (id IN ...).
+    """
+    import uuid
+
+    data = request.data if isinstance(request.data, dict) else {}
+    requested = {}
+    for key in (*ASSET_STATUS_MODELS, 'ids'):
+        value = data.get(key) or []
+        if isinstance(value, str):
+            value = value.split(',')
+        if not isinstance(value, list):
+            return Response({'error': f'{key} debe ser una lista de IDs'}, status=status.HTTP_400_BAD_REQUEST)
+        requested[key] = [str(v).strip() for v in value if str(v).strip()]
+
+    total = sum(len(ids) for ids in requested.values())
+    max_ids = getattr(settings, 'ASSET_STATUS_MAX_IDS', 5000)
+    if not total:
+        return Response({'error': 'No se enviaron IDs'}, status=status.HTTP_400_BAD_REQUEST)
+    if total > max_ids:
+        return Response({'error': f'Máximo {max_ids} IDs por petición'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _parse(v):
+        try:
+            return uuid.UUID(v)
+        except ValueError:
+            return None
+
+    def _valid(ids):
+        return [pk for pk in map(_parse, ids) if pk is not None]
+
+    ctx = get_context(request.user)
+    untyped = set(_valid(requested['ids']))
+    results, found = [], set()
+    for tipo, (model, estado_field) in ASSET_STATUS_MODELS.items():
+        ids = set(_valid(requested[tipo])) | (untyped - found)
+        if not ids:
+            continue
+        qs = ctx.filter_queryset(model.objects.filter(pk__in=ids)).order_by()
+        for pk, estado, thumbnail in qs.values_list('pk', estado_field, 'thumbnail').iterator():
+            found.add(pk)
+            results.append({
+                'id': str(pk),
+                'tipo': tipo,
+                'estado': estado,
+                'progress': ESTADO_PROGRESS.get(estado),
+                'thumbnail_url': request.build_absolute_uri(f'{settings.MEDIA_URL}{thumbnail}') if thumbnail else None,
+            })
+
+    # Comparar UUIDs normalizados: un ID en mayúsculas o sin guiones que sí se encontró no es not_found
+    not_found = [v for ids in requested.values() for v in ids if _parse(v) not in found]
+    return Response({'results': results, 'not_found': list(dict.fromkeys(not_found))})
+
+
+# Tipo de upload -> modelo (acepta el tipo del módulo: broadcast, audio, images, storage)
+UPLOAD_MODELS = {
+    'broadcast': Broadcast, 'broadcasts': Broadcast,
+    'audio': Audio, 'audios': Audio,
+    'image': ImageAsset, 'images': ImageAsset,
+    'storage': StorageAsset,
+}
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def uploads_precheck(request):
+    """Valida un manifiesto de upload completo antes de enviar bytes.
+
+    Body: {"tipo": "broadcast" | "audio" | "images" | "storage", "files": ["a.mov", {"name": "b.mov"}, ...]}
+    Regresa los nombres que se pueden subir, los que ya existen (una sola consulta
+    por el índice de nombre_original) y los repetidos dentro del mismo manifiesto.
+    De los duplicados en repositorios que el usuario no ve solo se regresa el nombre.
+    """
+    from .duplicates import find_duplicates
+
+    data = request.data if isinstance(request.data, dict) else {}
+    model = UPLOAD_MODELS.get(str(data.get('tipo') or 'broadcast').lower())
+    if model is None:
+        return Response({'error': 'tipo inválido (broadcast | audio | images | storage)'}, status=status.HTTP_400_BAD_REQUEST)
+    files = data.get('files')
+    if not isinstance(files, list) or not files:
+        return Response({'error': 'files debe ser una lista de nombres de archivo'}, status=status.HTTP_400_BAD_REQUEST)
+    max_files = getattr(settings, 'UPLOAD_PRECHECK_MAX_FILES', 5000)
+    if len(files) > max_files:
+        return Response({'error': f'Máximo {max_files} archivos por manifiesto'}, status=status.HTTP_400_BAD_REQUEST)
+
+    nombres = []
+    for item in files:
+        nombre = item.get('name') if isinstance(item, dict) else item
+        # Igual que en el upload: solo cuenta el nombre del archivo, no la carpeta
+        nombre = os.path.basename(str(nombre or '').replace('\\', '/')).strip()
+        if nombre:
+            nombres.append(nombre)
+
+    existentes = find_duplicates(model, nombres)
+    ctx = get_context(request.user)
+    ok, duplicates, repeated, vistos = [], [], [], set()
+    for nombre in nombres:
+        if nombre in existentes:
+            pk, repositorio_id, repositorio = existentes[nombre]
+            # El nombre es único en todo el sistema, pero el asset y su repositorio
+            # solo se revelan si el usuario puede ver ese repositorio
+            if ctx.puede_ver(repositorio_id):
+                duplicates.append({'name': nombre, 'id': str(pk), 'repositorio': repositorio})
+            else:
+                duplicates.append({'name': nombre, 'id': None, 'repositorio': None})
+        elif nombre in vistos:
+            repeated.append(nombre)
+        else:
+            ok.append(nombre)
+        vistos.add(nombre)
+    return Response({'total': len(nombres), 'ok': ok, 'duplicates': duplicates, 'repeated': repeated})
+
+
 @api_view(['POST', 'OPTIONS'])
 @permission_classes([IsAdminUser])
 def purge_all(request):
@@ -535,11 +867,8 @@ class RepositorioViewSet(viewsets.ModelViewSet):
         if user.is_superuser or user.is_staff:
             return Repositorio.objects.all()
         
-        # Usuarios normales: repositorios con permiso (puede_ver)
-        return Repositorio.objects.filter(
-            permisos_usuario__usuario=user,
-            permisos_usuario__puede_ver=True
-        ).distinct()
+        # Usuarios normales: repositorios con permiso (puede_ver), desde el contexto cacheado
+        return get_context(user).filter_queryset(Repositorio.objects.all(), field='pk')
 
 class AgenciaViewSet(viewsets.ModelViewSet):
     queryset = Agencia.objects.all()
@@ -551,7 +880,10 @@ class DirectorioViewSet(viewsets.ModelViewSet):
     filterset_fields = ['repositorio', 'modulo', 'parent']
     
     def get_queryset(self):
-        return Directorio.objects.all()
+        qs = Directorio.objects.select_related('repositorio')
+        if self.action in ('list', 'retrieve'):
+            qs = qs.with_content_count()
+        return qs
 
     @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
     def delete_all(self, request):
@@ -563,8 +895,107 @@ class DirectorioViewSet(viewsets.ModelViewSet):
         count, _ = Directorio.objects.all().delete()
         return Response({'message': f'Se eliminaron {count} directorios.'})
 
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """
+        Árbol completo de carpetas de un repositorio (opcionalmente de un módulo) en una sola llamada.
+        Query params: repositorio (requerido), modulo (opcional)
+
+        Usa el path materializado: todos los nodos con su conteo salen de una sola consulta y se
+        anidan en memoria. Responde con ETag ligado a la versión de directorios del repositorio;
+        si el cliente manda If-None-Match con el mismo valor se regresa 304 sin tocar la base.
+        """
+        from .versioning import get_version
+        from .signals import DIRECTORIOS
+        repositorio_id = request.query_params.get('repositorio')
+        modulo_id = request.query_params.get('modulo') or None
+        if not repositorio_id or not str(repositorio_id).isdigit():
+            return Response({'error': 'repositorio es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+        if modulo_id is not None and not str(modulo_id).isdigit():
+            return Response({'error': 'modulo inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        version = get_version(DIRECTORIOS, repositorio_id)
+        etag = f'W/"dirtree-{repositorio_id}-{modulo_id or "all"}-{version}"' if version is not None else None
+        if etag and etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]:
+            resp = Response(status=status.HTTP_304_NOT_MODIFIED)
+            resp['ETag'] = etag
+            return resp
+
+        qs = Directorio.objects.filter(repositorio_id=repositorio_id)
+        if modulo_id is not None:
+            qs = qs.filter(modulo_id=modulo_id)
+        rows = qs.with_content_count().values(
+            'id', 'nombre', 'id_dir', 'parent_id', 'modulo_id', 'path', 'fecha_creacion', 'content_count'
+        ).order_by('nombre')
+
+        nodes = {}
+        for row in rows:
+            nodes[row['id']] = {
+                'id': row['id'],
+                'nombre': row['nombre'],
+                'id_dir': row['id_dir'],
+                'parent': row['parent_id'],
+                'modulo': row['modulo_id'],
+                'fecha_creacion': row['fecha_creacion'],
+                'broadcasts_count': row['content_count'],
+                'children': [],
+            }
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node['parent'])
+            # Si el padre quedó fuera del filtro (otro módulo) el nodo se muestra como raíz
+            (parent['children'] if parent else roots).append(node)
+
+        resp = Response({'repositorio': int(repositorio_id), 'modulo': int(modulo_id) if modulo_id else None, 'version': version, 'tree': roots})
+        if etag:
+            resp['ETag'] = etag
+            resp['Cache-Control'] = 'private, no-cache'
+        return resp
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Descarga la carpeta completa (incluyendo subcarpetas) como ZIP en streaming.
+        Query param: variant=original (default) | rendition
+        """
+        from .zipstream import safe_component
+
+        directorio = self.get_object()
+        if not request.user.tiene_permiso('puede_descargar'):
+            return Response({'error': 'No tienes permiso para descargar archivos'}, status=status.HTTP_403_FORBIDDEN)
+        allowed_repos = _repositorios_descargables(request.user)
+        if allowed_repos is not None and directorio.repositorio_id not in allowed_repos:
+            return Response({'error': 'No tienes acceso a este repositorio'}, status=status.HTTP_403_FORBIDDEN)
+
+        variant = request.query_params.get('variant') or 'original'
+        if variant not in ZIP_VARIANTS:
+            return Response({'error': 'variant inválido (original | rendition)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Rutas relativas de cada subcarpeta a partir del path materializado (una consulta)
+        rows = Directorio.objects.descendants_of(directorio).values_list('id', 'path', 'nombre')
+        nombres = {dir_id: safe_component(nombre) for dir_id, _, nombre in rows}
+        prefix_len = len(directorio.path)
+        folders = {}
+        for dir_id, path, _ in rows:
+            ids = [int(x) for x in path[prefix_len:].strip('/').split('/') if x]
+            folders[dir_id] = '/'.join(nombres.get(i, str(i)) for i in ids)
+
+        assets = []
+        for model in (Broadcast, Audio, ImageAsset, StorageAsset):
+            qs = model.objects.filter(directorio_id__in=folders.keys()).only(*_ZIP_ONLY[model]).order_by('nombre_original')
+            assets.extend((asset, folders[asset.directorio_id]) for asset in qs.iterator())
+
+        nombre = safe_component(directorio.nombre)
+        entries = _zip_assets(assets, variant, prefix=nombre)
+        if not entries:
+            return Response({'error': 'La carpeta no contiene archivos disponibles'}, status=status.HTTP_404_NOT_FOUND)
+        return _zip_response(entries, nombre.replace('"', '') + '.zip')
+
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = CustomUser.objects.all()
+    # perfil_info y permisos_repositorios sin una consulta por usuario
+    queryset = CustomUser.objects.select_related('perfil').prefetch_related(
+        Prefetch('permisos_repositorio', queryset=RepositorioPermiso.objects.select_related('repositorio').order_by('pk'))
+    )
     serializer_class = UserSerializer
 
 class RepositorioPermisoViewSet(viewsets.ModelViewSet):
@@ -589,16 +1020,23 @@ class PerfilViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['activo']
 
-class BroadcastViewSet(viewsets.ModelViewSet):
+class BroadcastViewSet(VersionedListCacheMixin, viewsets.ModelViewSet):
     serializer_class = BroadcastSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ['repositorio', 'estado_transcodificacion', 'modulo', 'directorio']
-    # Búsqueda ampliada: incluir más campos de la pizarra y nombre de archivo
-    # El SearchFilter se mantiene para compatibilidad pero sobreescribimos filter_queryset
-    search_fields = [
-        'pizarra__producto', 'pizarra__version', 'pizarra__cliente', 'pizarra__agencia',
-        'pizarra__duracion', 'nombre_original', 'id_content'
+    list_cache_scope = table_scope(Broadcast)
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    filterset_fields = [
+        'repositorio', 'estado_transcodificacion', 'modulo', 'directorio',
+        # Columnas indexadas copiadas de la pizarra
+        'producto', 'cliente', 'agencia', 'version', 'vtype', 'fecha', 'anio',
     ]
+    ordering_fields = [
+        'fecha_subida', 'nombre_original', 'id_content',
+        'producto', 'cliente', 'agencia', 'version', 'duracion', 'vtype', 'fecha', 'anio',
+    ]
+    # ?search= usa el índice SearchEntry: producto, version, cliente, agencia, duracion,
+    # nombre de archivo (incluye extensión), id_content y fecha de subida (YYYY-MM-DD)
+    search_asset_type = 'broadcast'
 
     # ------------------------------------------------------------
     # Helpers para encolar/transcodificar de forma robusta
@@ -606,14 +1044,10 @@ class BroadcastViewSet(viewsets.ModelViewSet):
     def _celery_workers_online(self) -> bool:
         """Regresa True si hay al menos un worker Celery disponible.
         Evita fallas silenciosas cuando no hay workers en desarrollo.
+        Lee el registro en cache (core.workers), sin inspect() a los workers.
         """
-        try:
-            from celery import current_app
-            insp = current_app.control.inspect()
-            stats = insp.stats() if insp else None
-            return bool(stats)
-        except Exception:
-            return False
+        from .workers import workers_online
+        return workers_online()
 
     def _enqueue_transcode(self, broadcast):
         """Encola transcodificación con Celery o hace fallback síncrono si no hay workers.
@@ -651,61 +1085,119 @@ class BroadcastViewSet(viewsets.ModelViewSet):
         - Sin autenticación (desarrollo): retorna todos para testing
         """
         user = self.request.user
+        qs = Broadcast.objects.select_related(*ASSET_SELECT_RELATED).order_by('-fecha_subida')
+        if self.action == 'list':
+            qs = _list_projection(qs, BroadcastSerializer, self.request, BROADCAST_LIST_ONLY)
         
         # Para desarrollo: si no está autenticado, retornar todos (modo demo)
         if not user.is_authenticated:
-            return Broadcast.objects.all().order_by('-fecha_subida')
+            return qs
         
         # Si es superuser o staff, puede ver todos los broadcasts
         if user.is_superuser or user.is_staff:
-            return Broadcast.objects.all().order_by('-fecha_subida')
+            return qs
         
         # Usuarios normales solo ven broadcasts de sus repositorios asignados
-        repositorios_ids = RepositorioPermiso.objects.filter(
-            usuario=user,
-            puede_ver=True
-        ).values_list('repositorio_id', flat=True)
-        return Broadcast.objects.filter(
-            repositorio_id__in=repositorios_ids
-        ).order_by('-fecha_subida')
-
-    def filter_queryset(self, queryset):
-        """Extiende la búsqueda para cubrir todos los campos solicitados:
-        cliente, agencia, producto, version, duracion (time), formato (extension), date, file name.
-        La lógica añade coincidencias OR sobre múltiples campos, incluyendo heurísticas para fecha y extensión.
+        return get_context(user).filter_queryset(qs)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
         """
-        queryset = super().filter_queryset(queryset)
-        term = self.request.query_params.get('search', '').strip()
-        if not term:
-            return queryset
-        from django.db.models import Q
-        import re
-        q = Q(
-            pizarra__producto__icontains=term
-        ) | Q(
-            pizarra__version__icontains=term
-        ) | Q(
-            pizarra__cliente__icontains=term
-        ) | Q(
-            pizarra__agencia__icontains=term
-        ) | Q(
-            pizarra__duracion__icontains=term
-        ) | Q(
-            nombre_original__icontains=term
-        ) | Q(
-            id_content__icontains=term
-        )
-        # Detectar patrón de fecha YYYY-MM-DD
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', term):
-            q = q | Q(fecha_subida__date=term)
-        # Si tiene formato HH:MM o HH:MM:SS agregar a duracion
-        if re.match(r'^\d{1,2}:\d{2}(:\d{2})?$', term):
-            q = q | Q(pizarra__duracion__icontains=term)
-        # Extensión / formato ("mp4" / ".mp4")
-        ext = term.lower().lstrip('.')
-        if len(ext) <= 6 and re.match(r'^[a-z0-9]{2,6}$', ext):
-            q = q | Q(nombre_original__iendswith='.' + ext)
-        return queryset.filter(q).distinct()
+        Sugerencias por prefijo para cliente / agencia / producto desde el diccionario MetadataTerm.
+        Query params: q (prefijo), campo (cliente|agencia|producto, opcional), repositorio (opcional), limit (default 10)
+        """
+        from .terms import TERM_FIELDS, autocomplete
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            return Response({'results': []})
+        campo = request.query_params.get('campo')
+        if campo and campo not in TERM_FIELDS:
+            return Response({'error': f'campo inválido ({" | ".join(TERM_FIELDS)})'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            limit = 10
+
+        # Alcance según permisos: staff ve todo; el resto solo sus repositorios con puede_ver
+        repositorio_ids = _repositorios_descargables(request.user)
+        repositorio = request.query_params.get('repositorio')
+        if repositorio:
+            if not repositorio.isdigit():
+                return Response({'error': 'repositorio inválido'}, status=status.HTTP_400_BAD_REQUEST)
+            repositorio = int(repositorio)
+            repositorio_ids = [repositorio] if repositorio_ids is None or repositorio in repositorio_ids else []
+
+        results = autocomplete(q, repositorio_ids=repositorio_ids, campos=(campo,) if campo else TERM_FIELDS, limit=limit)
+        return Response({'results': results})
+
+    # Facets disponibles: nombre en la API -> columna
+    FACET_FIELDS = {
+        'cliente': 'cliente',
+        'agencia': 'agencia',
+        'producto': 'producto',
+        'anio': 'anio',
+        'vtype': 'vtype',
+        'estado': 'estado_transcodificacion',
+        'modulo': 'modulo_id',
+        'directorio': 'directorio_id',
+    }
+    DEFAULT_FACETS = ('cliente', 'agencia', 'anio', 'vtype', 'estado')
+    FACETS_CACHE_TIMEOUT = 300
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Conteos por faceta sobre el queryset filtrado (mismos filtros y ?search= que el listado).
+        Query params: facets=cliente,agencia,anio,vtype,estado (default), limit=50 por faceta
+
+        Un GROUP BY por faceta. El resultado se cachea con la versión de assets del repositorio
+        (o la global si no se filtra por repositorio), que se incrementa en cada escritura de un asset.
+        """
+        import hashlib
+        from django.core.cache import cache
+        from django.db.models import Count
+        from .versioning import get_version
+        from .signals import ASSETS, ALL_REPOS
+
+        requested = [f.strip() for f in request.query_params.get('facets', '').split(',') if f.strip()] or list(self.DEFAULT_FACETS)
+        unknown = [f for f in requested if f not in self.FACET_FIELDS]
+        if unknown:
+            return Response({'error': f'facets no soportados: {", ".join(unknown)}', 'disponibles': list(self.FACET_FIELDS)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 500))
+        except ValueError:
+            limit = 50
+
+        repositorio = request.query_params.get('repositorio')
+        version = get_version(ASSETS, repositorio if repositorio and repositorio.isdigit() else ALL_REPOS)
+        cache_key = None
+        if version is not None:
+            # Alcance por repositorios visibles: si cambian los permisos del usuario cambia la llave
+            params = sorted((k, v) for k, v in request.query_params.items() if k not in ('cursor', 'page_size', 'ordering'))
+            digest = hashlib.md5(repr((user_scope(request.user), params)).encode('utf-8')).hexdigest()
+            cache_key = f'facets:broadcast:{version}:{digest}'
+            try:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return Response(cached)
+            except Exception:
+                cache_key = None
+
+        qs = self.filter_queryset(self.get_queryset()).order_by()
+        data = {'total': qs.count(), 'facets': {}}
+        for name in requested:
+            field = self.FACET_FIELDS[name]
+            rows = qs.values(field).annotate(n=Count('pk')).order_by('-n', field)[:limit]
+            data['facets'][name] = [
+                {'value': row[field] if row[field] != '' else None, 'count': row['n']} for row in rows
+            ]
+
+        if cache_key:
+            try:
+                cache.set(cache_key, data, self.FACETS_CACHE_TIMEOUT)
+            except Exception:
+                pass
+        return Response(data)
 
     def create(self, request, *args, **kwargs):
         """
@@ -940,466 +1432,173 @@ class BroadcastViewSet(viewsets.ModelViewSet):
         logger.info(f"  ✓ Database record deleted")
         return super().destroy(request, *args, **kwargs)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def purge_all(self, request):
+        """
+        Elimina TODOS los broadcasts y sus archivos físicos asociados (solo pruebas, requiere superusuario).
+        """
+        if not request.user.is_superuser:
+            return Response({'error': 'Solo los superusuarios pueden realizar esta acción.'}, status=status.HTTP_403_FORBIDDEN)
 
-class ProcessingErrorViewSet(viewsets.ReadOnlyModelViewSet):
-    """Lista los errores de procesamiento. Solo lectura."""
-    serializer_class = ProcessingErrorSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['repositorio', 'modulo', 'directorio', 'stage', 'resolved']
-    search_fields = ['file_name', 'error_message']
-    ordering_fields = ['fecha_creacion', 'file_name', 'stage']
+        qs = Broadcast.objects.all()
+        total = qs.count()
+        files_deleted = 0
+        for b in qs:
+            # contar archivos planeados para eliminar
+            before = files_deleted
+            # coleccionar y eliminar
+            # contaremos archivos eliminados por diferencias de logs no determinísticas; aquí intentamos eliminar y contamos los existentes
+            # 1 original
+            if getattr(b, 'archivo_original', None):
+                try:
+                    path = b.archivo_original.path
+                    if os.path.exists(path):
+                        os.remove(path)
+                        files_deleted += 1
+                except Exception:
+                    pass
+            # 2 h264
+            if getattr(b, 'ruta_h264', None):
+                path = os.path.join(settings.MEDIA_ROOT, b.ruta_h264)
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                        files_deleted += 1
+                    except Exception:
+                        pass
+            # 3 proxy
+            if getattr(b, 'ruta_proxy', None):
+                path = os.path.join(settings.MEDIA_ROOT, b.ruta_proxy)
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                        files_deleted += 1
+                    except Exception:
+                        pass
+            # 4 thumbs
+            if getattr(b, 'thumbnail', None):
+                path = os.path.join(settings.MEDIA_ROOT, str(b.thumbnail))
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                        files_deleted += 1
+                    except Exception:
+                        pass
+            if getattr(b, 'pizarra_thumbnail', None):
+                path = os.path.join(settings.MEDIA_ROOT, str(b.pizarra_thumbnail))
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                        files_deleted += 1
+                    except Exception:
+                        pass
+            # eliminar registro
+            b.delete()
 
-    def get_queryset(self):
-        user = self.request.user
-        qs = ProcessingError.objects.all()
-        # Superusers ven todo
-        if user.is_superuser or user.is_staff:
-            return qs.order_by('-fecha_creacion')
-        if not user.is_authenticated:
-            return qs.none()
-        # Filtrar por repos permitidos
-        repositorios_ids = RepositorioPermiso.objects.filter(
-            usuario=user,
-            puede_ver=True
-        ).values_list('repositorio_id', flat=True)
-        return qs.filter(repositorio_id__in=repositorios_ids).order_by('-fecha_creacion')
+        return Response({'message': f'Purga completada: {total} broadcasts eliminados, {files_deleted} archivos eliminados.'})
+    
+    @action(detail=False, methods=['post'], url_path='retry_failed')
+    def retry_failed(self, request):
+        """
+        Reencola todos los broadcasts en estado FALLIDO/ERROR para transcodificación.
+        Opcionalmente filtra por repositorio (repositorio_id) o directorio (directorio_id).
+        """
+        repositorio_id = request.data.get('repositorio_id') or request.query_params.get('repositorio_id')
+        directorio_id = request.data.get('directorio_id') or request.query_params.get('directorio_id')
 
+        qs = Broadcast.objects.filter(estado_transcodificacion__in=['ERROR', 'FALLIDO'])
+        if repositorio_id:
+            qs = qs.filter(repositorio_id=repositorio_id)
+        if directorio_id:
+            qs = qs.filter(directorio_id=directorio_id)
 
-class EncodingPresetViewSet(viewsets.ModelViewSet):
-    """ViewSet para gestionar presets de codificación personalizados"""
-    serializer_class = EncodingPresetSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['categoria', 'es_global', 'activo', 'creado_por']
-    search_fields = ['nombre', 'descripcion']
-    ordering_fields = ['fecha_creacion', 'fecha_modificacion', 'veces_usado', 'nombre']
-    permission_classes = [IsAuthenticated]
+        total = qs.count()
+        if total == 0:
+            return Response({'message': 'No failed broadcasts to retry', 'queued': 0})
 
-    def get_queryset(self):
+        queued = 0
+        for b in qs:
+            # Debe tener archivo original configurado
+            if not b.archivo_original:
+                continue
+            b.estado_transcodificacion = 'PROCESANDO'
+            b.last_error = None
+            b.save(update_fields=['estado_transcodificacion', 'last_error'])
+            
+            # Disparar tarea Celery
+            transcode_video.delay(str(b.id))
+            queued += 1
+
+        logger.info(f"🔁 Retry failed: queued {queued}/{total} broadcasts")
+        return Response({'message': 'Retry enqueued', 'queued': queued, 'total_failed': total})
+    
+    @action(detail=False, methods=['post'], url_path='match_source_files')
+    def match_source_files(self, request):
         """
-        Usuarios regulares ven:
-        - Presets globales activos
-        - Sus propios presets (activos e inactivos)
-        
-        Administradores ven todos los presets
+        Detecta archivos en /media/sources/ y los vincula con broadcasts sin archivo original.
+        Útil después de importar metadata vía CSV.
+        Body: { repositorio_id, dry_run?, rescan?, async? }
+        Con async=true corre como job de Celery y regresa 202 con job_id; el progreso
+        se consulta en match_source_files_status/?job_id=...
         """
-        user = self.request.user
-        qs = EncodingPreset.objects.all()
+        from . import inventory
+        from .matching import match_sources, set_job_state
+        from .tasks import match_source_files_task
+
+        repositorio_id = request.data.get('repositorio_id')
+        dry_run = request.data.get('dry_run') in [True, 'true', 'True', '1', 1]
+        rescan = request.data.get('rescan') in [True, 'true', 'True', '1', 1]
+        run_async = request.data.get('async') in [True, 'true', 'True', '1', 1]
         
-        # Admins ven todo
-        if user.is_superuser or user.is_staff:
-            return qs.order_by('-fecha_creacion')
+        if not repositorio_id:
+            return Response({
+                'error': 'repositorio_id es requerido'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Usuarios regulares: globales activos + propios
-        from django.db.models import Q
-        return qs.filter(
-            Q(es_global=True, activo=True) | Q(creado_por=user)
-        ).order_by('-fecha_creacion')
+        try:
+            repositorio = Repositorio.objects.get(id=repositorio_id)
+        except Repositorio.DoesNotExist:
+            return Response({
+                'error': 'Repositorio no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        # El inventario (MediaFile) reemplaza el os.walk de sources/ en cada llamada
+        if run_async and self._celery_workers_online():
+            import uuid
+            job_id = uuid.uuid4().hex
+            set_job_state(job_id, status='PENDIENTE', repositorio=repositorio.nombre, dry_run=dry_run, processed=0, total=None)
+            match_source_files_task.delay(job_id, repositorio.pk, dry_run=dry_run, rescan=rescan)
+            logger.info(f"🔗 Match sources encolado: job {job_id} ({repositorio.nombre})")
+            return Response({'job_id': job_id, 'status': 'PENDIENTE'}, status=status.HTTP_202_ACCEPTED)
+
+        inventory.ensure_scanned(['sources'])
+        if rescan:
+            inventory.scan(['sources'])
+        if inventory.last_scan('sources') is None:
+            sources_path = os.path.join(settings.MEDIA_ROOT, 'sources')
+            return Response({
+                'error': f'Directorio {sources_path} no existe'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    def get_permissions(self):
+        return Response(match_sources(repositorio, dry_run=dry_run))
+
+    @action(detail=False, methods=['get'], url_path='match_source_files_status')
+    def match_source_files_status(self, request):
+        """Progreso/resultado de un match_source_files lanzado con async=true."""
+        from .matching import get_job_state
+        job_id = request.query_params.get('job_id')
+        if not job_id:
+            return Response({'error': 'job_id es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+        state = get_job_state(job_id)
+        if state is None:
+            return Response({'error': 'Job no encontrado o expirado'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'job_id': job_id, **state})
+    
+    @action(detail=False, methods=['post'], url_path='start_bulk_transcode')
+    def start_bulk_transcode(self, request):
         """
-        - list/retrieve: Authenticated
-        - create/update/delete: Admin only
-        """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            return [IsAdminUser()]
-        return [IsAuthenticated()]
-
-    def perform_create(self, serializer):
-        """Asignar el usuario actual como creador"""
-        serializer.save(creado_por=self.request.user)
-        logger.info(f"✅ Preset creado: {serializer.instance.nombre} por {self.request.user.email}")
-
-    def perform_update(self, serializer):
-        """Log de actualizaciones"""
-        serializer.save()
-        logger.info(f"📝 Preset actualizado: {serializer.instance.nombre} por {self.request.user.email}")
-
-    def perform_destroy(self, instance):
-        """Desactivar en lugar de eliminar físicamente (soft delete)"""
-        instance.activo = False
-        instance.save(update_fields=['activo'])
-        logger.info(f"🗑️ Preset desactivado: {instance.nombre} por {self.request.user.email}")
-
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
-    def increment_usage(self, request, pk=None):
-        """Incrementar contador de uso del preset"""
-        preset = self.get_object()
-        preset.incrementar_uso()
-        return Response({
-            'status': 'success',
-            'veces_usado': preset.veces_usado,
-            'mensaje': f'Uso registrado para {preset.nombre}'
-        })
-
-    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
-    def by_category(self, request):
-        """Listar presets agrupados por categoría"""
-        queryset = self.filter_queryset(self.get_queryset())
-        
-        categorias = {}
-        for preset in queryset:
-            cat = preset.get_categoria_display()
-            if cat not in categorias:
-                categorias[cat] = []
-            categorias[cat].append(self.get_serializer(preset).data)
-        
-        return Response(categorias)
-
-
-class StorageAssetViewSet(viewsets.ModelViewSet):
-    """ViewSet for general storage files - accepts all file types"""
-    queryset = StorageAsset.objects.all().order_by('-fecha_subida')
-    serializer_class = StorageAssetSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['repositorio', 'directorio', 'modulo', 'tipo_archivo', 'creado_por', 'estado']
-    search_fields = ['nombre_original', 'tipo_archivo']
-    ordering_fields = ['fecha_subida', 'nombre_original', 'tipo_archivo', 'file_size']
-    permission_classes = [IsAuthenticated]
-
-    def perform_create(self, serializer):
-        """Simple storage - just save the file, no processing"""
-        import os
-        
-        # Get file info before saving
-        uploaded_file = self.request.FILES.get('archivo_original')
-        
-        # Save instance with user
-        instance = serializer.save(
-            creado_por=self.request.user,
-            estado='COMPLETADO'  # Storage files are always complete immediately
-        )
-        
-        # Update file metadata after save
-        if instance.archivo_original:
-            filename = instance.archivo_original.name
-            ext = os.path.splitext(filename)[1].lower()
-            instance.tipo_archivo = ext if ext else 'unknown'
-            
-            # Get file size
-            try:
-                instance.file_size = instance.archivo_original.size
-            except Exception:
-                instance.file_size = 0
-            
-            # Save metadata only
-            instance.save(update_fields=['tipo_archivo', 'file_size'])
-        
-        logger.info(f"📦 Storage file saved: {instance.nombre_original} ({instance.tipo_archivo}, {instance.file_size} bytes)")
-    
-    def _delete_storage_files(self, storage_file):
-        """Delete physical files associated with a storage file."""
-        import os
-        
-        archivos_a_eliminar = []
-
-        # 1. Original file
-        if storage_file.archivo_original:
-            try:
-                archivos_a_eliminar.append(storage_file.archivo_original.path)
-                logger.info(f"  - Original file: {storage_file.archivo_original.path}")
-            except Exception as e:
-                logger.error(f"  - Error getting original file path: {e}")
-
-        # 2. Thumbnail (if exists)
-        if storage_file.thumbnail:
-            try:
-                archivos_a_eliminar.append(storage_file.thumbnail.path)
-                logger.info(f"  - Thumbnail: {storage_file.thumbnail.path}")
-            except Exception as e:
-                logger.error(f"  - Error getting thumbnail path: {e}")
-
-        # Delete all physical files
-        for archivo_path in archivos_a_eliminar:
-            try:
-                if os.path.exists(archivo_path):
-                    os.remove(archivo_path)
-                    logger.info(f"  ✓ Deleted: {archivo_path}")
-                else:
-                    logger.warning(f"  ⚠ Does not exist: {archivo_path}")
-            except Exception as e:
-                logger.error(f"  ✗ Error deleting {archivo_path}: {e}")
-
-    def destroy(self, request, *args, **kwargs):
-        """Override destroy method to delete physical files before database record."""
-        storage_file = self.get_object()
-        logger.info(f"🗑️  Deleting storage file {storage_file.id} - {storage_file.nombre_original}")
-        self._delete_storage_files(storage_file)
-        logger.info(f"  ✓ Database record deleted")
-        return super().destroy(request, *args, **kwargs)
-
-    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
-    def purge_all(self, request):
-        """
-        Elimina TODOS los broadcasts y sus archivos físicos asociados (solo pruebas, requiere superusuario).
-        """
-        if not request.user.is_superuser:
-            return Response({'error': 'Solo los superusuarios pueden realizar esta acción.'}, status=status.HTTP_403_FORBIDDEN)
-
-        qs = Broadcast.objects.all()
-        total = qs.count()
-        files_deleted = 0
-        for b in qs:
-            # contar archivos planeados para eliminar
-            before = files_deleted
-            # coleccionar y eliminar
-            # contaremos archivos eliminados por diferencias de logs no determinísticas; aquí intentamos eliminar y contamos los existentes
-            # 1 original
-            if getattr(b, 'archivo_original', None):
-                try:
-                    path = b.archivo_original.path
-                    if os.path.exists(path):
-                        os.remove(path)
-                        files_deleted += 1
-                except Exception:
-                    pass
-            # 2 h264
-            if getattr(b, 'ruta_h264', None):
-                path = os.path.join(settings.MEDIA_ROOT, b.ruta_h264)
-                if os.path.exists(path):
-                    try:
-                        os.remove(path)
-                        files_deleted += 1
-                    except Exception:
-                        pass
-            # 3 proxy
-            if getattr(b, 'ruta_proxy', None):
-                path = os.path.join(settings.MEDIA_ROOT, b.ruta_proxy)
-                if os.path.exists(path):
-                    try:
-                        os.remove(path)
-                        files_deleted += 1
-                    except Exception:
-                        pass
-            # 4 thumbs
-            if getattr(b, 'thumbnail', None):
-                path = os.path.join(settings.MEDIA_ROOT, str(b.thumbnail))
-                if os.path.exists(path):
-                    try:
-                        os.remove(path)
-                        files_deleted += 1
-                    except Exception:
-                        pass
-            if getattr(b, 'pizarra_thumbnail', None):
-                path = os.path.join(settings.MEDIA_ROOT, str(b.pizarra_thumbnail))
-                if os.path.exists(path):
-                    try:
-                        os.remove(path)
-                        files_deleted += 1
-                    except Exception:
-                        pass
-            # eliminar registro
-            b.delete()
-
-        return Response({'message': f'Purga completada: {total} broadcasts eliminados, {files_deleted} archivos eliminados.'})
-    
-    @action(detail=False, methods=['post'], url_path='retry_failed')
-    def retry_failed(self, request):
-        """
-        Reencola todos los broadcasts en estado FALLIDO/ERROR para transcodificación.
-        Opcionalmente filtra por repositorio (repositorio_id) o directorio (directorio_id).
-        """
-        repositorio_id = request.data.get('repositorio_id') or request.query_params.get('repositorio_id')
-        directorio_id = request.data.get('directorio_id') or request.query_params.get('directorio_id')
-
-        qs = Broadcast.objects.filter(estado_transcodificacion__in=['ERROR', 'FALLIDO'])
-        if repositorio_id:
-            qs = qs.filter(repositorio_id=repositorio_id)
-        if directorio_id:
-            qs = qs.filter(directorio_id=directorio_id)
-
-        total = qs.count()
-        if total == 0:
-            return Response({'message': 'No failed broadcasts to retry', 'queued': 0})
-
-        queued = 0
-        for b in qs:
-            # Debe tener archivo original configurado
-            if not b.archivo_original:
-                continue
-            b.estado_transcodificacion = 'PROCESANDO'
-            b.last_error = None
-            b.save(update_fields=['estado_transcodificacion', 'last_error'])
-            
-            # Disparar tarea Celery
-            transcode_video.delay(str(b.id))
-            queued += 1
-
-        logger.info(f"🔁 Retry failed: queued {queued}/{total} broadcasts")
-        return Response({'message': 'Retry enqueued', 'queued': queued, 'total_failed': total})
-    
-    @action(detail=False, methods=['post'], url_path='match_source_files')
-    def match_source_files(self, request):
-        """
-        Detecta archivos en /media/sources/ y los vincula con broadcasts sin archivo original.
-        Útil después de importar metadata vía CSV.
-        """
-        repositorio_id = request.data.get('repositorio_id')
-        dry_run = request.data.get('dry_run') in [True, 'true', 'True', '1', 1]
-        
-        if not repositorio_id:
-            return Response({
-                'error': 'repositorio_id es requerido'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            repositorio = Repositorio.objects.get(id=repositorio_id)
-        except Repositorio.DoesNotExist:
-            return Response({
-                'error': 'Repositorio no encontrado'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        sources_path = os.path.join(settings.MEDIA_ROOT, 'sources')
-        
-        if not os.path.exists(sources_path):
-            return Response({
-                'error': f'Directorio {sources_path} no existe'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Buscar broadcasts sin archivo original de este repositorio
-        from django.db.models import Q
-        broadcasts_sin_archivo = Broadcast.objects.filter(
-            Q(repositorio=repositorio) & (Q(archivo_original__isnull=True) | Q(archivo_original=''))
-        )
-        
-        matched = []
-        not_matched = []
-        errors = []
-        
-        # Listar todos los archivos en sources/
-        VIDEO_EXTS = (
-            '.mov', '.mp4', '.avi', '.mkv', '.mxf', '.m4v', '.webm', '.wmv', '.mpg', '.mpeg', '.mts'
-        )
-        available_files = []
-        for root, dirs, files in os.walk(sources_path):
-            for filename in files:
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in VIDEO_EXTS or ext == '':  # incluir archivos sin extensión
-                    file_path = os.path.join(root, filename)
-                    rel_path = os.path.relpath(file_path, settings.MEDIA_ROOT)
-                    path_parts = rel_path.replace('\\', '/').split('/')
-                    available_files.append({
-                        'filename': filename,
-                        'path': file_path,
-                        'relative_path': rel_path,
-                        'path_parts': path_parts,
-                    })
-        
-        logger.info(f"📁 Encontrados {len(available_files)} archivos de video en sources/")
-        
-        # Intentar vincular cada broadcast (priorizando id_content)
-        for broadcast in broadcasts_sin_archivo:
-            id_content = getattr(broadcast, 'id_content', None)
-            nombre_buscar = broadcast.nombre_original
-
-            if not id_content and not nombre_buscar:
-                not_matched.append({
-                    'id': str(broadcast.id),
-                    'nombre': 'Sin identificador',
-                    'id_content': None,
-                    'reason': 'No tiene id_content ni nombre_original'
-                })
-                continue
-
-            # Buscar archivo coincidente por id_content o nombre
-            archivo_encontrado = None
-
-            # 1) Por id_content (folio) en el path completo, incluyendo nombres de carpeta
-            if id_content:
-                idc_raw = str(id_content).strip()
-                idc = idc_raw.lower()
-                # Variantes: núcleo después de '-', y versión compacta sin non-alnum
-                idc_core = idc_raw.split('-')[-1].strip().lower() if '-' in idc_raw else idc
-                idc_compact = ''.join(ch for ch in idc if ch.isalnum())
-                variants = [v for v in {idc, idc_core, idc_compact} if v]
-
-                rel_lower = [
-                    (f, f['relative_path'].lower(), [p.lower() for p in f.get('path_parts', [])])
-                    for f in available_files
-                ]
-
-                # Candidatos si cualquier variante aparece en el path
-                candidatos = [f for (f, rel, parts) in rel_lower if any(v in rel for v in variants)]
-
-                if candidatos:
-                    # Priorizar coincidencias exactas por nombre de carpeta (path_parts)
-                    exact_folder = []
-                    for (f, rel, parts) in [(f, f['relative_path'].lower(), [p.lower() for p in f.get('path_parts', [])]) for f in candidatos]:
-                        if any(v in parts for v in variants):
-                            exact_folder.append(f)
-                    if exact_folder:
-                        archivo_encontrado = exact_folder[0]
-                    else:
-                        archivo_encontrado = candidatos[0]
-
-            # 2) Si no se encontró por id_content, buscar por nombre exacto
-            if not archivo_encontrado and nombre_buscar:
-                nombre_limpio = os.path.basename(str(nombre_buscar)).lower()
-                for file_info in available_files:
-                    if file_info['filename'].lower() == nombre_limpio:
-                        archivo_encontrado = file_info
-                        break
-
-            # 3) Si tampoco, intentar por nombre sin extensión
-            if not archivo_encontrado and nombre_buscar:
-                base = os.path.splitext(os.path.basename(str(nombre_buscar)))[0].lower()
-                for file_info in available_files:
-                    if os.path.splitext(file_info['filename'].lower())[0] == base:
-                        archivo_encontrado = file_info
-                        break
-
-            if archivo_encontrado:
-                try:
-                    if not dry_run:
-                        # Vincular archivo al broadcast
-                        broadcast.archivo_original = archivo_encontrado['relative_path']
-                        # No cambiamos estado aquí; start_bulk_transcode tomará los pendientes
-                        broadcast.save(update_fields=['archivo_original'])
-
-                    matched.append({
-                        'id': str(broadcast.id),
-                        'id_content': id_content,
-                        'nombre': broadcast.nombre_original,
-                        'archivo': archivo_encontrado['filename'],
-                        'path': archivo_encontrado.get('relative_path'),
-                        'applied': not dry_run
-                    })
-
-                    logger.info(f"✓ Match {'(dry-run) ' if dry_run else ''}: {id_content or nombre_buscar} → {archivo_encontrado['filename']}")
-
-                except Exception as e:
-                    errors.append({
-                        'id': str(broadcast.id),
-                        'id_content': id_content,
-                        'nombre': broadcast.nombre_original,
-                        'error': str(e)
-                    })
-            else:
-                not_matched.append({
-                    'id': str(broadcast.id),
-                    'id_content': id_content,
-                    'nombre': broadcast.nombre_original,
-                    'reason': 'Archivo no encontrado en sources/'
-                })
-        
-        return Response({
-            'success': True,
-            'repositorio': repositorio.nombre,
-            'dry_run': dry_run,
-            'total_broadcasts': broadcasts_sin_archivo.count(),
-            'matched': len(matched),
-            'not_matched': len(not_matched),
-            'errors': len(errors),
-            'matched_list': matched[:50],  # Primeros 50
-            'not_matched_list': not_matched[:50],
-            'errors_list': errors,
-            'available_files_count': len(available_files)
-        })
-    
-    @action(detail=False, methods=['post'], url_path='start_bulk_transcode')
-    def start_bulk_transcode(self, request):
-        """
-        Inicia la transcodificación masiva de broadcasts con archivo original
-        pero sin procesar (estado METADATA_ONLY o con archivo_original pero sin ruta_h264).
+        Inicia la transcodificación masiva de broadcasts con archivo original
+        pero sin procesar (estado METADATA_ONLY o con archivo_original pero sin ruta_h264).
         """
         repositorio_id = request.data.get('repositorio_id')
         
@@ -1460,6 +1659,26 @@ class StorageAssetViewSet(viewsets.ModelViewSet):
             'broadcasts': initiated[:50]  # Primeros 50
         }, status=status.HTTP_202_ACCEPTED)
 
+    # Razones de pendientes (pending_details ?reason=) sobre columnas indexadas:
+    # archivo_presente lo mantiene core.tasks.check_source_presence; None (sin verificar)
+    # se considera listo, transcode_video lo corrige al tomarlo.
+    PENDING_REASONS = {
+        'sin_archivo': 'Sin archivo original',
+        'archivo_no_existe': 'Archivo no existe',
+        'listo_para_iniciar': 'Listo para iniciar',
+    }
+
+    @staticmethod
+    def _pending_reason_q(reason):
+        from django.db.models import Q
+        sin_original = Q(archivo_original__isnull=True) | Q(archivo_original='')
+        if reason == 'sin_archivo':
+            return sin_original
+        con_original = Q(archivo_original__isnull=False) & ~Q(archivo_original='')
+        if reason == 'archivo_no_existe':
+            return con_original & Q(archivo_presente=False)
+        return con_original & (Q(archivo_presente=True) | Q(archivo_presente__isnull=True))
+
     @action(detail=False, methods=['get'], url_path='transcode_status')
     def transcode_status(self, request):
         """
@@ -1468,87 +1687,62 @@ class StorageAssetViewSet(viewsets.ModelViewSet):
           - repositorio: ID del repositorio (opcional; si no se envía, usa permisos del usuario en todos los repos)
           - limit_errors: número de muestras de errores a incluir (default 25)
         """
+        from django.db.models import Count, Q
+
         try:
             limit_errors = int(request.query_params.get('limit_errors', 25))
         except Exception:
             limit_errors = 25
 
-        qs = self.get_queryset()
+        qs = self.get_queryset().order_by()
 
         # Filtrar por repositorio si viene en query
         repo_id = request.query_params.get('repositorio')
         if repo_id:
             qs = qs.filter(repositorio_id=repo_id)
 
-        total = qs.count()
-
-        estados = {
-            'PENDIENTE': qs.filter(estado_transcodificacion='PENDIENTE').count(),
-            'PROCESANDO': qs.filter(estado_transcodificacion='PROCESANDO').count(),
-            'COMPLETADO': qs.filter(estado_transcodificacion='COMPLETADO').count(),
-            'ERROR': qs.filter(estado_transcodificacion='ERROR').count(),
-        }
-
-        # Analizar razones de pendientes
-        pendientes = qs.filter(estado_transcodificacion='PENDIENTE')
-        sin_original = pendientes.filter(archivo_original__isnull=True) | pendientes.filter(archivo_original='')
-        sin_original_count = sin_original.count()
-
-        # Con archivo asignado pero inexistente en filesystem
-        with_original = pendientes.exclude(archivo_original__isnull=True).exclude(archivo_original='')
-        archivo_no_existe = 0
-        listo_para_iniciar = 0
-        muestras_archivo_no_existe = []
-        try:
-            for b in with_original[:500]:  # limitar inspección de filesystem
-                try:
-                    # path absoluto del original
-                    try:
-                        file_path = b.archivo_original.path
-                    except Exception:
-                        from django.conf import settings as dj_settings
-                        file_path = os.path.join(dj_settings.MEDIA_ROOT, str(b.archivo_original))
-                    if not os.path.exists(file_path):
-                        archivo_no_existe += 1
-                        if len(muestras_archivo_no_existe) < 10:
-                            muestras_archivo_no_existe.append({
-                                'id': str(b.id),
-                                'nombre': b.nombre_original,
-                                'archivo': str(b.archivo_original)
-                            })
-                    else:
-                        listo_para_iniciar += 1
-                except Exception:
-                    # Si algo falla al evaluar el path, considerarlo como no existente
-                    archivo_no_existe += 1
-        except Exception:
-            # En caso de error inesperado, seguir sin abortar
-            pass
-
+        # Un solo agregado para todos los conteos
+        estados_keys = [key for key, _ in Broadcast.ESTADO_CHOICES]
+        pendiente = Q(estado_transcodificacion='PENDIENTE')
+        aggregates = {'total': Count('pk')}
+        for key in estados_keys:
+            aggregates[f'estado_{key}'] = Count('pk', filter=Q(estado_transcodificacion=key))
+        for reason in self.PENDING_REASONS:
+            aggregates[f'razon_{reason}'] = Count('pk', filter=pendiente & self._pending_reason_q(reason))
+        aggregates['sin_verificar'] = Count('pk', filter=pendiente & self._pending_reason_q('listo_para_iniciar') & Q(archivo_presente__isnull=True))
+        counts = qs.aggregate(**aggregates)
+
+        estados = {key: counts[f'estado_{key}'] for key in estados_keys}
         pendientes_por_razon = {
-            'Sin archivo original': sin_original_count,
-            'Archivo no existe': archivo_no_existe,
-            'Listo para iniciar': listo_para_iniciar,
+            label: counts[f'razon_{reason}'] for reason, label in self.PENDING_REASONS.items()
         }
 
+        faltantes = qs.filter(pendiente & self._pending_reason_q('archivo_no_existe')).order_by('-fecha_subida', '-pk')
+        muestras_archivo_no_existe = [
+            {'id': str(pk), 'nombre': nombre, 'archivo': archivo}
+            for pk, nombre, archivo in faltantes.values_list('pk', 'nombre_original', 'archivo_original')[:10]
+        ]
+
         # Muestras de errores recientes (recortes de last_error)
-        errores_qs = qs.filter(estado_transcodificacion='ERROR').order_by('-fecha_subida')
+        errores_qs = qs.filter(estado_transcodificacion='ERROR').order_by('-fecha_subida', '-pk')
         errores_muestras = []
-        for b in errores_qs[:limit_errors]:
-            err = (b.last_error or '').strip()
+        for pk, nombre, archivo, last_error in errores_qs.values_list('pk', 'nombre_original', 'archivo_original', 'last_error')[:limit_errors]:
+            err = (last_error or '').strip()
             if err and len(err) > 500:
                 err = err[:500] + '…'
             errores_muestras.append({
-                'id': str(b.id),
-                'nombre': b.nombre_original,
-                'archivo': str(b.archivo_original) if b.archivo_original else None,
+                'id': str(pk),
+                'nombre': nombre,
+                'archivo': archivo or None,
                 'last_error': err or None
             })
 
         return Response({
-            'total': total,
+            'total': counts['total'],
             'estados': estados,
             'pendientes_por_razon': pendientes_por_razon,
+            # Pendientes con archivo cuya presencia aún no verifica check_source_presence
+            'pendientes_sin_verificar': counts['sin_verificar'],
             'muestras_archivo_no_existe': muestras_archivo_no_existe,
             'errores_muestras': errores_muestras,
         })
@@ -1560,11 +1754,11 @@ class StorageAssetViewSet(viewsets.ModelViewSet):
         Query params:
           - repositorio: ID del repositorio (opcional)
           - reason: sin_archivo | archivo_no_existe | listo_para_iniciar (requerido)
-          - limit: cantidad a retornar (default 50)
+          - limit: cantidad a retornar (default 50, máximo 500)
           - offset: desplazamiento (default 0)
         """
         reason = request.query_params.get('reason')
-        if reason not in {'sin_archivo', 'archivo_no_existe', 'listo_para_iniciar'}:
+        if reason not in self.PENDING_REASONS:
             return Response({'error': 'reason inválido'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
@@ -1572,58 +1766,32 @@ class StorageAssetViewSet(viewsets.ModelViewSet):
             offset = int(request.query_params.get('offset', 0))
         except Exception:
             limit, offset = 50, 0
+        limit = max(0, min(limit, 500))
+        offset = max(0, offset)
 
         qs = self.get_queryset().filter(estado_transcodificacion='PENDIENTE')
         repo_id = request.query_params.get('repositorio')
         if repo_id:
             qs = qs.filter(repositorio_id=repo_id)
-
-        items = []
-
-        if reason == 'sin_archivo':
-            base = qs.filter(archivo_original__isnull=True) | qs.filter(archivo_original='')
-            for b in base.order_by('-fecha_subida')[offset:offset+limit]:
-                items.append({
-                    'id': str(b.id),
-                    'nombre': b.nombre_original,
-                    'archivo': None,
-                    'razon': 'Sin archivo original'
-                })
-
-        elif reason == 'archivo_no_existe' or reason == 'listo_para_iniciar':
-            base = qs.exclude(archivo_original__isnull=True).exclude(archivo_original='')
-            # Para evaluar presencia en filesystem, iteramos con margen amplio y aplicamos windowing manual
-            matched = []
-            skipped = 0
-            for b in base.order_by('-fecha_subida'):
-                try:
-                    try:
-                        file_path = b.archivo_original.path
-                    except Exception:
-                        file_path = os.path.join(settings.MEDIA_ROOT, str(b.archivo_original))
-                    exists = os.path.exists(file_path)
-                except Exception:
-                    exists = False
-
-                is_missing = not exists
-                if reason == 'archivo_no_existe' and is_missing:
-                    matched.append(b)
-                if reason == 'listo_para_iniciar' and not is_missing:
-                    matched.append(b)
-                # apply offset/limit
-                if len(matched) >= offset + limit:
-                    break
-            window = matched[offset:offset+limit]
-            for b in window:
-                items.append({
-                    'id': str(b.id),
-                    'nombre': b.nombre_original,
-                    'archivo': str(b.archivo_original),
-                    'razon': 'Archivo no existe' if reason == 'archivo_no_existe' else 'Listo para iniciar'
-                })
+        qs = qs.filter(self._pending_reason_q(reason))
+
+        label = self.PENDING_REASONS[reason]
+        rows = qs.order_by('-fecha_subida', '-pk').values_list('pk', 'nombre_original', 'archivo_original')
+        items = [
+            {
+                'id': str(pk),
+                'nombre': nombre,
+                'archivo': archivo or None,
+                'razon': label
+            }
+            for pk, nombre, archivo in rows[offset:offset + limit]
+        ]
 
         return Response({
             'count': len(items),
+            'total': qs.count(),
+            'offset': offset,
+            'limit': limit,
             'items': items
         })
 
@@ -1634,64 +1802,66 @@ class StorageAssetViewSet(viewsets.ModelViewSet):
         - Existencia del directorio
         - Total de archivos de video detectados
         - Lista de subdirectorios con conteo y muestras de archivos
+        Se arma desde el inventario (MediaFile); ?rescan=1 fuerza un escaneo incremental antes.
         """
+        from django.db.models import Count, F, Q, Window
+        from django.db.models.functions import RowNumber
+        from . import inventory
+        from .models import MediaDirectory
+
         sources_path = os.path.join(settings.MEDIA_ROOT, 'sources')
+        inventory.ensure_scanned(['sources'])
+        if request.query_params.get('rescan') in ['1', 'true', 'True']:
+            inventory.scan(['sources'])
+        root = MediaDirectory.objects.filter(path='sources').first()
         overview = {
             'media_root': str(settings.MEDIA_ROOT),
             'sources_path': sources_path,
-            'exists': os.path.exists(sources_path),
+            'exists': root is not None,
             'files_total': 0,
             'dirs_total': 0,
             'dirs': [],
             'top_level_files': [],
             'top_level_count': 0,
+            'scanned_at': root.fecha_escaneo if root else None,
         }
 
-        if not overview['exists']:
+        if root is None:
             return Response(overview)
 
-        VIDEO_EXTS = (
-            '.mov', '.mp4', '.avi', '.mkv', '.mxf', '.m4v', '.webm', '.wmv', '.mpg', '.mpeg', '.mts'
-        )
+        videos = inventory.video_files('sources')
 
-        # Top-level files in sources
-        try:
-            for sub in os.scandir(sources_path):
-                if sub.is_file():
-                    ext = os.path.splitext(sub.name)[1].lower()
-                    if ext in VIDEO_EXTS or ext == '':
-                        overview['top_level_files'].append(sub.name)
-            overview['top_level_files'] = overview['top_level_files'][:50]
-            overview['top_level_count'] = len(overview['top_level_files'])
-        except Exception as e:
-            logger.error(f"Error listando archivos top-level en sources: {e}")
+        # Archivos top-level en sources
+        top_level = videos.filter(directorio=root)
+        overview['top_level_count'] = top_level.count()
+        overview['top_level_files'] = list(top_level.order_by('nombre').values_list('nombre', flat=True)[:50])
 
-        # Primer nivel de subdirectorios en sources
-        try:
-            for entry in os.scandir(sources_path):
-                if entry.is_dir():
-                    dir_info = {
-                        'name': entry.name,
-                        'relpath': os.path.relpath(entry.path, settings.MEDIA_ROOT),
-                        'file_count': 0,
-                        'sample_files': []
-                    }
-                    # Contar archivos de video dentro (no recursivo por ahora)
-                    try:
-                        for sub in os.scandir(entry.path):
-                            if sub.is_file():
-                                ext = os.path.splitext(sub.name)[1].lower()
-                                if ext in VIDEO_EXTS or ext == '':
-                                    dir_info['file_count'] += 1
-                                    if len(dir_info['sample_files']) < 5:
-                                        dir_info['sample_files'].append(sub.name)
-                    except Exception as e:
-                        logger.error(f"Error escaneando {entry.path}: {e}")
-                    overview['dirs'].append(dir_info)
-            overview['dirs_total'] = len(overview['dirs'])
-            overview['files_total'] = sum(d['file_count'] for d in overview['dirs']) + overview['top_level_count']
-        except Exception as e:
-            logger.error(f"Error listando sources: {e}")
+        # Primer nivel de subdirectorios con conteo (no recursivo) en una consulta
+        dirs = (
+            MediaDirectory.objects.filter(parent=root)
+            .annotate(file_count=Count('archivos', filter=Q(archivos__extension__in=inventory.VIDEO_EXTENSIONS)))
+            .order_by('path')
+            .values('pk', 'path', 'file_count')
+        )
+        # Hasta 5 muestras por carpeta con ROW_NUMBER() en lugar de listar cada carpeta
+        samples = {}
+        muestras = (
+            videos.filter(directorio__parent=root)
+            .annotate(n=Window(RowNumber(), partition_by=[F('directorio')], order_by=F('nombre').asc()))
+            .filter(n__lte=5)
+            .values_list('directorio_id', 'nombre')
+        )
+        for directorio_id, nombre in muestras:
+            samples.setdefault(directorio_id, []).append(nombre)
+        for d in dirs:
+            overview['dirs'].append({
+                'name': d['path'].rsplit('/', 1)[-1],
+                'relpath': d['path'],
+                'file_count': d['file_count'],
+                'sample_files': sorted(samples.get(d['pk'], [])),
+            })
+        overview['dirs_total'] = len(overview['dirs'])
+        overview['files_total'] = sum(d['file_count'] for d in overview['dirs']) + overview['top_level_count']
 
         return Response(overview)
 
@@ -1906,15 +2076,280 @@ class StorageAssetViewSet(viewsets.ModelViewSet):
         return Response(result, status=status.HTTP_200_OK)
 
 
+class ProcessingErrorViewSet(VersionedListCacheMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Lista los errores de procesamiento. Solo lectura.
+
+    ``?since=`` activa el feed incremental (ver SincePagination): el log del
+    frontend pide solo los errores nuevos en lugar de la lista completa.
+    ``rollup/`` da los conteos diarios y ``<id>/stderr/`` el stderr archivado.
+    """
+    serializer_class = ProcessingErrorSerializer
+    pagination_class = SincePagination
+    list_cache_scope = table_scope(ProcessingError)
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['repositorio', 'modulo', 'directorio', 'stage', 'resolved']
+    search_fields = ['file_name', 'error_message']
+    ordering_fields = ['fecha_creacion', 'file_name', 'stage']
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = ProcessingError.objects.select_related('repositorio', 'modulo', 'directorio')
+        # Superusers ven todo
+        if user.is_superuser or user.is_staff:
+            return qs.order_by('-fecha_creacion')
+        if not user.is_authenticated:
+            return qs.none()
+        # Filtrar por repos permitidos
+        return get_context(user).filter_queryset(qs).order_by('-fecha_creacion')
+
+    @action(detail=False, methods=['get'])
+    def rollup(self, request):
+        """
+        Conteos diarios por repositorio y etapa (ProcessingErrorRollup).
+        Filtros: repositorio, stage, desde, hasta (YYYY-MM-DD).
+        """
+        from django.utils.dateparse import parse_date
+
+        user = request.user
+        if not user.is_authenticated:
+            return Response({'error': 'Autenticación requerida'}, status=status.HTTP_401_UNAUTHORIZED)
+        qs = ProcessingErrorRollup.objects.all()
+        if not (user.is_superuser or user.is_staff):
+            qs = get_context(user).filter_queryset(qs)
+
+        params = request.query_params
+        repositorio = params.get('repositorio', '').strip()
+        if repositorio:
+            if not repositorio.isdigit():
+                return Response({'error': 'repositorio debe ser numérico'}, status=status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(repositorio_id=int(repositorio))
+        if params.get('stage'):
+            qs = qs.filter(stage=params['stage'])
+        for param, lookup in (('desde', 'dia__gte'), ('hasta', 'dia__lte')):
+            raw = params.get(param, '').strip()
+            if raw:
+                try:
+                    value = parse_date(raw)
+                except ValueError:
+                    value = None
+                if value is None:
+                    return Response({'error': f'{param} debe tener formato YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+                qs = qs.filter(**{lookup: value})
+
+        rows = list(qs.order_by('-dia', 'repositorio_id', 'stage').values('dia', 'repositorio_id', 'stage', 'total'))
+        totales = {}
+        for row in rows:
+            totales[row['stage']] = totales.get(row['stage'], 0) + row['total']
+        return Response({
+            'results': [
+                {'dia': r['dia'], 'repositorio': r['repositorio_id'], 'stage': r['stage'], 'total': r['total']}
+                for r in rows
+            ],
+            'por_stage': totales,
+            'total': sum(totales.values()),
+        })
+
+    @action(detail=True, methods=['get'])
+    def stderr(self, request, pk=None):
+        """Mensaje completo del error; si fue compactado se descomprime de ProcessingErrorDetalle."""
+        from .models import ProcessingErrorDetalle
+
+        error = self.get_object()
+        detalle = ProcessingErrorDetalle.objects.filter(error_id=error.pk).first()
+        return Response({
+            'id': error.pk,
+            'archivado': detalle is not None,
+            'error_message': detalle.texto() if detalle else error.error_message,
+        })
+
+
+class EncodingPresetViewSet(viewsets.ModelViewSet):
+    """ViewSet para gestionar presets de codificación personalizados"""
+    serializer_class = EncodingPresetSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['categoria', 'es_global', 'activo', 'creado_por']
+    search_fields = ['nombre', 'descripcion']
+    ordering_fields = ['fecha_creacion', 'fecha_modificacion', 'veces_usado', 'nombre']
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Usuarios regulares ven:
+        - Presets globales activos
+        - Sus propios presets (activos e inactivos)
+        
+        Administradores ven todos los presets
+        """
+        user = self.request.user
+        qs = EncodingPreset.objects.all()
+        
+        # Admins ven todo
+        if user.is_superuser or user.is_staff:
+            return qs.order_by('-fecha_creacion')
+        
+        # Usuarios regulares: globales activos + propios
+        from django.db.models import Q
+        return qs.filter(
+            Q(es_global=True, activo=True) | Q(creado_por=user)
+        ).order_by('-fecha_creacion')
+
+    def get_permissions(self):
+        """
+        - list/retrieve: Authenticated
+        - create/update/delete: Admin only
+        """
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            return [IsAdminUser()]
+        return [IsAuthenticated()]
+
+    def perform_create(self, serializer):
+        """Asignar el usuario actual como creador"""
+        serializer.save(creado_por=self.request.user)
+        logger.info(f"✅ Preset creado: {serializer.instance.nombre} por {self.request.user.email}")
+
+    def perform_update(self, serializer):
+        """Log de actualizaciones"""
+        serializer.save()
+        logger.info(f"📝 Preset actualizado: {serializer.instance.nombre} por {self.request.user.email}")
+
+    def perform_destroy(self, instance):
+        """Desactivar en lugar de eliminar físicamente (soft delete)"""
+        instance.activo = False
+        instance.save(update_fields=['activo'])
+        logger.info(f"🗑️ Preset desactivado: {instance.nombre} por {self.request.user.email}")
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def increment_usage(self, request, pk=None):
+        """Incrementar contador de uso del preset"""
+        preset = self.get_object()
+        preset.incrementar_uso()
+        return Response({
+            'status': 'success',
+            'veces_usado': preset.veces_usado,
+            'mensaje': f'Uso registrado para {preset.nombre}'
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def by_category(self, request):
+        """Listar presets agrupados por categoría"""
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        categorias = {}
+        for preset in queryset:
+            cat = preset.get_categoria_display()
+            if cat not in categorias:
+                categorias[cat] = []
+            categorias[cat].append(self.get_serializer(preset).data)
+        
+        return Response(categorias)
+
+
+class StorageAssetViewSet(VersionedListCacheMixin, viewsets.ModelViewSet):
+    """ViewSet for general storage files - accepts all file types"""
+    queryset = StorageAsset.objects.select_related('repositorio', 'directorio', 'creado_por').order_by('-fecha_subida')
+    serializer_class = StorageAssetSerializer
+    list_cache_scope = table_scope(StorageAsset)
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    filterset_fields = ['repositorio', 'directorio', 'modulo', 'tipo_archivo', 'creado_por', 'estado']
+    search_asset_type = 'storage'
+    ordering_fields = ['fecha_subida', 'nombre_original', 'tipo_archivo', 'file_size']
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == 'list':
+            qs = qs.only(*STORAGE_LIST_ONLY)
+        return qs
+
+    def perform_create(self, serializer):
+        """Simple storage - just save the file, no processing"""
+        import os
+        
+        # Get file info before saving
+        uploaded_file = self.request.FILES.get('archivo_original')
+        
+        # Save instance with user
+        instance = serializer.save(
+            creado_por=self.request.user,
+            estado='COMPLETADO'  # Storage files are always complete immediately
+        )
+        
+        # Update file metadata after save
+        if instance.archivo_original:
+            filename = instance.archivo_original.name
+            ext = os.path.splitext(filename)[1].lower()
+            instance.tipo_archivo = ext if ext else 'unknown'
+            
+            # Get file size
+            try:
+                instance.file_size = instance.archivo_original.size
+            except Exception:
+                instance.file_size = 0
+            
+            # Save metadata only
+            instance.save(update_fields=['tipo_archivo', 'file_size'])
+        
+        logger.info(f"📦 Storage file saved: {instance.nombre_original} ({instance.tipo_archivo}, {instance.file_size} bytes)")
+    
+    def _delete_storage_files(self, storage_file):
+        """Delete physical files associated with a storage file."""
+        import os
+        
+        archivos_a_eliminar = []
+
+        # 1. Original file
+        if storage_file.archivo_original:
+            try:
+                archivos_a_eliminar.append(storage_file.archivo_original.path)
+                logger.info(f"  - Original file: {storage_file.archivo_original.path}")
+            except Exception as e:
+                logger.error(f"  - Error getting original file path: {e}")
+
+        # 2. Thumbnail (if exists)
+        if storage_file.thumbnail:
+            try:
+                archivos_a_eliminar.append(storage_file.thumbnail.path)
+                logger.info(f"  - Thumbnail: {storage_file.thumbnail.path}")
+            except Exception as e:
+                logger.error(f"  - Error getting thumbnail path: {e}")
+
+        # Delete all physical files
+        for archivo_path in archivos_a_eliminar:
+            try:
+                if os.path.exists(archivo_path):
+                    os.remove(archivo_path)
+                    logger.info(f"  ✓ Deleted: {archivo_path}")
+                else:
+                    logger.warning(f"  ⚠ Does not exist: {archivo_path}")
+            except Exception as e:
+                logger.error(f"  ✗ Error deleting {archivo_path}: {e}")
+
+    def destroy(self, request, *args, **kwargs):
+        """Override destroy method to delete physical files before database record."""
+        storage_file = self.get_object()
+        logger.info(f"🗑️  Deleting storage file {storage_file.id} - {storage_file.nombre_original}")
+        self._delete_storage_files(storage_file)
+        logger.info(f"  ✓ Database record deleted")
+        return super().destroy(request, *args, **kwargs)
+
+
 @api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
 def shared_link_public(request, link_id):
     """
     Vista pública para acceder a un link compartido (sin autenticación)
     GET: Retorna la información del link y broadcast
     POST: Registra una reproducción (analytics)
     """
-    # Buscar el link
-    link = get_object_or_404(SharedLink, id=link_id)
+    from django.http import Http404
+    from . import sharelinks
+
+    # Buscar el link (cacheado; ver core.sharelinks)
+    link = sharelinks.get_link(link_id)
+    if link is None:
+        raise Http404
     
     # Verificar que esté vigente
     if not link.esta_vigente():
@@ -1932,12 +2367,9 @@ def shared_link_public(request, link_id):
                 status=status.HTTP_401_UNAUTHORIZED
             )
     
-    # Si es GET, incrementar vistas y retornar datos
+    # Si es GET, contar la vista (en cache, se guarda en lote) y retornar datos
     if request.method == 'GET':
-        link.vistas += 1
-        link.ultima_visita = timezone.now()
-        link.save(update_fields=['vistas', 'ultima_visita'])
-        
+        sharelinks.record(link.pk, 'vistas')
         serializer = SharedLinkPublicSerializer(link, context={'request': request})
         return Response(serializer.data)
     
@@ -1945,46 +2377,42 @@ def shared_link_public(request, link_id):
     if request.method == 'POST':
         action_type = request.data.get('action')
         if action_type == 'play':
-            link.reproducciones += 1
-            link.save(update_fields=['reproducciones'])
-            return Response({'success': True, 'reproducciones': link.reproducciones})
+            sharelinks.record(link.pk, 'reproducciones')
+            # Valor aproximado: lo guardado al cachear el link + lo pendiente en cache
+            reproducciones = link.reproducciones + sharelinks.pending(link.pk)['reproducciones']
+            return Response({'success': True, 'reproducciones': reproducciones})
     
     return Response({'error': 'Método no permitido'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-# Hacemos la vista pública accesible sin autenticación
-shared_link_public.permission_classes = [AllowAny]
-
-
-class AudioViewSet(viewsets.ModelViewSet):
+class AudioViewSet(VersionedListCacheMixin, viewsets.ModelViewSet):
     """ViewSet para archivos de audio, similar a BroadcastViewSet"""
     serializer_class = AudioSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    list_cache_scope = table_scope(Audio)
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter]
     filterset_fields = ['repositorio', 'estado_procesamiento', 'modulo', 'directorio']
-    search_fields = ['nombre_original', 'metadata__titulo', 'metadata__artista']
+    search_asset_type = 'audio'
 
     def get_queryset(self):
         """
         Filtrar audios según los permisos del usuario.
         """
         user = self.request.user
+        qs = Audio.objects.select_related(*ASSET_SELECT_RELATED).order_by('-fecha_subida')
+        if self.action == 'list':
+            qs = _list_projection(qs, AudioSerializer, self.request, AUDIO_LIST_ONLY)
         
         # Para desarrollo: si no está autenticado, retornar todos (modo demo)
         if not user.is_authenticated:
-            return Audio.objects.all().order_by('-fecha_subida')
+            return qs
         
         # Si es superuser o staff, puede ver todos los audios
         if user.is_superuser or user.is_staff:
-            return Audio.objects.all().order_by('-fecha_subida')
+            return qs
         
         # Usuarios normales solo ven audios de sus repositorios asignados
-        repositorios_ids = RepositorioPermiso.objects.filter(
-            usuario=user,
-            puede_ver=True
-        ).values_list('repositorio_id', flat=True)
-        return Audio.objects.filter(
-            repositorio_id__in=repositorios_ids
-        ).order_by('-fecha_subida')
+        return get_context(user).filter_queryset(qs)
 
     def create(self, request, *args, **kwargs):
         """
@@ -2133,19 +2561,23 @@ class SistemaInformacionViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response({'detail': 'No system information available'}, status=status.HTTP_404_NOT_FOUND)
 
-# Hacemos la vista pública accesible sin autenticación
-shared_link_public.permission_classes = [AllowAny]
-
-
-class ImageAssetViewSet(viewsets.ModelViewSet):
-    queryset = ImageAsset.objects.all().order_by('-fecha_subida')
+class ImageAssetViewSet(VersionedListCacheMixin, viewsets.ModelViewSet):
+    queryset = ImageAsset.objects.select_related('repositorio', 'directorio', 'creado_por').order_by('-fecha_subida')
     serializer_class = ImageAssetSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    list_cache_scope = table_scope(ImageAsset)
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['repositorio', 'directorio', 'modulo', 'tipo_archivo', 'creado_por', 'estado']
-    search_fields = ['nombre_original', 'metadata']
+    search_asset_type = 'image'
     ordering_fields = ['fecha_subida', 'nombre_original', 'tipo_archivo']
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == 'list':
+            qs = qs.only(*IMAGE_LIST_ONLY)
+        return qs
+
     def perform_create(self, serializer):
         instance = serializer.save(creado_por=self.request.user)
         
@@ -0,0 +1,134 @@
+"""
+Registro de workers Celery vivos, guardado en cache (Redis).
+
+Cada worker se anota al arrancar (``worker_ready``) y se refresca con sus
+heartbeats (``heartbeat_sent``, cada ~2 s; se escribe como mucho cada
+``WORKER_REGISTRY_REFRESH`` segundos). Al apagarse se borra. Un worker que deja
+de latir desaparece solo tras ``WORKER_HEARTBEAT_TTL`` segundos.
+
+El registro es una sola llave ``{hostname: {...}}``, así que preguntar si hay
+workers (``workers_online``) es un GET al cache en lugar del broadcast
+``control.inspect().stats()`` que esperaba la respuesta de cada worker.
+"""
+import logging
+import os
+import time
+
+from celery.signals import heartbeat_sent, worker_ready, worker_shutting_down
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_KEY = 'celery:workers'
+DEFAULT_QUEUE = 'celery'
+
+# Estado del worker en este proceso (lo llenan las señales de Celery)
+_local = {'hostname': None, 'queues': [], 'concurrency': None, 'started': None, 'written': 0.0}
+
+
+def _ttl():
+    return getattr(settings, 'WORKER_HEARTBEAT_TTL', 30)
+
+
+def _read():
+    return cache.get(REGISTRY_KEY) or {}
+
+
+def _alive(registry, now=None):
+    now = now or time.time()
+    return {host: info for host, info in registry.items() if now - info.get('last_seen', 0) <= _ttl()}
+
+
+def _write(hostname, info):
+    # Read-modify-write sin candado: si dos workers escriben a la vez uno se pierde,
+    # pero se vuelve a anotar en su siguiente heartbeat (segundos después)
+    registry = _alive(_read())
+    if info is None:
+        registry.pop(hostname, None)
+    else:
+        registry[hostname] = info
+    # La llave expira sola si todos los workers se caen sin avisar
+    cache.set(REGISTRY_KEY, registry, _ttl() * 2)
+
+
+def register(hostname, queues=None, concurrency=None):
+    now = time.time()
+    _local.update(hostname=hostname, written=now, started=_local['started'] or now)
+    if queues is not None:
+        _local['queues'] = sorted(queues)
+    if concurrency is not None:
+        _local['concurrency'] = concurrency
+    try:
+        _write(hostname, {
+            'hostname': hostname,
+            'queues': _local['queues'] or [DEFAULT_QUEUE],
+            'concurrency': _local['concurrency'],
+            'pid': os.getpid(),
+            'started': _local['started'],
+            'last_seen': now,
+        })
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo registrar el worker {hostname}: {e}")
+
+
+def unregister(hostname):
+    try:
+        _write(hostname, None)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo dar de baja el worker {hostname}: {e}")
+
+
+def heartbeat():
+    if not _local['hostname']:
+        return
+    if time.time() - _local['written'] < getattr(settings, 'WORKER_REGISTRY_REFRESH', 10):
+        return
+    register(_local['hostname'])
+
+
+def snapshot():
+    """Workers vivos y conteo por cola. ``None`` si el cache no está disponible."""
+    try:
+        registry = _alive(_read())
+    except Exception as e:
+        logger.debug(f"Registro de workers no disponible: {e}")
+        return None
+    queues = {}
+    for info in registry.values():
+        for queue in info.get('queues') or [DEFAULT_QUEUE]:
+            queues[queue] = queues.get(queue, 0) + 1
+    return {'workers': sorted(registry.values(), key=lambda w: w['hostname']), 'queues': queues}
+
+
+def workers_online(queue=DEFAULT_QUEUE):
+    """True si algún worker vivo consume ``queue``. Sin cache se asume que no hay (mismo Redis que el broker)."""
+    state = snapshot()
+    return bool(state and state['queues'].get(queue))
+
+
+# ------------------------------------------------------------
+# Señales de Celery (solo se disparan dentro del proceso worker)
+# ------------------------------------------------------------
+@worker_ready.connect(dispatch_uid='core_workers_ready')
+def _on_worker_ready(sender=None, **kwargs):
+    queues = None
+    try:
+        queues = [q.name for q in sender.task_consumer.queues]
+    except Exception:
+        try:
+            queues = list(sender.app.amqp.queues.consume_from)
+        except Exception:
+            pass
+    concurrency = getattr(getattr(sender, 'pool', None), 'num_processes', None)
+    register(sender.hostname, queues=queues, concurrency=concurrency)
+
+
+@heartbeat_sent.connect(dispatch_uid='core_workers_heartbeat')
+def _on_heartbeat(sender=None, **kwargs):
+    heartbeat()
+
+
+@worker_shutting_down.connect(dispatch_uid='core_workers_shutdown')
+def _on_worker_shutting_down(sender=None, **kwargs):
+    unregister(_local['hostname'] or sender)
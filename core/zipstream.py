@@ -0,0 +1,99 @@
+"""
+Generación de archivos ZIP en streaming (sin archivos temporales).
+
+Las entradas se escriben con compresión STORED (los masters de video/audio ya
+vienen comprimidos) y con extensiones ZIP64 cuando el archivo o el total superan
+los 4 GB. Cada archivo se lee del disco por bloques y los bytes producidos por
+``zipfile`` se entregan inmediatamente al cliente, así que la memoria usada es
+constante sin importar el tamaño de la carpeta.
+"""
+import io
+import logging
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de lectura del disco (1 MB)
+CHUNK_SIZE = 1024 * 1024
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Destino no-seekable para ZipFile que acumula bytes hasta que se drenan."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def safe_component(name, default='_'):
+    """Un solo componente de ruta (nombre de carpeta o archivo) sin separadores ni '.'/'..'."""
+    name = str(name or '').replace('/', '_').replace('\\', '_').strip()
+    return default if name in ('', '.', '..') else name
+
+
+def safe_arcname(arcname):
+    """Ruta relativa dentro del ZIP: sin '\\', sin '/' inicial ni componentes '.'/'..' (zip slip)."""
+    parts = (p.strip() for p in str(arcname).replace('\\', '/').split('/'))
+    return '/'.join(p for p in parts if p not in ('', '.', '..'))
+
+
+def unique_arcname(arcname, used):
+    """Evita nombres repetidos dentro del ZIP agregando un sufijo ' (n)'."""
+    if arcname not in used:
+        used.add(arcname)
+        return arcname
+    base, dot, ext = arcname.rpartition('.')
+    if not dot or '/' in ext:
+        base, ext = arcname, ''
+    n = 2
+    while True:
+        candidate = f"{base} ({n}).{ext}" if ext else f"{base} ({n})"
+        if candidate not in used:
+            used.add(candidate)
+            return candidate
+        n += 1
+
+
+def iter_zip(entries, chunk_size=CHUNK_SIZE):
+    """
+    Genera los bytes de un ZIP a partir de ``entries`` (iterable de tuplas
+    ``(arcname, ruta_absoluta)``). Los archivos que no existen se omiten.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for arcname, path in entries:
+            try:
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+                src = open(path, 'rb')
+            except OSError as e:
+                logger.warning(f"ZIP: se omite {path}: {e}")
+                continue
+            zinfo.compress_type = zipfile.ZIP_STORED
+            with src, zf.open(zinfo, mode='w') as dst:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Directorio central
+    data = buffer.drain()
+    if data:
+        yield data
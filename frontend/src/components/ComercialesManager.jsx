@@ -15,6 +15,7 @@ import ErrorLogModal from './ErrorLogModal';
 import { useLanguage } from '../context/LanguageContext';
 import { useAuth } from '../context/AuthContext';
 import { getFileIcon, getExtensionBadge } from '../utils/fileIcons';
+import { useServerEvents } from '../utils/serverEvents';
 
 function ComercialesManager() {
   // Log control refs to avoid noisy console spam in dev (StrictMode double renders, etc.)
@@ -136,14 +137,27 @@ function ComercialesManager() {
     }
   }, [selectedRepo, selectedModulo, uploadCount, searchTerm]);
 
-  // Polling para actualizar estado de videos en proceso
+  // Eventos del repositorio en tiempo real: recargar (agrupando ráfagas) en lugar de polling
+  const eventRefreshRef = useRef(null);
+  const live = useServerEvents(selectedRepo, (ev) => {
+    if (!/^(asset\.|table\.changed|stream\.open)/.test(ev.event)) return;
+    if (eventRefreshRef.current) return;
+    eventRefreshRef.current = setTimeout(() => {
+      eventRefreshRef.current = null;
+      if (!fetchingRef.current) fetchComerciales();
+    }, 1000);
+  }, !!selectedRepo);
+
+  useEffect(() => () => clearTimeout(eventRefreshRef.current), []);
+
+  // Polling para actualizar estado de videos en proceso (solo si no hay canal de eventos)
   useEffect(() => {
     const processing = comerciales.filter(c => 
       c.estado_transcodificacion === 'PROCESANDO' || 
       c.estado_transcodificacion === 'PENDIENTE'
     );
     
-    if (processing.length > 0) {
+    if (processing.length > 0 && !live) {
       console.log(`🔄 ${processing.length} videos procesando, polling activado`);
       // Refrescar cada 5 segundos si hay videos procesando
       const interval = setInterval(() => {
@@ -157,7 +171,7 @@ function ComercialesManager() {
         clearInterval(interval);
       };
     }
-  }, [comerciales.filter(c => c.estado_transcodificacion === 'PROCESANDO' || c.estado_transcodificacion === 'PENDIENTE').length]);
+  }, [live, comerciales.filter(c => c.estado_transcodificacion === 'PROCESANDO' || c.estado_transcodificacion === 'PENDIENTE').length]);
 
   // Helper function to get modules
   const getSelectedRepoModulos = () => {
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import axios from '../utils/axios';
+import { useServerEvents } from '../utils/serverEvents';
 
 // Presets profesionales basados en FFWorks
 const ENCODING_PRESETS = {
@@ -284,9 +285,14 @@ function EncodingModal({ comercial, onClose, onSuccess }) {
     loadDbPresets();
   }, []);
 
-  // Polling cuando está codificando
+  // Eventos del broadcast en tiempo real mientras se codifica
+  const live = useServerEvents(comercial?.repositorio, (ev) => {
+    if ((ev.event === 'asset.updated' && ev.id === comercial?.id) || ev.event === 'stream.open') refreshComercial();
+  }, encoding && !!comercial?.repositorio);
+
+  // Polling cuando está codificando (solo si no hay canal de eventos)
   useEffect(() => {
-    if (encoding) {
+    if (encoding && !live) {
       // Verificar cada 5 segundos
       const interval = setInterval(refreshComercial, 5000);
       setPollingInterval(interval);
@@ -300,7 +306,7 @@ function EncodingModal({ comercial, onClose, onSuccess }) {
         setPollingInterval(null);
       }
     }
-  }, [encoding]);
+  }, [encoding, live]);
 
   // Limpiar polling al desmontar
   useEffect(() => {
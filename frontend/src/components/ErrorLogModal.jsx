@@ -1,5 +1,6 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import axios from '../utils/axios';
+import { useServerEvents } from '../utils/serverEvents';
 
 function formatDate(dt) {
   try {
@@ -14,34 +15,79 @@ export default function ErrorLogModal({ open, onClose, repositorioId, moduloId,
   const [errors, setErrors] = useState([]);
   const [autoRefresh, setAutoRefresh] = useState(true);
 
-  const fetchErrors = async () => {
+  // Token del feed incremental (?since=): después de la primera carga solo se piden los errores nuevos
+  const sinceRef = useRef(null);
+
+  const fetchErrors = async (full = false) => {
     if (!repositorioId) return;
-    setLoading(true);
+    const incremental = !full && sinceRef.current;
+    if (!incremental) setLoading(true);
     try {
       const params = new URLSearchParams();
       params.append('repositorio', repositorioId);
       if (moduloId) params.append('modulo', moduloId);
       if (directorioId) params.append('directorio', directorioId);
-      params.append('ordering', '-fecha_creacion');
+      params.append('since', incremental ? sinceRef.current : '');
       const res = await axios.get(`/api/processing-errors/?${params.toString()}`);
-      setErrors(res.data || []);
+      const { results = [], since = '', has_more: hasMore = false } = res.data || {};
+      if (incremental && hasMore) {
+        // Demasiados errores nuevos: más barato recargar la ventana reciente
+        sinceRef.current = null;
+        return fetchErrors(true);
+      }
+      sinceRef.current = since || null;
+      if (incremental) {
+        if (results.length) {
+          const nuevos = new Set(results.map(e => e.id));
+          setErrors(prev => [...results, ...prev.filter(e => !nuevos.has(e.id))]);
+        }
+      } else {
+        setErrors(results);
+      }
     } catch (e) {
       console.error('Error fetching processing errors', e);
     } finally {
-      setLoading(false);
+      if (!incremental) setLoading(false);
     }
   };
 
   useEffect(() => {
     if (!open) return;
-    fetchErrors();
+    sinceRef.current = null;
+    fetchErrors(true);
   }, [open, repositorioId, moduloId, directorioId]);
 
+  // Con /api/events/ conectado se recarga solo cuando cambian los errores. Las ráfagas
+  // (muchos fallos seguidos) se agrupan en una sola petición por segundo
+  const eventRefreshRef = useRef(null);
+  const fullRefreshRef = useRef(false);
+  const live = useServerEvents(repositorioId, (ev) => {
+    if (ev.event === 'error.deleted') {
+      setErrors(prev => prev.filter(e => e.id !== ev.id));
+      return;
+    }
+    // Un error existente cambió, la compactación borró errores o hubo reconexión: recargar la ventana;
+    // error.created solo pide los nuevos (?since=)
+    const reload = ev.event === 'error.updated' || ev.event === 'stream.open'
+      || (ev.event === 'table.changed' && (ev.tables || []).includes('processingerror'));
+    if (!reload && ev.event !== 'error.created') return;
+    if (reload) fullRefreshRef.current = true;
+    if (eventRefreshRef.current) return;
+    eventRefreshRef.current = setTimeout(() => {
+      eventRefreshRef.current = null;
+      const full = fullRefreshRef.current;
+      fullRefreshRef.current = false;
+      fetchErrors(full);
+    }, 1000);
+  }, open && autoRefresh && !!repositorioId);
+
+  useEffect(() => () => clearTimeout(eventRefreshRef.current), []);
+
   useEffect(() => {
-    if (!open || !autoRefresh) return;
-    const id = setInterval(fetchErrors, 5000);
+    if (!open || !autoRefresh || live) return;
+    const id = setInterval(() => fetchErrors(), 5000);
     return () => clearInterval(id);
-  }, [open, autoRefresh, repositorioId, moduloId, directorioId]);
+  }, [open, autoRefresh, live, repositorioId, moduloId, directorioId]);
 
   if (!open) return null;
 
@@ -54,7 +100,7 @@ export default function ErrorLogModal({ open, onClose, repositorioId, moduloId,
             <label className="flex items-center gap-1 text-sm text-gray-700">
               <input type="checkbox" checked={autoRefresh} onChange={e => setAutoRefresh(e.target.checked)} /> Auto refrescar
             </label>
-            <button onClick={fetchErrors} className="px-3 py-1 rounded bg-gray-100 hover:bg-gray-200 text-sm">Refrescar</button>
+            <button onClick={() => fetchErrors(true)} className="px-3 py-1 rounded bg-gray-100 hover:bg-gray-200 text-sm">Refrescar</button>
             <button onClick={onClose} className="px-3 py-1 rounded bg-gray-200 hover:bg-gray-300 text-sm">Cerrar</button>
           </div>
         </div>
@@ -1,5 +1,6 @@
 import { useState, useRef, useEffect } from 'react';
 import axios from '../utils/axios';
+import { CHUNKED_UPLOAD_THRESHOLD, uploadChunked } from '../utils/chunkedUpload';
 import { useLanguage } from '../context/LanguageContext';
 
 // Support both old and new prop names from callers
@@ -442,16 +443,29 @@ function MultiFileUploader(props) {
         uploadEndpoint = 'http://localhost:8000/api/storage/';
       }
 
-      await axios.post(uploadEndpoint, formData, {
-        headers: { 'Content-Type': 'multipart/form-data' },
-        signal: abortControllerRef.current?.signal,
-        onUploadProgress: (progressEvent) => {
-          const percentCompleted = Math.round((progressEvent.loaded * 100) / progressEvent.total);
-          setFiles(prev => prev.map(f => 
-            f.id === fileData.id ? { ...f, progress: percentCompleted } : f
-          ));
-        }
-      });
+      const onProgress = (percent) => setFiles(prev => prev.map(f =>
+        f.id === fileData.id ? { ...f, progress: percent } : f
+      ));
+
+      if (fileData.file.size >= CHUNKED_UPLOAD_THRESHOLD) {
+        // Archivos grandes: por partes y reanudable (/api/uploads/sessions/)
+        const tipo = isAudioModule ? 'audio' : isImagesModule ? 'image' : isStorageModule ? 'storage' : 'broadcast';
+        await uploadChunked(fileData.file, tipo, {
+          repositorio: repositorioId,
+          directorio: targetDirId,
+          modulo: moduloId || null,
+          pizarra,
+          metadata,
+        }, { onProgress, signal: abortControllerRef.current?.signal });
+      } else {
+        await axios.post(uploadEndpoint, formData, {
+          headers: { 'Content-Type': 'multipart/form-data' },
+          signal: abortControllerRef.current?.signal,
+          onUploadProgress: (progressEvent) => {
+            onProgress(Math.round((progressEvent.loaded * 100) / progressEvent.total));
+          }
+        });
+      }
 
       // Marcar como completado
       setFiles(prev => prev.map(f => 
@@ -480,7 +494,7 @@ function MultiFileUploader(props) {
         f.id === fileData.id ? { 
           ...f, 
           status: 'error', 
-          error: error.response?.data?.message || 'Error uploading file'
+          error: error.response?.data?.message || error.response?.data?.error || 'Error uploading file'
         } : f
       ));
     }
@@ -494,11 +508,31 @@ function MultiFileUploader(props) {
       return;
     }
 
+    // Validar todo el lote contra la base (una sola petición) antes de enviar bytes
+    let toUpload = pendingFiles;
+    try {
+      const tipo = ['audio', 'images', 'storage'].includes(moduloInfo?.tipo) ? moduloInfo.tipo : 'broadcast';
+      const res = await axios.post('/api/uploads/precheck/', { tipo, files: pendingFiles.map(f => f.name) });
+      const rejected = new Map((res.data.duplicates || []).map(d => [d.name, d]));
+      if (rejected.size > 0) {
+        setFiles(prev => prev.map(f => {
+          const dup = rejected.get(f.name);
+          return dup && f.status === 'pending'
+            ? { ...f, status: 'error', error: dup.repositorio ? `Ya existe en el repositorio ${dup.repositorio}` : 'Ya existe en otro repositorio' }
+            : f;
+        }));
+        toUpload = pendingFiles.filter(f => !rejected.has(f.name));
+      }
+    } catch (e) {
+      // Si la validación previa falla, el servidor vuelve a validar cada archivo al subirlo
+      console.warn('No se pudo validar duplicados antes de subir', e);
+    }
+
     // Create nuevo AbortController para esta sesión de carga
     abortControllerRef.current = new AbortController();
 
     // Upload files secuencialmente (uno a la vez)
-    for (const fileData of pendingFiles) {
+    for (const fileData of toUpload) {
       // Si se canceló, detener el loop
       if (abortControllerRef.current.signal.aborted) {
         break;
@@ -1,7 +1,8 @@
 // frontend/src/components/RepositoriosManager.jsx
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom'; // Importar Link
 import axios from '../utils/axios';
+import { useServerEvents } from '../utils/serverEvents';
 import RepoUsuariosModal from './RepoUsuariosModal';
 
 export default function RepositoriosManager() {
@@ -119,14 +120,26 @@ export default function RepositoriosManager() {
     fetchModulos();
   }, []);
 
-  // Auto-refresh del estado cuando está procesando
+  // Estado de transcodificación en tiempo real (agrupando ráfagas de eventos)
+  const statusRefreshRef = useRef(null);
+  const live = useServerEvents(statusRepo?.id, (ev) => {
+    if (!/^(asset\.|table\.changed|stream\.open)/.test(ev.event) || statusRefreshRef.current) return;
+    statusRefreshRef.current = setTimeout(() => {
+      statusRefreshRef.current = null;
+      fetchStatus(statusRepo.id);
+    }, 1000);
+  }, autoRefresh && !!statusRepo);
+
+  useEffect(() => () => clearTimeout(statusRefreshRef.current), []);
+
+  // Auto-refresh del estado cuando está procesando (solo si no hay canal de eventos)
   useEffect(() => {
-    if (!autoRefresh || !statusRepo) return;
+    if (!autoRefresh || !statusRepo || live) return;
     const interval = setInterval(() => {
       fetchStatus(statusRepo.id);
     }, 5000); // cada 5 segundos
     return () => clearInterval(interval);
-  }, [autoRefresh, statusRepo]);
+  }, [autoRefresh, statusRepo, live]);
 
   const fetchRepositorios = async () => {
     try {
@@ -0,0 +1,70 @@
+import axios from './axios';
+
+// Upload reanudable por partes (ver core/uploads.py).
+// Se usa para archivos grandes: si la conexión se cae, el siguiente intento
+// consulta qué partes ya tiene el servidor y solo sube las faltantes.
+export const CHUNKED_UPLOAD_THRESHOLD = 100 * 1024 * 1024;
+const PARALLEL_CHUNKS = 4;
+const MAX_RETRIES = 3;
+
+const storageKey = (file, tipo) => `upload-session:${tipo}:${file.name}:${file.size}:${file.lastModified}`;
+
+async function sha256Header(blob) {
+  // crypto.subtle solo existe en contextos seguros (https / localhost)
+  if (!window.crypto?.subtle) return {};
+  const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+  const b64 = btoa(String.fromCharCode(...new Uint8Array(digest)));
+  return { 'Upload-Checksum': `sha256 ${b64}` };
+}
+
+async function openOrResume(file, tipo, fields) {
+  const key = storageKey(file, tipo);
+  const saved = localStorage.getItem(key);
+  if (saved) {
+    try {
+      const res = await axios.get(`/api/uploads/sessions/${saved}/`);
+      if (res.data.estado === 'ABIERTA') return res.data;
+    } catch (e) {
+      // Sesión expirada o de otro usuario: se abre una nueva
+    }
+    localStorage.removeItem(key);
+  }
+  const res = await axios.post('/api/uploads/sessions/', { tipo, nombre: file.name, tamano: file.size, ...fields });
+  localStorage.setItem(key, res.data.id);
+  return res.data;
+}
+
+export async function uploadChunked(file, tipo, fields, { onProgress, signal } = {}) {
+  const session = await openOrResume(file, tipo, fields);
+  const { id, chunk_size: chunkSize } = session;
+  const pending = [...session.faltantes];
+  let sent = session.recibidos;
+  onProgress?.(Math.round((sent * 100) / file.size));
+
+  const putChunk = async (indice) => {
+    const blob = file.slice(indice * chunkSize, Math.min(file.size, (indice + 1) * chunkSize));
+    const headers = { 'Content-Type': 'application/octet-stream', ...(await sha256Header(blob)) };
+    for (let attempt = 1; ; attempt += 1) {
+      try {
+        await axios.put(`/api/uploads/sessions/${id}/chunks/${indice}/`, blob, { headers, signal });
+        sent += blob.size;
+        onProgress?.(Math.round((sent * 100) / file.size));
+        return;
+      } catch (error) {
+        // 409: la sesión se canceló o se confirmó, reintentar no sirve
+        if (axios.isCancel(error) || error.response?.status === 409 || attempt >= MAX_RETRIES) throw error;
+      }
+    }
+  };
+
+  const worker = async () => {
+    while (pending.length) {
+      await putChunk(pending.shift());
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(PARALLEL_CHUNKS, pending.length) }, worker));
+
+  const res = await axios.post(`/api/uploads/sessions/${id}/commit/`, {}, { signal });
+  localStorage.removeItem(storageKey(file, tipo));
+  return res.data;
+}
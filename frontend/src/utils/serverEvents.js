@@ -0,0 +1,43 @@
+import { useEffect, useRef, useState } from 'react';
+
+const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+// Suscripción a /api/events/ (SSE, ver core/events.py).
+// onEvent recibe cada evento ({event, repositorio, ...}) y también
+// {event: 'stream.open'} al (re)conectar, para recargar lo que se haya perdido.
+// Regresa true mientras la conexión está abierta: los componentes mantienen
+// su polling con setInterval solo cuando es false (servidor sin Redis, red caída).
+export function useServerEvents(repositorioId, onEvent, enabled = true) {
+  const [connected, setConnected] = useState(false);
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+
+  useEffect(() => {
+    if (!enabled || typeof EventSource === 'undefined') return;
+    const query = repositorioId ? `?repositorio=${repositorioId}` : '';
+    const source = new EventSource(`${API_BASE_URL}/api/events/${query}`, { withCredentials: true });
+    let opened = false;
+
+    source.onopen = () => {
+      setConnected(true);
+      // En la primera conexión el componente ya cargó sus datos
+      if (opened) handlerRef.current?.({ event: 'stream.open' });
+      opened = true;
+    };
+    source.onerror = () => setConnected(false);
+    source.onmessage = (e) => {
+      try {
+        handlerRef.current?.(JSON.parse(e.data));
+      } catch (err) {
+        console.error('Evento inválido de /api/events/', err);
+      }
+    };
+
+    return () => {
+      source.close();
+      setConnected(false);
+    };
+  }, [repositorioId, enabled]);
+
+  return connected;
+}